@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.database import get_async_db
+from app.api.auth import get_current_user
+from app.models import User
+from app.schemas.activity import ActivityLogResponse
+from app.services.activity_service import ActivityService
+from app.services.pagination import next_cursor
+
+router = APIRouter()
+
+
+@router.get("/", response_model=list[ActivityLogResponse])
+async def list_activity(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List the AI actions taken for the user, newest first
+    
+    Pass the X-Next-Cursor response header back as cursor to get the next
+    page; skip is only used when no cursor is given.
+    """
+    try:
+        logs = await ActivityService().get_recent_activity(
+            db, current_user.id, limit=limit, skip=skip, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    next_page = next_cursor(logs, limit, "created_at")
+    if next_page:
+        response.headers["X-Next-Cursor"] = next_page
+    
+    return logs
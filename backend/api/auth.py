@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+from uuid import UUID
 
-from app.database import get_db
+from app.database import get_async_db
 from app.services.auth_service import AuthService
 from app.schemas.user import TokenResponse, UserResponse
 from app.models import User
@@ -10,6 +12,27 @@ from app.models import User
 router = APIRouter()
 auth_service = AuthService()
 
+# OAuth2 scheme for token extraction
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+
+# Dependency to get current user from JWT token
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Get current user from JWT token"""
+    try:
+        user_id = auth_service.verify_token(token)
+        user = await db.get(User, UUID(user_id))
+        
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        
+        return user
+    except Exception as e:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
 
 @router.get("/google/login")
 async def google_login(state: Optional[str] = None):
@@ -22,7 +45,7 @@ async def google_login(state: Optional[str] = None):
 async def google_callback(
     code: str = Query(...),
     state: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle Google OAuth callback"""
     try:
@@ -35,7 +58,7 @@ async def google_callback(
 @router.post("/refresh")
 async def refresh_token(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Refresh Google OAuth token"""
     try:
@@ -50,26 +73,3 @@ async def logout(current_user: User = Depends(get_current_user)):
     """Logout user"""
     # In a production app, you might want to invalidate the JWT token
     return {"status": "success", "message": "Logged out successfully"}
-
-
-# Dependency to get current user from JWT token
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current user from JWT token"""
-    try:
-        user_id = auth_service.verify_token(token)
-        user = db.query(User).filter(User.id == user_id).first()
-        
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        
-        return user
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-
-
-# OAuth2 scheme for token extraction
-from fastapi.security import OAuth2PasswordBearer
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -1,22 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 
-from app.database import get_db
+from app.database import get_async_db
 from app.api.auth import get_current_user
-from app.models import User, Email, CalendarEvent, EmailStatus, EmailClassification
+from app.models import User, Email, CalendarEvent, EmailStatus
+from app.services.brief_service import BriefService
+from app.services.stats_service import StatsService
 
 router = APIRouter()
 
 
 @router.get("/today")
 async def get_todays_brief(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get Today's Brief - the main view of the application
     
+    Served from the user's incrementally maintained brief projection.
+    Honors If-None-Match with the projection version as ETag.
+    
     Returns:
         {
             "handled_automatically": [...],
@@ -24,119 +31,77 @@ async def get_todays_brief(
             "upcoming": [...]
         }
     """
-    # Get emails from last 24 hours
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    
-    # Handled Automatically
-    handled = db.query(Email).filter(
-        Email.user_id == current_user.id,
-        Email.status.in_([EmailStatus.ARCHIVED, EmailStatus.REPLIED]),
-        Email.processed_at >= yesterday
-    ).order_by(Email.processed_at.desc()).limit(20).all()
+    projection = await BriefService().get(db, current_user.id)
     
-    # Needs Attention
-    needs_attention = db.query(Email).filter(
-        Email.user_id == current_user.id,
-        Email.status == EmailStatus.PENDING_APPROVAL
-    ).order_by(Email.priority_score.desc()).limit(20).all()
-    
-    # Also include high-priority unprocessed emails
-    urgent_emails = db.query(Email).filter(
-        Email.user_id == current_user.id,
-        Email.status == EmailStatus.PROCESSED,
-        Email.classification.in_([EmailClassification.URGENT, EmailClassification.ACTION_REQUIRED]),
-        Email.priority_score >= 70
-    ).order_by(Email.priority_score.desc()).limit(10).all()
+    etag = f'"{projection.version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
     
-    needs_attention.extend(urgent_emails)
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
     
-    # Upcoming - Calendar events for next 7 days
-    now = datetime.utcnow()
-    next_week = now + timedelta(days=7)
-    
-    upcoming_events = db.query(CalendarEvent).filter(
-        CalendarEvent.user_id == current_user.id,
-        CalendarEvent.start_time >= now,
-        CalendarEvent.start_time <= next_week
-    ).order_by(CalendarEvent.start_time).limit(20).all()
-    
-    return {
-        "handled_automatically": [
-            {
-                "id": str(e.id),
-                "subject": e.subject,
-                "from_email": e.from_email,
-                "from_name": e.from_name,
-                "summary": e.summary,
-                "status": e.status.value,
-                "processed_at": e.processed_at.isoformat() if e.processed_at else None
-            }
-            for e in handled
-        ],
-        "needs_attention": [
-            {
-                "id": str(e.id),
-                "subject": e.subject,
-                "from_email": e.from_email,
-                "from_name": e.from_name,
-                "summary": e.summary,
-                "priority_score": e.priority_score,
-                "classification": e.classification.value if e.classification else None,
-                "received_at": e.received_at.isoformat()
-            }
-            for e in needs_attention
-        ],
-        "upcoming": [
-            {
-                "id": str(evt.id),
-                "title": evt.title,
-                "start_time": evt.start_time.isoformat(),
-                "end_time": evt.end_time.isoformat(),
-                "auto_scheduled": evt.auto_scheduled
-            }
-            for evt in upcoming_events
-        ]
-    }
+    return Response(content=projection.body, media_type="application/json", headers=headers)
 
 
 @router.get("/summary")
 async def get_executive_summary(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get executive summary for today"""
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow = today + timedelta(days=1)
     
-    # Count emails by status
-    total_emails = db.query(Email).filter(
-        Email.user_id == current_user.id,
-        Email.received_at >= today
-    ).count()
+    # Upcoming meetings today
+    meetings_today = (
+        select(func.count()).select_from(CalendarEvent).where(
+            CalendarEvent.user_id == current_user.id,
+            CalendarEvent.start_time >= today,
+            CalendarEvent.start_time < tomorrow
+        ).scalar_subquery()
+    )
     
-    handled = db.query(Email).filter(
-        Email.user_id == current_user.id,
+    received_today = Email.received_at >= today
+    handled_today = and_(
         Email.status.in_([EmailStatus.ARCHIVED, EmailStatus.REPLIED]),
         Email.processed_at >= today
-    ).count()
-    
-    needs_attention = db.query(Email).filter(
-        Email.user_id == current_user.id,
+    )
+    needs_attention = and_(
         Email.status.in_([EmailStatus.PENDING_APPROVAL, EmailStatus.PROCESSED]),
         Email.priority_score >= 70
-    ).count()
+    )
     
-    # Upcoming meetings today
-    tomorrow = today + timedelta(days=1)
-    meetings_today = db.query(CalendarEvent).filter(
-        CalendarEvent.user_id == current_user.id,
-        CalendarEvent.start_time >= today,
-        CalendarEvent.start_time < tomorrow
-    ).count()
+    # Count emails by status in one pass. FILTER can't use an index, so the
+    # rows are bounded by the OR of the three conditions, which the planner
+    # answers with a BitmapOr over the (user_id, ...) indexes instead of
+    # reading every email the user has.
+    result = await db.execute(
+        select(
+            func.count().filter(received_today).label("total_emails"),
+            func.count().filter(handled_today).label("handled"),
+            func.count().filter(needs_attention).label("needs_attention"),
+            meetings_today.label("meetings_today")
+        ).where(
+            Email.user_id == current_user.id,
+            or_(received_today, handled_today, needs_attention)
+        )
+    )
+    counts = result.one()
     
     return {
-        "total_emails_today": total_emails,
-        "handled_automatically": handled,
-        "needs_attention": needs_attention,
-        "meetings_today": meetings_today,
+        "total_emails_today": counts.total_emails,
+        "handled_automatically": counts.handled,
+        "needs_attention": counts.needs_attention,
+        "meetings_today": counts.meetings_today,
         "automation_level": current_user.automation_level.value
     }
+
+
+@router.get("/summary/history")
+async def get_summary_history(
+    days: int = Query(7, ge=1, le=90),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get daily email counts for the last `days` days from the daily rollups"""
+    return await StatsService().history(db, current_user.id, days)
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from zoneinfo import ZoneInfoNotFoundError
+
+from app.database import get_async_db
+from app.api.auth import get_current_user
+from app.models import User
+from app.services.calendar_mirror import CalendarMirror
+from app.services.job_queue import CALENDAR_SYNC_JOB, get_job_queue
+from app.services.scheduler import MeetingScheduler
+
+router = APIRouter()
+
+
+@router.post("/sync", status_code=202)
+async def sync_calendar(
+    current_user: User = Depends(get_current_user)
+):
+    """Queue a background sync of the local calendar mirror"""
+    job = await get_job_queue().enqueue(CALENDAR_SYNC_JOB, current_user.id)
+    
+    return {
+        "status": job["status"],
+        "job_id": job["id"],
+        "message": "Calendar sync queued"
+    }
+
+
+@router.get("/events")
+async def list_events(
+    days: int = Query(7, ge=1, le=90),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List upcoming events from the local calendar mirror"""
+    events = await CalendarMirror().get_upcoming_events(db, current_user.id, days)
+    
+    return [
+        {
+            "id": str(event.id),
+            "title": event.title,
+            "start_time": event.start_time.isoformat(),
+            "end_time": event.end_time.isoformat(),
+            "all_day": event.all_day,
+            "busy": event.busy,
+            "auto_scheduled": event.auto_scheduled
+        }
+        for event in events
+    ]
+
+
+@router.get("/availability")
+async def get_availability(
+    duration_minutes: int = Query(60, ge=5, le=480),
+    days_ahead: int = Query(7, ge=1, le=60),
+    num_slots: int = Query(3, ge=1, le=50),
+    granularity_minutes: Optional[int] = Query(None, ge=5, le=60),
+    time_zone: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Find open slots in the user's calendar"""
+    try:
+        return await CalendarMirror().find_available_slots(
+            db,
+            current_user,
+            duration_minutes=duration_minutes,
+            days_ahead=days_ahead,
+            num_slots=num_slots,
+            granularity_minutes=granularity_minutes,
+            time_zone=time_zone
+        )
+    except ZoneInfoNotFoundError:
+        raise HTTPException(status_code=400, detail=f"Unknown time zone: {time_zone}")
+
+
+@router.get("/meeting-slots")
+async def find_meeting_slots(
+    attendees: list[str] = Query(...),
+    optional_attendees: list[str] = Query([]),
+    duration_minutes: int = Query(60, ge=5, le=480),
+    days_ahead: int = Query(28, ge=1, le=60),
+    num_slots: int = Query(3, ge=1, le=20),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Rank meeting slots where the user and all attendees are free and within working hours"""
+    return await MeetingScheduler().find_meeting_slots(
+        db,
+        current_user,
+        attendees=attendees,
+        optional_attendees=optional_attendees,
+        duration_minutes=duration_minutes,
+        days_ahead=days_ahead,
+        num_slots=num_slots
+    )
@@ -1,157 +1,232 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import Optional
 from datetime import datetime
+import asyncio
+import json
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_async_db
 from app.api.auth import get_current_user
-from app.models import User, Email, EmailAction, EmailStatus
-from app.schemas.email import EmailResponse, EmailWithActions
-from app.services.gmail_service import GmailService
+from app.models import User, Email, EmailAction, EmailBody, EmailStatus
+from app.models.email_body import decompress_text
+from app.schemas.email import EmailResponse, EmailSummary, EmailWithActions
+from app.api.responses import FastJSONResponse
+from app.services.google_service_factory import get_gmail_service
 from app.services.activity_service import ActivityService
-from app.ai.classifier import EmailClassifier
-from app.ai.priority_scorer import PriorityScorer
-from app.ai.summarizer import ThreadSummarizer
+from app.services.brief_service import BriefService
+from app.services.stats_service import StatsService
+from app.services.job_queue import SYNC_JOB, get_job_queue, keep_lease
+from app.services.pagination import keyset_page, next_cursor
+from app.services.sync_service import EmailSyncService
 from app.ai.reply_generator import ReplyGenerator
-from app.services.decision_engine import DecisionEngine
 
 router = APIRouter()
 
 
-@router.post("/sync")
+@router.post("/sync", status_code=202)
 async def sync_emails(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
-    """Sync emails from Gmail and process them"""
-    try:
-        # Initialize services
-        gmail_service = GmailService(current_user)
-        classifier = EmailClassifier()
-        scorer = PriorityScorer()
-        summarizer = ThreadSummarizer()
-        decision_engine = DecisionEngine()
-        activity_service = ActivityService()
-        
-        # Fetch unread emails
-        raw_emails = await gmail_service.fetch_unread_emails(max_results=20)
-        
-        processed_count = 0
-        
-        for raw_email in raw_emails:
-            # Check if email already exists
-            existing = db.query(Email).filter(
-                Email.gmail_id == raw_email['gmail_id']
-            ).first()
-            
-            if existing:
-                continue
-            
-            # Create email record
-            email = Email(
-                user_id=current_user.id,
-                **raw_email,
-                status=EmailStatus.UNPROCESSED
-            )
-            db.add(email)
-            db.flush()
-            
-            # AI Processing
-            # 1. Classify
-            classification_result = await classifier.classify(
-                email.from_email,
-                email.subject,
-                email.body
-            )
-            email.classification = classification_result['classification']
-            
-            # 2. Score priority
-            score_result = await scorer.score(
-                email.from_email,
-                email.subject,
-                email.body
-            )
-            email.priority_score = score_result['priority_score']
-            
-            # 3. Summarize
-            summary_result = await summarizer.summarize(
-                email.from_email,
-                email.subject,
-                email.body
-            )
-            email.summary = summary_result['summary']
-            
-            email.processed_at = datetime.utcnow()
-            email.status = EmailStatus.PROCESSED
-            
-            # 4. Decide action
-            decision = decision_engine.decide_action(email, current_user, db)
-            
-            # Log activity
-            activity_service.log_action(
-                db=db,
-                user_id=current_user.id,
-                action_type="email_processed",
-                description=f"Processed email: {email.subject}",
-                metadata={
-                    "email_id": str(email.id),
-                    "classification": email.classification.value,
-                    "priority": email.priority_score,
-                    "decision": decision['action']
-                }
-            )
-            
-            processed_count += 1
-        
-        db.commit()
-        
-        # Update last sync
-        current_user.last_sync = datetime.utcnow()
-        db.commit()
-        
-        return {
-            "status": "success",
-            "processed": processed_count,
-            "message": f"Processed {processed_count} new emails"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Email sync failed: {str(e)}")
+    """Queue a background sync of emails from Gmail"""
+    job = await get_job_queue().enqueue(SYNC_JOB, current_user.id)
+    
+    return {
+        "status": job["status"],
+        "job_id": job["id"],
+        "message": "Email sync queued"
+    }
+
+
+@router.get("/sync/stream")
+async def stream_sync(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Sync emails inline and stream progress as server-sent events
+    
+    Emits an "email" event per processed email (classification, priority,
+    summary and decision), then "complete" with the sync summary, or
+    "error" if the sync fails.
+    
+    Runs as a sync job of its own, so it shares the queue's one-sync-per-user
+    limit: if a sync is already queued or running, responds 409 with its
+    job_id instead.
+    """
+    user_id = current_user.id
+    queue = get_job_queue()
+    
+    job, started = await queue.start(SYNC_JOB, user_id)
+    if not started:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "An email sync is already in progress", "job_id": job["id"]}
+        )
+    
+    async def events():
+        lease = asyncio.create_task(keep_lease(queue, job["id"]))
+        # The stream outlives the request's dependencies, so it uses its own session
+        try:
+            async with AsyncSessionLocal() as db:
+                user = await db.get(User, user_id)
+                async for event in EmailSyncService().stream(user, db):
+                    if event["event"] == "complete":
+                        await queue.complete(job["id"], event["data"])
+                    yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        except Exception as e:
+            # Retried in the background like a failed queued sync
+            await queue.fail(job["id"], str(e))
+            error = json.dumps({"detail": f"Email sync failed: {str(e)}", "job_id": job["id"]})
+            yield f"event: error\ndata: {error}\n\n"
+        finally:
+            # If the client disconnects mid-sync the lease runs out and the
+            # worker retries the job
+            lease.cancel()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/sync/{job_id}")
+async def get_sync_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status of a queued email sync"""
+    job = await get_job_queue().get(job_id)
+    
+    if not job or job["user_id"] != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "result": job["result"],
+        "error": job["error"]
+    }
+
+
+# Columns the fields= selector can project, by EmailResponse field name
+EMAIL_FIELDS = {name: getattr(Email, name) for name in EmailResponse.model_fields if name != "body"}
+FIELD_PRESETS = {"summary": list(EmailSummary.model_fields)}
+
+
+def _parse_fields(fields: str) -> list[str]:
+    """Resolve a fields= value to EmailResponse field names, always including id and received_at"""
+    names = FIELD_PRESETS.get(fields) or [name.strip() for name in fields.split(",") if name.strip()]
+    
+    unknown = [name for name in names if name not in EMAIL_FIELDS and name != "body"]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
+    return list(dict.fromkeys(["id", "received_at", *names]))
 
 
 @router.get("/", response_model=list[EmailResponse])
 async def list_emails(
+    response: Response,
     status: Optional[EmailStatus] = None,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    include_body: bool = False,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List emails with optional filtering"""
-    query = db.query(Email).filter(Email.user_id == current_user.id)
+    """
+    List emails with optional filtering, newest first
+    
+    Pass the X-Next-Cursor response header back as cursor to get the next
+    page; skip is only used when no cursor is given. Bodies are only loaded
+    and returned with include_body=true.
+    
+    fields=summary (the EmailSummary columns) or a comma-separated list of
+    EmailResponse fields returns only those keys, and only those columns
+    are read from the database.
+    """
+    projected = _parse_fields(fields) if fields else None
+    
+    if projected is None:
+        query = select(Email)
+        if include_body:
+            query = query.options(selectinload(Email.content))
+    else:
+        query = select(*(EMAIL_FIELDS[name] for name in projected if name != "body"))
+        if "body" in projected:
+            query = query.add_columns(
+                EmailBody.codec,
+                EmailBody.body.label("body_data")
+            ).outerjoin(EmailBody, EmailBody.email_id == Email.id)
+    
+    query = query.where(Email.user_id == current_user.id)
     
     if status:
-        query = query.filter(Email.status == status)
+        query = query.where(Email.status == status)
+    
+    if cursor:
+        try:
+            query = keyset_page(query, Email.received_at, Email.id, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        query = query.order_by(Email.received_at.desc(), Email.id.desc()).offset(skip).limit(limit)
+    
+    if projected is None:
+        emails = (await db.execute(query)).scalars().all()
+        
+        next_page = next_cursor(emails, limit, "received_at")
+        if next_page:
+            response.headers["X-Next-Cursor"] = next_page
+        
+        return emails
+    
+    rows = (await db.execute(query)).all()
+    
+    next_page = next_cursor(rows, limit, "received_at")
+    headers = {"X-Next-Cursor": next_page} if next_page else None
     
-    emails = query.order_by(Email.received_at.desc()).offset(skip).limit(limit).all()
-    return emails
+    return FastJSONResponse(
+        [
+            {
+                name: (
+                    decompress_text(row.codec, row.body_data) if name == "body"
+                    else getattr(row, name)
+                )
+                for name in projected
+            }
+            for row in rows
+        ],
+        headers=headers
+    )
 
 
 @router.get("/{email_id}", response_model=EmailWithActions)
 async def get_email(
     email_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get email details with actions"""
-    email = db.query(Email).filter(
-        Email.id == email_id,
-        Email.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Email)
+        .where(Email.id == email_id, Email.user_id == current_user.id)
+        .options(selectinload(Email.actions), selectinload(Email.content))
+    )
+    email = result.scalar_one_or_none()
     
     if not email:
         raise HTTPException(status_code=404, detail="Email not found")
     
+    # Rule-triaged emails are stored with their snippet; fetch the body now
+    await EmailSyncService().load_body(email, current_user, db)
+    
     return email
 
 
@@ -159,28 +234,31 @@ async def get_email(
 async def approve_reply(
     email_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Approve and send draft reply"""
-    email = db.query(Email).filter(
-        Email.id == email_id,
-        Email.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Email).where(Email.id == email_id, Email.user_id == current_user.id)
+    )
+    email = result.scalar_one_or_none()
     
     if not email:
         raise HTTPException(status_code=404, detail="Email not found")
     
     # Get pending action
-    action = db.query(EmailAction).filter(
-        EmailAction.email_id == email_id,
-        EmailAction.approved == False
-    ).first()
+    result = await db.execute(
+        select(EmailAction).where(
+            EmailAction.email_id == email_id,
+            EmailAction.approved == False
+        ).limit(1)
+    )
+    action = result.scalar_one_or_none()
     
     if not action or not action.draft_reply:
         raise HTTPException(status_code=400, detail="No draft reply found")
     
     # Send reply
-    gmail_service = GmailService(current_user)
+    gmail_service = get_gmail_service(current_user)
     await gmail_service.send_reply(
         to=email.from_email,
         subject=f"Re: {email.subject}",
@@ -192,10 +270,12 @@ async def approve_reply(
     action.approved = True
     action.sent_at = datetime.utcnow()
     email.status = EmailStatus.REPLIED
+    await BriefService().apply_emails(db, current_user.id, [email])
+    await StatsService().record_today(db, current_user.id, emails_replied=1)
     
     # Log activity
     activity_service = ActivityService()
-    activity_service.log_action(
+    await activity_service.log_action(
         db=db,
         user_id=current_user.id,
         action_type="email_replied",
@@ -203,7 +283,7 @@ async def approve_reply(
         metadata={"email_id": str(email.id), "gmail_id": email.gmail_id}
     )
     
-    db.commit()
+    await db.commit()
     
     return {"status": "success", "message": "Reply sent"}
 
@@ -212,27 +292,29 @@ async def approve_reply(
 async def archive_email(
     email_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Archive email"""
-    email = db.query(Email).filter(
-        Email.id == email_id,
-        Email.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Email).where(Email.id == email_id, Email.user_id == current_user.id)
+    )
+    email = result.scalar_one_or_none()
     
     if not email:
         raise HTTPException(status_code=404, detail="Email not found")
     
     # Archive in Gmail
-    gmail_service = GmailService(current_user)
+    gmail_service = get_gmail_service(current_user)
     success = await gmail_service.archive_email(email.gmail_id)
     
     if success:
         email.status = EmailStatus.ARCHIVED
+        await BriefService().apply_emails(db, current_user.id, [email])
+        await StatsService().record_today(db, current_user.id, emails_archived=1)
         
         # Log activity
         activity_service = ActivityService()
-        activity_service.log_action(
+        await activity_service.log_action(
             db=db,
             user_id=current_user.id,
             action_type="email_archived",
@@ -241,7 +323,7 @@ async def archive_email(
             can_undo=True
         )
         
-        db.commit()
+        await db.commit()
         return {"status": "success", "message": "Email archived"}
     else:
         raise HTTPException(status_code=500, detail="Failed to archive email")
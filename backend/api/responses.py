@@ -0,0 +1,23 @@
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when it is installed
+    
+    orjson serializes UUIDs, datetimes and enums natively, so endpoints can
+    return plain row dicts without a pydantic or jsonable_encoder pass.
+    Anything else it doesn't know, such as the UUIDs asyncpg returns for
+    projected columns, is rendered with str().
+    """
+    
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
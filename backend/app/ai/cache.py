@@ -0,0 +1,154 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import settings
+
+
+@dataclass
+class CacheStats:
+    """Counters for an LLM response cache"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+def make_cache_key(model: str, messages: list[dict], temperature, response_format) -> str:
+    """Content-addressed key for a chat completion request"""
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": response_format
+        },
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return "llm:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """In-process LRU cache with a per-entry TTL"""
+    
+    def __init__(self, maxsize: int = 1024, ttl_seconds: int = 86400):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+    
+    async def set(self, key: str, value: str):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+
+class RedisCache:
+    """
+    Redis-backed cache shared across processes
+    
+    Expiry and eviction are handled by Redis itself, so the evictions counter
+    stays at zero. Pass client to use an existing (or fake) async Redis client.
+    """
+    
+    def __init__(self, url: Optional[str] = None, ttl_seconds: int = 86400, client=None):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url or settings.REDIS_URL, decode_responses=True)
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+    
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await self.client.get(key)
+        except Exception as e:
+            print(f"LLM cache read error: {e}")
+            value = None
+        
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+    
+    async def set(self, key: str, value: str):
+        try:
+            await self.client.set(key, value, ex=self.ttl_seconds)
+        except Exception as e:
+            print(f"LLM cache write error: {e}")
+
+
+_llm_cache = None
+
+
+def get_llm_cache():
+    """Process-wide LLM response cache, or None when caching is disabled"""
+    global _llm_cache
+    
+    if _llm_cache is None and settings.LLM_CACHE_BACKEND != "none":
+        if settings.LLM_CACHE_BACKEND == "redis":
+            _llm_cache = RedisCache(ttl_seconds=settings.LLM_CACHE_TTL_SECONDS)
+        else:
+            _llm_cache = MemoryCache(
+                maxsize=settings.LLM_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS
+            )
+    
+    return _llm_cache
+
+
+async def chat_completion(client, use_cache: bool = True, **params) -> str:
+    """
+    Create a chat completion and return the message content
+    
+    Identical requests (model, messages, temperature, response_format) are
+    answered from the LLM cache. Non-deterministic stages pass
+    use_cache=False to always hit the API.
+    """
+    cache = get_llm_cache() if use_cache else None
+    key = None
+    
+    if cache is not None:
+        key = make_cache_key(
+            params.get("model"),
+            params.get("messages"),
+            params.get("temperature"),
+            params.get("response_format")
+        )
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
+    
+    response = await client.chat.completions.create(**params)
+    choice = response.choices[0]
+    content = choice.message.content
+    
+    # Don't cache truncated responses; they won't parse as JSON
+    if cache is not None and choice.finish_reason == "stop":
+        await cache.set(key, content)
+    
+    return content
@@ -1,6 +1,8 @@
 import json
 from openai import AsyncOpenAI
 from app.config import settings
+from app.ai.cache import chat_completion
+from app.ai.normalizer import truncate_to_tokens
 from app.ai.prompts import CLASSIFICATION_PROMPT
 from app.models.email import EmailClassification
 
@@ -22,8 +24,8 @@ class EmailClassifier:
             }
         """
         # Truncate body if too long (to save tokens)
-        max_body_length = 2000
-        truncated_body = body[:max_body_length] + "..." if len(body) > max_body_length else body
+        max_body_tokens = 500
+        truncated_body = truncate_to_tokens(body, max_body_tokens)
         
         prompt = CLASSIFICATION_PROMPT.format(
             from_email=from_email,
@@ -32,9 +34,10 @@ class EmailClassifier:
         )
         
         try:
-            response = await self.client.chat.completions.create(
+            content = await chat_completion(
+                self.client,
                 model="gpt-3.5-turbo",
-              messages=[
+                messages=[
                     {"role": "system", "content": "You are an email classification assistant. Always respond with valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
@@ -43,7 +46,7 @@ class EmailClassifier:
                 response_format={"type": "json_object"}
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             
             # Map classification to enum
             classification_map = {
@@ -70,5 +73,3 @@ class EmailClassifier:
                 "classification": EmailClassification.FYI,
                 "reasoning": "Error during classification"
             }
-
-                messages=[
@@ -0,0 +1,256 @@
+import os
+import re
+from collections import Counter
+from typing import Optional
+
+import numpy as np
+
+from app.models.email import EmailClassification
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'_-]*")
+
+CLASSIFICATIONS = [
+    EmailClassification.URGENT,
+    EmailClassification.ACTION_REQUIRED,
+    EmailClassification.FYI,
+    EmailClassification.SPAM
+]
+
+# Priority is predicted as one of these 1-100 buckets and reported as its midpoint
+PRIORITY_BUCKETS = [(1, 20), (21, 40), (41, 60), (61, 80), (81, 100)]
+
+
+def extract_features(from_email: str, subject: str, body: str, max_body_length: int = 2000) -> list[str]:
+    """Turn an email into namespaced tokens: sender, sender domain, subject and body words"""
+    sender = (from_email or "").lower()
+    features = [f"from:{sender}"]
+    if "@" in sender:
+        features.append(f"domain:{sender.rsplit('@', 1)[1]}")
+    features.extend(f"s:{token}" for token in TOKEN_PATTERN.findall((subject or "").lower()))
+    features.extend(f"b:{token}" for token in TOKEN_PATTERN.findall((body or "")[:max_body_length].lower()))
+    return features
+
+
+def _priority_bucket(score: int) -> int:
+    for index, (low, high) in enumerate(PRIORITY_BUCKETS):
+        if score <= high:
+            return index
+    return len(PRIORITY_BUCKETS) - 1
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def _to_dense(rows: list[tuple[np.ndarray, np.ndarray]], n_features: int) -> np.ndarray:
+    """Expand sparse (columns, values) rows into a dense matrix"""
+    X = np.zeros((len(rows), n_features), dtype=np.float32)
+    for row, (columns, values) in enumerate(rows):
+        X[row, columns] = values
+    return X
+
+
+class SoftmaxRegression:
+    """Multinomial logistic regression trained with mini-batch gradient descent"""
+    
+    def __init__(self, weights: np.ndarray, bias: np.ndarray):
+        self.weights = weights
+        self.bias = bias
+    
+    @classmethod
+    def fit(
+        cls,
+        rows: list[tuple[np.ndarray, np.ndarray]],
+        y: np.ndarray,
+        n_features: int,
+        n_classes: int,
+        epochs: int = 30,
+        learning_rate: float = 2.0,
+        l2: float = 1e-4,
+        batch_size: int = 256,
+        seed: int = 0
+    ) -> "SoftmaxRegression":
+        """Fit on sparse rows; only one mini-batch is densified at a time"""
+        rng = np.random.default_rng(seed)
+        weights = np.zeros((n_features, n_classes), dtype=np.float32)
+        bias = np.zeros(n_classes, dtype=np.float32)
+        targets = np.eye(n_classes, dtype=np.float32)[y]
+        
+        for _ in range(epochs):
+            order = rng.permutation(len(rows))
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                X_batch = _to_dense([rows[i] for i in batch], n_features)
+                error = _softmax(X_batch @ weights + bias) - targets[batch]
+                weights -= learning_rate * (X_batch.T @ error / len(batch) + l2 * weights)
+                bias -= learning_rate * error.mean(axis=0)
+        
+        return cls(weights, bias)
+    
+    def predict_proba(self, columns: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Class probabilities for a single sparse row"""
+        logits = values @ self.weights[columns] + self.bias
+        return _softmax(logits[np.newaxis, :])[0]
+
+
+class LocalTriageModel:
+    """
+    TF-IDF + logistic regression model trained on past LLM labels.
+    
+    Answers classification and priority scoring locally; callers compare the
+    returned confidence against a threshold and fall back to OpenAI when it
+    is too low.
+    """
+    
+    def __init__(
+        self,
+        vocabulary: dict[str, int],
+        idf: np.ndarray,
+        classifier: SoftmaxRegression,
+        scorer: SoftmaxRegression
+    ):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.classifier = classifier
+        self.scorer = scorer
+    
+    @classmethod
+    def fit(
+        cls,
+        samples: list[dict],
+        max_features: int = 20000,
+        min_df: int = 2
+    ) -> "LocalTriageModel":
+        """
+        Train from labelled emails
+        
+        Args:
+            samples: dicts with from_email, subject, body, classification
+                and priority_score
+        """
+        documents = [
+            extract_features(s['from_email'], s['subject'], s['body'])
+            for s in samples
+        ]
+        
+        document_frequency = Counter()
+        for features in documents:
+            document_frequency.update(set(features))
+        
+        terms = [
+            term for term, count in document_frequency.most_common(max_features)
+            if count >= min_df
+        ]
+        vocabulary = {term: index for index, term in enumerate(terms)}
+        df = np.array([document_frequency[term] for term in terms], dtype=np.float32)
+        idf = np.log((1 + len(documents)) / (1 + df)) + 1
+        
+        model = cls(vocabulary, idf, None, None)
+        rows = [model._encode(features) for features in documents]
+        
+        y_class = np.array(
+            [CLASSIFICATIONS.index(EmailClassification(s['classification'])) for s in samples]
+        )
+        y_priority = np.array([_priority_bucket(s['priority_score']) for s in samples])
+        
+        model.classifier = SoftmaxRegression.fit(rows, y_class, len(vocabulary), len(CLASSIFICATIONS))
+        model.scorer = SoftmaxRegression.fit(rows, y_priority, len(vocabulary), len(PRIORITY_BUCKETS))
+        return model
+    
+    def _encode(self, features: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Sparse sublinear TF-IDF vector, L2-normalized"""
+        counts = Counter(
+            self.vocabulary[feature] for feature in features
+            if feature in self.vocabulary
+        )
+        columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        values = (1 + np.log(tf)) * self.idf[columns]
+        
+        norm = np.linalg.norm(values)
+        if norm > 0:
+            values /= norm
+        return columns, values
+    
+    def predict(self, from_email: str, subject: str, body: str) -> dict:
+        """
+        Returns:
+            {
+                "classification": EmailClassification,
+                "classification_confidence": float,
+                "priority_score": int,
+                "priority_confidence": float
+            }
+        """
+        columns, values = self._encode(extract_features(from_email, subject, body))
+        class_proba = self.classifier.predict_proba(columns, values)
+        priority_proba = self.scorer.predict_proba(columns, values)
+        
+        class_index = int(class_proba.argmax())
+        bucket_index = int(priority_proba.argmax())
+        low, high = PRIORITY_BUCKETS[bucket_index]
+        
+        return {
+            "classification": CLASSIFICATIONS[class_index],
+            "classification_confidence": float(class_proba[class_index]),
+            "priority_score": (low + high) // 2,
+            "priority_confidence": float(priority_proba[bucket_index])
+        }
+    
+    def save(self, path: str):
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                terms=np.array(terms, dtype=np.str_),
+                idf=self.idf,
+                class_weights=self.classifier.weights,
+                class_bias=self.classifier.bias,
+                priority_weights=self.scorer.weights,
+                priority_bias=self.scorer.bias
+            )
+    
+    @classmethod
+    def load(cls, path: str) -> "LocalTriageModel":
+        with np.load(path) as data:
+            vocabulary = {str(term): index for index, term in enumerate(data['terms'])}
+            return cls(
+                vocabulary,
+                data['idf'],
+                SoftmaxRegression(data['class_weights'], data['class_bias']),
+                SoftmaxRegression(data['priority_weights'], data['priority_bias'])
+            )
+
+
+# path -> (file mtime or None if missing, model or None if it can't be read)
+_loaded_models: dict[str, tuple[Optional[float], Optional[LocalTriageModel]]] = {}
+
+
+def load_local_model(path: str) -> Optional[LocalTriageModel]:
+    """
+    Load a serialized model, cached per process until the file changes
+    
+    Returns None while the file is missing or can't be read; a file that
+    appears or is retrained later is picked up on the next call.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    
+    cached = _loaded_models.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    model = None
+    if mtime is not None:
+        try:
+            model = LocalTriageModel.load(path)
+        except Exception as e:
+            print(f"Error loading local triage model {path}: {e}")
+    
+    _loaded_models[path] = (mtime, model)
+    return model
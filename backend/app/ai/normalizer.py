@@ -0,0 +1,168 @@
+"""Email body normalization and token-aware truncation for the AI stages"""
+import html
+import re
+from html.parser import HTMLParser
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _encoding = None
+
+
+HTML_PATTERN = re.compile(r"<\s*(html|body|div|p|br|table|span)\b", re.IGNORECASE)
+
+# Start of quoted reply history; everything from here on is dropped
+QUOTE_HEADER_PATTERNS = [
+    re.compile(r"^On .{0,200}wrote:\s*$", re.IGNORECASE),
+    re.compile(r"^-{2,}\s*Original Message\s*-{2,}\s*$", re.IGNORECASE),
+    re.compile(r"^_{10,}\s*$")
+]
+
+# Outlook quotes history under a "From:" line followed by "Sent:"/"Date:"
+OUTLOOK_FROM_PATTERN = re.compile(r"^From:\s.+$", re.IGNORECASE)
+OUTLOOK_DATE_PATTERN = re.compile(r"^(Sent|Date):\s.+$", re.IGNORECASE)
+
+# Start of a signature; everything from here on is dropped
+SIGNATURE_PATTERNS = [
+    re.compile(r"^--\s*$"),
+    re.compile(r"^Sent from my \w+", re.IGNORECASE),
+    re.compile(r"^Get Outlook for \w+", re.IGNORECASE)
+]
+
+# Tracking / footer boilerplate. Only the trailing footer block is dropped:
+# in plain-text mail one line can be a whole paragraph a person wrote.
+BOILERPLATE_PATTERNS = [
+    re.compile(r"unsubscribe", re.IGNORECASE),
+    re.compile(r"view (this email )?in (your|a) browser", re.IGNORECASE),
+    re.compile(r"manage (your )?(email )?preferences", re.IGNORECASE),
+    re.compile(r"you are receiving this (email|message)", re.IGNORECASE),
+    re.compile(r"^this (email|message) (and any attachments )?(is|may be) confidential", re.IGNORECASE)
+]
+
+URL_PATTERN = re.compile(r"https?://\S{60,}")
+
+
+class _HTMLTextExtractor(HTMLParser):
+    BLOCK_TAGS = {"p", "div", "br", "tr", "li", "h1", "h2", "h3", "h4", "h5", "h6", "table", "blockquote"}
+    SKIP_TAGS = {"script", "style", "head", "title"}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+        self.quote_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == "blockquote":
+            self.quote_depth += 1
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag == "blockquote" and self.quote_depth:
+            self.quote_depth -= 1
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+    
+    def handle_data(self, data):
+        # Quoted history in HTML mail lives in <blockquote>
+        if not self.skip_depth and not self.quote_depth:
+            self.parts.append(data)
+
+
+def html_to_text(body: str) -> str:
+    """Convert an HTML body to plain text, dropping scripts, styles and blockquotes"""
+    parser = _HTMLTextExtractor()
+    try:
+        parser.feed(body)
+        parser.close()
+    except Exception:
+        return html.unescape(re.sub(r"<[^>]+>", " ", body))
+    return "".join(parser.parts)
+
+
+def _is_boilerplate(line: str) -> bool:
+    return any(p.search(line) for p in BOILERPLATE_PATTERNS)
+
+
+def _footer_start(lines: list[str]) -> int:
+    """
+    Index of the first line of the trailing footer block
+    
+    The footer is the run of final paragraphs that each contain boilerplate;
+    the first paragraph of the message never counts as footer.
+    """
+    start = len(lines)
+    while start > 0:
+        end = start
+        while end > 0 and not lines[end - 1]:
+            end -= 1
+        paragraph_start = end
+        while paragraph_start > 0 and lines[paragraph_start - 1]:
+            paragraph_start -= 1
+        
+        if paragraph_start == 0 or not any(_is_boilerplate(line) for line in lines[paragraph_start:end]):
+            break
+        start = paragraph_start
+    return start
+
+
+def normalize_body(body: str) -> str:
+    """
+    Reduce a raw email body to the text the AI stages need
+    
+    Converts HTML to text and strips quoted reply history, signatures and
+    the trailing footer block of tracking/unsubscribe boilerplate.
+    """
+    if not body:
+        return ""
+    
+    if HTML_PATTERN.search(body):
+        body = html_to_text(body)
+    
+    raw_lines = [line.strip() for line in body.replace("\r\n", "\n").split("\n")]
+    lines = []
+    
+    for index, stripped in enumerate(raw_lines):
+        if any(p.match(stripped) for p in QUOTE_HEADER_PATTERNS + SIGNATURE_PATTERNS):
+            break
+        if OUTLOOK_FROM_PATTERN.match(stripped) and any(
+            OUTLOOK_DATE_PATTERN.match(next_line) for next_line in raw_lines[index + 1:index + 3]
+        ):
+            break
+        if stripped.startswith(">"):
+            continue
+        
+        lines.append(URL_PATTERN.sub("[link]", stripped))
+    
+    text = "\n".join(lines[:_footer_start(lines)])
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when available, else a ~4 chars/token estimate"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Truncate text to at most max_tokens tokens, marking the cut with '...'"""
+    if not text:
+        return ""
+    
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return _encoding.decode(tokens[:max_tokens]) + "..."
+    
+    max_chars = max_tokens * 4
+    return text[:max_chars] + "..." if len(text) > max_chars else text
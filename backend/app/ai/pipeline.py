@@ -0,0 +1,175 @@
+import asyncio
+from typing import Optional
+
+from app.config import settings
+from app.ai.classifier import EmailClassifier
+from app.ai.priority_scorer import PriorityScorer
+from app.ai.summarizer import ThreadSummarizer
+from app.ai.triage import EmailTriager
+from app.ai.rules import RuleBasedTriage
+from app.models.email import LabelSource
+
+
+class RateLimiter:
+    """Space out LLM requests evenly to stay under a requests-per-minute limit"""
+    
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until the next request slot is available"""
+        if not self.interval:
+            return
+        
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class EmailPipeline:
+    """
+    Run the AI stages (classify, score, summarize) for a batch of emails.
+    
+    The three stages of an email run concurrently, and up to max_concurrency
+    emails are in flight at once. Every LLM request goes through a shared
+    rate limiter. The pipeline never touches the database; callers apply the
+    results on their own session.
+    
+    In "fused" triage mode a single EmailTriager call answers all three
+    stages, and only the fields it fails to produce go to the per-stage
+    classes.
+    
+    Bulk and automated mail caught by RuleBasedTriage skips the LLM entirely.
+    When a local triage model is configured, its classification and priority
+    are used whenever they clear LOCAL_MODEL_CONFIDENCE. llm_calls_saved
+    counts the requests avoided by both.
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        triage_mode: Optional[str] = None,
+        user_id: Optional[str] = None
+    ):
+        self.classifier = EmailClassifier()
+        self.scorer = PriorityScorer()
+        self.summarizer = ThreadSummarizer()
+        self.triager = EmailTriager() if (triage_mode or settings.AI_TRIAGE_MODE) == "fused" else None
+        self.rules = RuleBasedTriage() if settings.AI_RULES_ENABLED else None
+        self.local_model = None
+        if settings.LOCAL_MODEL_PATH:
+            from app.ai.local_model import load_local_model
+            self.local_model = load_local_model(settings.LOCAL_MODEL_PATH.format(user_id=user_id))
+        self.llm_calls_saved = 0
+        self.semaphore = asyncio.Semaphore(max_concurrency or settings.AI_MAX_CONCURRENCY)
+        self.rate_limiter = RateLimiter(
+            settings.AI_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        )
+    
+    async def _call(self, stage, *args):
+        await self.rate_limiter.acquire()
+        return await stage(*args)
+    
+    def needs_llm(self, email: dict) -> bool:
+        """
+        Whether an email will reach the model stages
+        
+        Rule-based triage only looks at headers, labels and the subject, so
+        emails it resolves never need their full body fetched.
+        """
+        return not (self.rules and self.rules.evaluate(email))
+    
+    async def process(self, email: dict) -> dict:
+        """
+        Process a single parsed email
+        
+        Returns:
+            {
+                "classification": EmailClassification,
+                "priority_score": int,
+                "factors": dict,
+                "summary": str,
+                "next_action": str | None,
+                "label_source": LabelSource
+            }
+        """
+        if self.rules:
+            rule_result = self.rules.evaluate(email)
+            if rule_result:
+                self.llm_calls_saved += 1 if self.triager else 3
+                return {**rule_result, "label_source": LabelSource.RULES}
+        
+        args = (email['from_email'], email['subject'], email.get('normalized_body') or email['body'])
+        
+        # Each stage answers one field plus the detail that comes with it
+        stages = {
+            "classification": (self.classifier.classify, ()),
+            "priority_score": (self.scorer.score, ("factors",)),
+            "summary": (self.summarizer.summarize, ("next_action",))
+        }
+        
+        result = self._predict_locally(args) if self.local_model else {}
+        details = {"factors": {}, "next_action": None}
+        
+        # Only labels the LLM produced in full are used to train the local model
+        label_source = LabelSource.LOCAL_MODEL if result else LabelSource.LLM
+        
+        async with self.semaphore:
+            # Once the local model has answered both classification and
+            # priority, a lone summarizer call is cheaper than a fused one
+            if self.triager and len(result) < 2:
+                triage_result = await self._call(self.triager.triage, *args)
+                for field, (_, stage_details) in stages.items():
+                    if field not in result and triage_result[field] is not None:
+                        result[field] = triage_result[field]
+                        details.update({detail: triage_result[detail] for detail in stage_details})
+            elif not self.triager:
+                self.llm_calls_saved += len(result)
+            
+            # Per-stage path for every field not answered yet
+            missing = [field for field in stages if field not in result]
+            stage_results = await asyncio.gather(
+                *(self._call(stages[field][0], *args) for field in missing)
+            )
+            for field, stage_result in zip(missing, stage_results):
+                result[field] = stage_result[field]
+                details.update({detail: stage_result.get(detail) for detail in stages[field][1]})
+        
+        return {**result, **details, "label_source": label_source}
+    
+    def _predict_locally(self, args: tuple[str, str, str]) -> dict:
+        """Fields the local model is confident enough to answer without the LLM"""
+        prediction = self.local_model.predict(*args)
+        threshold = settings.LOCAL_MODEL_CONFIDENCE
+        
+        result = {}
+        if prediction['classification_confidence'] >= threshold:
+            result['classification'] = prediction['classification']
+        if prediction['priority_confidence'] >= threshold:
+            result['priority_score'] = prediction['priority_score']
+        
+        return result
+    
+    async def process_many(self, emails: list[dict]) -> list[dict]:
+        """Process emails concurrently, returning results in input order"""
+        return await asyncio.gather(*(self.process(email) for email in emails))
+    
+    async def process_as_completed(self, emails: list[dict]):
+        """Process emails concurrently, yielding (email, result) as each one finishes"""
+        async def run(email: dict) -> tuple[dict, dict]:
+            return email, await self.process(email)
+        
+        tasks = [asyncio.ensure_future(run(email)) for email in emails]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -1,6 +1,8 @@
 import json
 from openai import AsyncOpenAI
 from app.config import settings
+from app.ai.cache import chat_completion
+from app.ai.normalizer import truncate_to_tokens
 from app.ai.prompts import PRIORITY_SCORING_PROMPT
 
 
@@ -29,8 +31,8 @@ class PriorityScorer:
             }
         """
         # Truncate body if too long
-        max_body_length = 2000
-        truncated_body = body[:max_body_length] + "..." if len(body) > max_body_length else body
+        max_body_tokens = 500
+        truncated_body = truncate_to_tokens(body, max_body_tokens)
         
         # Format important contacts
         contacts_str = ", ".join(important_contacts) if important_contacts else "None specified"
@@ -44,7 +46,8 @@ class PriorityScorer:
         )
         
         try:
-            response = await self.client.chat.completions.create(
+            content = await chat_completion(
+                self.client,
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are a priority scoring assistant. Always respond with valid JSON."},
@@ -55,7 +58,7 @@ class PriorityScorer:
                 response_format={"type": "json_object"}
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             
             # Ensure score is within bounds
             priority_score = max(1, min(100, result.get("priority_score", 50)))
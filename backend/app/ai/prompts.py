@@ -68,6 +68,48 @@ Respond ONLY with valid JSON in this exact format:
 }}"""
 
 
+TRIAGE_PROMPT = """You are an email triage system for an executive assistant.
+
+Analyze this email and do all of the following in one pass:
+
+1. Classify it into ONE of these categories:
+- urgent: Requires immediate attention (deadlines, time-sensitive matters)
+- action_required: Needs a response or action from the user
+- fyi: Informational only, no action needed
+- spam: Unwanted, promotional, or irrelevant content
+
+2. Score its priority from 1-100 based on these factors:
+- Sender importance (30 points): Is this from a VIP contact or important person?
+- Urgency (30 points): Contains urgent keywords, deadlines, or time-sensitive content?
+- Action required (20 points): Does it need a response or action?
+- Time sensitivity (20 points): Is there a specific deadline or time constraint?
+
+3. Write a concise 2-3 sentence summary covering what the email is about,
+what's needed from the user (if anything), and the next action.
+
+Important contacts: {important_contacts}
+User's working hours: {working_hours}
+
+Email:
+From: {from_email}
+Subject: {subject}
+Body: {body}
+
+Respond ONLY with valid JSON in this exact format:
+{{
+  "classification": "urgent|action_required|fyi|spam",
+  "priority_score": 75,
+  "factors": {{
+    "sender_importance": 30,
+    "urgency": 20,
+    "action_required": 15,
+    "time_sensitivity": 10
+  }},
+  "summary": "concise 2-3 sentence summary",
+  "next_action": "specific next step or 'none' if no action needed"
+}}"""
+
+
 REPLY_GENERATION_PROMPT = """You are an executive assistant drafting email replies.
 
 User's writing style examples:
@@ -1,6 +1,8 @@
 import json
 from openai import AsyncOpenAI
 from app.config import settings
+from app.ai.cache import chat_completion
+from app.ai.normalizer import truncate_to_tokens
 from app.ai.prompts import REPLY_GENERATION_PROMPT
 
 
@@ -39,8 +41,8 @@ class ReplyGenerator:
             }
         """
         # Truncate body if too long
-        max_body_length = 2500
-        truncated_body = body[:max_body_length] + "..." if len(body) > max_body_length else body
+        max_body_tokens = 625
+        truncated_body = truncate_to_tokens(body, max_body_tokens)
         
         # Default writing style if none provided
         if not writing_style_examples:
@@ -60,7 +62,9 @@ class ReplyGenerator:
         )
         
         try:
-            response = await self.client.chat.completions.create(
+            content = await chat_completion(
+                self.client,
+                use_cache=False,
                 model="gpt-4",  # Using GPT-4 for better reply quality
                 messages=[
                     {"role": "system", "content": "You are an executive assistant drafting email replies. Always respond with valid JSON."},
@@ -71,7 +75,7 @@ class ReplyGenerator:
                 response_format={"type": "json_object"}
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             
             return {
                 "reply_body": result.get("reply_body", ""),
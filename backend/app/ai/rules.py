@@ -0,0 +1,83 @@
+import re
+from typing import Optional
+
+from app.models.email import EmailClassification
+
+
+# Headers kept by GmailService._parse_email for rule-based triage
+TRIAGE_HEADERS = ("list-unsubscribe", "list-id", "precedence", "auto-submitted")
+
+# Local part of sender addresses nobody reads replies to
+NO_REPLY_SENDER = re.compile(r"^(?:no[-_.]?reply|do[-_.]?not[-_.]?reply)\b", re.IGNORECASE)
+
+
+class RuleBasedTriage:
+    """
+    Triage bulk and automated mail from headers and Gmail labels, without an LLM.
+    
+    Rules only fire when the signals are unambiguous; everything else returns
+    None and goes through the AI pipeline as usual.
+    """
+    
+    SPAM_PRIORITY = 5
+    FYI_PRIORITY = 15
+    
+    def evaluate(self, email: dict) -> Optional[dict]:
+        """
+        Returns:
+            {
+                "classification": EmailClassification,
+                "priority_score": int,
+                "factors": dict,
+                "summary": str,
+                "next_action": None,
+                "rule": str
+            }
+            or None when no rule applies
+        """
+        labels = set(email.get('label_ids', []))
+        headers = email.get('triage_headers', {})
+        
+        # Never fast-path mail Gmail or the user flagged as important
+        if labels & {"IMPORTANT", "STARRED"}:
+            return None
+        
+        precedence = headers.get('precedence', '').strip().lower()
+        auto_submitted = headers.get('auto-submitted', '').strip().lower()
+        
+        if "SPAM" in labels:
+            return self._result(email, EmailClassification.SPAM, "gmail_spam_label")
+        if "CATEGORY_PROMOTIONS" in labels:
+            return self._result(email, EmailClassification.SPAM, "promotions_label")
+        if precedence == "junk":
+            return self._result(email, EmailClassification.SPAM, "precedence_junk")
+        if "CATEGORY_SOCIAL" in labels:
+            return self._result(email, EmailClassification.FYI, "social_label")
+        if auto_submitted and auto_submitted != "no":
+            return self._result(email, EmailClassification.FYI, "auto_submitted")
+        if precedence == "bulk":
+            return self._result(email, EmailClassification.FYI, "precedence_bulk")
+        
+        # List headers (and Precedence: list) also mark discussion lists and
+        # one-click unsubscribe mail from real people, so they need an
+        # automated sender or Gmail's updates category alongside them
+        if headers.get('list-unsubscribe') or headers.get('list-id') or precedence == "list":
+            if "CATEGORY_UPDATES" in labels or NO_REPLY_SENDER.match(email['from_email']):
+                return self._result(email, EmailClassification.FYI, "mailing_list")
+        
+        return None
+    
+    def _result(self, email: dict, classification: EmailClassification, rule: str) -> dict:
+        if classification == EmailClassification.SPAM:
+            priority_score = self.SPAM_PRIORITY
+        else:
+            priority_score = self.FYI_PRIORITY
+        
+        return {
+            "classification": classification,
+            "priority_score": priority_score,
+            "factors": {},
+            "summary": f"Automated email from {email['from_email']} regarding: {email['subject']}",
+            "next_action": None,
+            "rule": rule
+        }
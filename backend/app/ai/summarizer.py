@@ -1,6 +1,8 @@
 import json
 from openai import AsyncOpenAI
 from app.config import settings
+from app.ai.cache import chat_completion
+from app.ai.normalizer import truncate_to_tokens
 from app.ai.prompts import SUMMARIZATION_PROMPT
 
 
@@ -21,8 +23,8 @@ class ThreadSummarizer:
             }
         """
         # Truncate body if too long
-        max_body_length = 3000
-        truncated_body = body[:max_body_length] + "..." if len(body) > max_body_length else body
+        max_body_tokens = 750
+        truncated_body = truncate_to_tokens(body, max_body_tokens)
         
         prompt = SUMMARIZATION_PROMPT.format(
             from_email=from_email,
@@ -31,7 +33,8 @@ class ThreadSummarizer:
         )
         
         try:
-            response = await self.client.chat.completions.create(
+            content = await chat_completion(
+                self.client,
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are an executive assistant creating concise email summaries. Always respond with valid JSON."},
@@ -42,7 +45,7 @@ class ThreadSummarizer:
                 response_format={"type": "json_object"}
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             
             return {
                 "summary": result.get("summary", "Email summary unavailable"),
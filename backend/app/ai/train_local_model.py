@@ -0,0 +1,187 @@
+"""
+Train and evaluate the local triage model on LLM-labelled emails.
+
+Emails labelled by the header rules or by the local model itself are left
+out, so the model never learns from its own output. A stable hash of each
+email id holds out a fraction of them (--holdout, same value for both
+commands): train never sees them and evaluate only scores on them.
+
+Usage:
+    python -m app.ai.train_local_model train --output models/triage.npz [--user-id UUID]
+    python -m app.ai.train_local_model evaluate --model models/triage.npz [--user-id UUID]
+"""
+import argparse
+import time
+import zlib
+from typing import Optional
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Email, EmailBody, LabelSource
+from app.models.email_body import decompress_text
+from app.ai.local_model import LocalTriageModel, PRIORITY_BUCKETS, _priority_bucket
+
+
+def load_samples(user_id: Optional[str] = None, limit: Optional[int] = None) -> list[dict]:
+    """Load emails whose classification and priority both came from the LLM"""
+    db = SessionLocal()
+    try:
+        query = db.query(
+            Email.id,
+            Email.from_email,
+            Email.subject,
+            EmailBody.codec,
+            EmailBody.body,
+            EmailBody.normalized_body,
+            Email.classification,
+            Email.priority_score
+        ).join(EmailBody, EmailBody.email_id == Email.id).filter(
+            Email.label_source == LabelSource.LLM,
+            Email.classification.isnot(None),
+            Email.priority_score.isnot(None)
+        )
+        
+        if user_id:
+            query = query.filter(Email.user_id == user_id)
+        
+        query = query.order_by(Email.received_at.desc())
+        if limit:
+            query = query.limit(limit)
+        
+        return [
+            {
+                "id": str(row.id),
+                "from_email": row.from_email,
+                "subject": row.subject,
+                "body": (
+                    decompress_text(row.codec, row.normalized_body)
+                    or decompress_text(row.codec, row.body)
+                ),
+                "classification": row.classification.value,
+                "priority_score": row.priority_score
+            }
+            for row in query.all()
+        ]
+    finally:
+        db.close()
+
+
+def split_samples(samples: list[dict], holdout: float) -> tuple[list[dict], list[dict]]:
+    """
+    Split samples into (training, held out) by a hash of the email id
+    
+    The split doesn't depend on which other emails were loaded, so an email
+    held out when the model was trained is still held out when it is
+    evaluated later.
+    """
+    cutoff = int(holdout * 10000)
+    train_samples, test_samples = [], []
+    for sample in samples:
+        held_out = zlib.crc32(sample['id'].encode()) % 10000 < cutoff
+        (test_samples if held_out else train_samples).append(sample)
+    return train_samples, test_samples
+
+
+def evaluate(model: LocalTriageModel, samples: list[dict], threshold: float) -> dict:
+    """Compare model predictions with the LLM labels of emails it wasn't trained on"""
+    class_correct = 0
+    bucket_correct = 0
+    abs_error = 0
+    confident = 0
+    confident_correct = 0
+    
+    start = time.perf_counter()
+    predictions = [
+        model.predict(s['from_email'], s['subject'], s['body'])
+        for s in samples
+    ]
+    elapsed = time.perf_counter() - start
+    
+    for sample, prediction in zip(samples, predictions):
+        correct = prediction['classification'].value == sample['classification']
+        class_correct += correct
+        bucket_correct += _priority_bucket(sample['priority_score']) == _priority_bucket(prediction['priority_score'])
+        abs_error += abs(prediction['priority_score'] - sample['priority_score'])
+        
+        if prediction['classification_confidence'] >= threshold:
+            confident += 1
+            confident_correct += correct
+    
+    total = max(len(samples), 1)
+    return {
+        "samples": len(samples),
+        "classification_accuracy": class_correct / total,
+        "priority_bucket_accuracy": bucket_correct / total,
+        "priority_mae": abs_error / total,
+        "coverage_at_threshold": confident / total,
+        "accuracy_at_threshold": confident_correct / max(confident, 1),
+        "latency_ms_per_email": elapsed * 1000 / total
+    }
+
+
+def print_report(report: dict, threshold: float):
+    print(f"Held-out samples:          {report['samples']}")
+    print(f"Classification accuracy:   {report['classification_accuracy']:.3f}")
+    print(f"Priority bucket accuracy:  {report['priority_bucket_accuracy']:.3f} ({len(PRIORITY_BUCKETS)} buckets)")
+    print(f"Priority MAE:              {report['priority_mae']:.1f}")
+    print(f"Coverage at {threshold:.2f}:         {report['coverage_at_threshold']:.3f}")
+    print(f"Accuracy at {threshold:.2f}:         {report['accuracy_at_threshold']:.3f}")
+    print(f"Latency per email:         {report['latency_ms_per_email']:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local triage model training")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    train_parser = subparsers.add_parser("train", help="Train a model from labelled emails")
+    train_parser.add_argument("--output", required=True, help="Path to write the .npz model")
+    train_parser.add_argument("--user-id", help="Train on a single user's emails")
+    train_parser.add_argument("--limit", type=int, help="Use at most this many recent emails")
+    
+    eval_parser = subparsers.add_parser("evaluate", help="Evaluate a model against LLM labels")
+    eval_parser.add_argument("--model", required=True, help="Path to the .npz model")
+    eval_parser.add_argument("--user-id", help="Evaluate on a single user's emails")
+    eval_parser.add_argument("--limit", type=int, help="Use at most this many recent emails")
+    
+    for subparser in (train_parser, eval_parser):
+        subparser.add_argument(
+            "--holdout",
+            type=float,
+            default=0.1,
+            help="Fraction of emails held out of training for evaluation"
+        )
+        subparser.add_argument(
+            "--threshold",
+            type=float,
+            default=settings.LOCAL_MODEL_CONFIDENCE,
+            help="Confidence threshold used at sync time"
+        )
+    
+    args = parser.parse_args()
+    samples = load_samples(args.user_id, args.limit)
+    
+    if not samples:
+        print("No labelled emails found")
+        return
+    
+    train_samples, test_samples = split_samples(samples, args.holdout)
+    
+    if args.command == "train":
+        start = time.perf_counter()
+        model = LocalTriageModel.fit(train_samples)
+        print(f"Trained on {len(train_samples)} emails in {time.perf_counter() - start:.1f}s")
+        
+        model.save(args.output)
+        print(f"Saved model to {args.output}")
+        
+        if test_samples:
+            print_report(evaluate(model, test_samples, args.threshold), args.threshold)
+    elif test_samples:
+        model = LocalTriageModel.load(args.model)
+        print_report(evaluate(model, test_samples, args.threshold), args.threshold)
+    else:
+        print("No held-out emails to evaluate on; use the --holdout the model was trained with")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import json
+from openai import AsyncOpenAI
+from app.config import settings
+from app.ai.cache import chat_completion
+from app.ai.normalizer import truncate_to_tokens
+from app.ai.prompts import TRIAGE_PROMPT
+from app.models.email import EmailClassification
+
+
+class EmailTriager:
+    """Classify, score and summarize an email in a single OpenAI GPT call"""
+    
+    def __init__(self):
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    
+    async def triage(
+        self,
+        from_email: str,
+        subject: str,
+        body: str,
+        important_contacts: list[str] = None,
+        working_hours: str = "9 AM - 5 PM"
+    ) -> dict:
+        """
+        Triage an email in one request
+        
+        Each field is validated independently and set to None when the model
+        returned something unusable, so callers can fall back to the
+        per-stage classes for just that field.
+        
+        Returns:
+            {
+                "classification": EmailClassification | None,
+                "priority_score": int | None,
+                "factors": dict,
+                "summary": str | None,
+                "next_action": str | None
+            }
+        """
+        # Truncate body if too long (summary needs the most context)
+        max_body_tokens = 750
+        truncated_body = truncate_to_tokens(body, max_body_tokens)
+        
+        contacts_str = ", ".join(important_contacts) if important_contacts else "None specified"
+        
+        prompt = TRIAGE_PROMPT.format(
+            from_email=from_email,
+            subject=subject,
+            body=truncated_body,
+            important_contacts=contacts_str,
+            working_hours=working_hours
+        )
+        
+        try:
+            content = await chat_completion(
+                self.client,
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are an email triage assistant. Always respond with valid JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=400,
+                response_format={"type": "json_object"}
+            )
+            
+            result = json.loads(content)
+            if not isinstance(result, dict):
+                raise ValueError("Triage response is not a JSON object")
+        
+        except Exception as e:
+            print(f"Triage error: {e}")
+            result = {}
+        
+        return {
+            "classification": self._parse_classification(result.get("classification")),
+            "priority_score": self._parse_priority_score(result.get("priority_score")),
+            "factors": result.get("factors") if isinstance(result.get("factors"), dict) else {},
+            "summary": self._parse_text(result.get("summary")),
+            "next_action": self._parse_text(result.get("next_action"))
+        }
+    
+    def _parse_classification(self, value) -> EmailClassification | None:
+        try:
+            return EmailClassification(value)
+        except ValueError:
+            return None
+    
+    def _parse_priority_score(self, value) -> int | None:
+        if isinstance(value, bool):
+            return None
+        try:
+            return max(1, min(100, int(value)))
+        except (TypeError, ValueError, OverflowError):
+            return None
+    
+    def _parse_text(self, value) -> str | None:
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+        return None
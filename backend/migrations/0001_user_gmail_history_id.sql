@@ -0,0 +1,9 @@
+-- Gmail historyId per user for incremental sync.
+--
+-- create_all only creates missing tables, so existing databases need the
+-- column added:
+--
+--     psql "$DATABASE_URL" -f migrations/0001_user_gmail_history_id.sql
+
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS gmail_history_id VARCHAR;
@@ -0,0 +1,10 @@
+-- Priority factors and next action kept from AI triage.
+--
+-- create_all only creates missing tables, so existing databases need the
+-- columns added:
+--
+--     psql "$DATABASE_URL" -f migrations/0002_email_triage_details.sql
+
+ALTER TABLE emails
+    ADD COLUMN IF NOT EXISTS priority_factors JSON,
+    ADD COLUMN IF NOT EXISTS next_action TEXT;
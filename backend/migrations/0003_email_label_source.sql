@@ -0,0 +1,22 @@
+-- Record where each email's classification and priority came from, so the
+-- local triage model only trains on LLM labels.
+--
+-- Existing emails keep label_source NULL (unknown) and are left out of
+-- training. Enum columns store member names.
+--
+--     psql "$DATABASE_URL" -f migrations/0003_email_label_source.sql
+
+BEGIN;
+
+DO $$
+BEGIN
+    CREATE TYPE labelsource AS ENUM ('LLM', 'RULES', 'LOCAL_MODEL');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END
+$$;
+
+ALTER TABLE emails
+    ADD COLUMN IF NOT EXISTS label_source labelsource;
+
+COMMIT;
@@ -0,0 +1,9 @@
+-- users.onboarding_completed was declared VARCHAR but always written as a
+-- boolean. psycopg2 stored those as 'false'/'true'; asyncpg rejects them,
+-- so the column becomes a real BOOLEAN.
+--
+--     psql "$DATABASE_URL" -f migrations/0004_user_onboarding_completed_boolean.sql
+
+ALTER TABLE users
+    ALTER COLUMN onboarding_completed TYPE BOOLEAN
+    USING onboarding_completed::boolean;
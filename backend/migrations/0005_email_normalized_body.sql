@@ -0,0 +1,10 @@
+-- Normalized body text (HTML, quoted history, signatures and footer
+-- boilerplate stripped) and its token count, written once at ingest.
+-- Emails stored before this migration keep NULLs and the AI stages fall
+-- back to the raw body.
+--
+--     psql "$DATABASE_URL" -f migrations/0005_email_normalized_body.sql
+
+ALTER TABLE emails
+    ADD COLUMN IF NOT EXISTS normalized_body TEXT,
+    ADD COLUMN IF NOT EXISTS body_tokens INTEGER;
@@ -0,0 +1,8 @@
+-- Rule-triaged emails are stored with their Gmail snippet as body and
+-- fetch the full body the first time they are opened. body_fetched marks
+-- which emails already have it; existing rows all do.
+--
+--     psql "$DATABASE_URL" -f migrations/0006_email_body_fetched.sql
+
+ALTER TABLE emails
+    ADD COLUMN IF NOT EXISTS body_fetched BOOLEAN NOT NULL DEFAULT TRUE;
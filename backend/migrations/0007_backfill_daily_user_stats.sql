@@ -0,0 +1,54 @@
+-- Backfill daily_user_stats for days that have no rollup row, so
+-- /api/brief/summary/history doesn't show zeros for days before the
+-- rollups existed or days a sync missed.
+--
+-- Received counts come from emails.received_at; processed, archived and
+-- replied counts from the activity log. llm_calls_saved was never recorded
+-- and stays 0. Days that already have a row are left alone, so running it
+-- again, or while syncs are recording, is safe. Run it once the app has
+-- created the daily_user_stats table.
+--
+--     psql "$DATABASE_URL" -f migrations/0007_backfill_daily_user_stats.sql
+
+WITH received AS (
+    SELECT user_id, received_at::date AS day, count(*) AS emails_received
+    FROM emails
+    GROUP BY 1, 2
+),
+actions AS (
+    SELECT
+        user_id,
+        created_at::date AS day,
+        count(*) FILTER (WHERE action_type = 'email_processed') AS emails_processed,
+        count(*) FILTER (WHERE action_type = 'email_archived') AS emails_archived,
+        count(*) FILTER (WHERE action_type = 'email_replied') AS emails_replied
+    FROM activity_logs
+    WHERE action_type IN ('email_processed', 'email_archived', 'email_replied')
+    GROUP BY 1, 2
+),
+daily AS (
+    SELECT
+        user_id,
+        day,
+        coalesce(received.emails_received, 0) AS emails_received,
+        coalesce(actions.emails_processed, 0) AS emails_processed,
+        coalesce(actions.emails_archived, 0) AS emails_archived,
+        coalesce(actions.emails_replied, 0) AS emails_replied
+    FROM received
+    FULL OUTER JOIN actions USING (user_id, day)
+)
+INSERT INTO daily_user_stats (
+    user_id, day, emails_received, emails_processed, emails_archived,
+    emails_replied, llm_calls_saved, updated_at
+)
+SELECT
+    daily.user_id, daily.day, daily.emails_received, daily.emails_processed,
+    daily.emails_archived, daily.emails_replied, 0, now() AT TIME ZONE 'UTC'
+FROM daily
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM daily_user_stats
+    WHERE daily_user_stats.user_id = daily.user_id
+      AND daily_user_stats.day = daily.day
+)
+ON CONFLICT (user_id, day) DO NOTHING;
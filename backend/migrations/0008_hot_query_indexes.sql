@@ -0,0 +1,32 @@
+-- Composite and partial indexes for the hot email and calendar queries.
+--
+-- Base.metadata.create_all() only creates these on fresh databases; run this
+-- against existing ones. CONCURRENTLY avoids locking writes, so run it
+-- outside a transaction:
+--
+--     psql "$DATABASE_URL" -f migrations/0008_hot_query_indexes.sql
+--
+-- Enum columns store member names (e.g. 'PENDING_APPROVAL'), not values.
+
+-- Needs attention: pending approval and urgent processed emails by priority
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_emails_user_status_priority
+    ON emails (user_id, status, priority_score);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_emails_pending_approval
+    ON emails (user_id, priority_score)
+    WHERE status = 'PENDING_APPROVAL';
+
+-- Inbox listing, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_emails_user_received_at
+    ON emails (user_id, received_at);
+
+-- Handled automatically: archived/replied emails by processing time
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_emails_user_status_processed_at
+    ON emails (user_id, status, processed_at);
+
+-- Upcoming events and meetings today
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_calendar_events_user_start_time
+    ON calendar_events (user_id, start_time);
+
+ANALYZE emails;
+ANALYZE calendar_events;
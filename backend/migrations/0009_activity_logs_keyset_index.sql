@@ -0,0 +1,11 @@
+-- Index for paging the activity history by (created_at, id) cursors,
+-- newest first. Base.metadata.create_all() only creates it on fresh
+-- databases; run this against existing ones. CONCURRENTLY avoids locking
+-- writes, so run it outside a transaction:
+--
+--     psql "$DATABASE_URL" -f migrations/0009_activity_logs_keyset_index.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_activity_logs_user_created_at
+    ON activity_logs (user_id, created_at, id);
+
+ANALYZE activity_logs;
@@ -0,0 +1,28 @@
+-- Move email bodies out of the emails row into email_bodies.
+--
+-- Existing bodies are copied uncompressed (codec 'none'); new emails are
+-- stored with EMAIL_BODY_CODEC. Both codecs are read transparently.
+--
+--     psql "$DATABASE_URL" -f migrations/0010_email_bodies.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS email_bodies (
+    email_id UUID PRIMARY KEY REFERENCES emails (id) ON DELETE CASCADE,
+    codec VARCHAR NOT NULL,
+    body BYTEA NOT NULL,
+    normalized_body BYTEA,
+    body_bytes INTEGER NOT NULL
+);
+
+INSERT INTO email_bodies (email_id, codec, body, normalized_body, body_bytes)
+SELECT id, 'none', convert_to(body, 'UTF8'), convert_to(normalized_body, 'UTF8'), octet_length(body)
+FROM emails
+ON CONFLICT (email_id) DO NOTHING;
+
+ALTER TABLE emails DROP COLUMN IF EXISTS body, DROP COLUMN IF EXISTS normalized_body;
+
+COMMIT;
+
+-- Reclaim the space the dropped columns held (takes an exclusive lock):
+--     VACUUM FULL emails;
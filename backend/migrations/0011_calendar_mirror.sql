@@ -0,0 +1,31 @@
+-- Columns for the local calendar mirror (services/calendar_mirror.py).
+--
+--     psql "$DATABASE_URL" -f migrations/0011_calendar_mirror.sql
+
+BEGIN;
+
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS calendar_sync_token VARCHAR,
+    ADD COLUMN IF NOT EXISTS calendar_time_zone VARCHAR;
+
+ALTER TABLE calendar_events
+    ADD COLUMN IF NOT EXISTS recurring_event_id VARCHAR,
+    ADD COLUMN IF NOT EXISTS all_day BOOLEAN NOT NULL DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS busy BOOLEAN NOT NULL DEFAULT TRUE;
+
+-- Event ids are only unique within one calendar
+ALTER TABLE calendar_events DROP CONSTRAINT IF EXISTS calendar_events_google_event_id_key;
+DROP INDEX IF EXISTS ix_calendar_events_google_event_id;
+CREATE INDEX IF NOT EXISTS ix_calendar_events_google_event_id ON calendar_events (google_event_id);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_calendar_events_user_event'
+                   AND conrelid = 'calendar_events'::regclass) THEN
+        ALTER TABLE calendar_events
+            ADD CONSTRAINT uq_calendar_events_user_event UNIQUE (user_id, google_event_id);
+    END IF;
+END
+$$;
+
+COMMIT;
@@ -1,8 +1,11 @@
 from app.models.user import User, AutomationLevel
-from app.models.email import Email, EmailAction, EmailClassification, EmailStatus
+from app.models.email import Email, EmailAction, EmailClassification, EmailStatus, LabelSource
+from app.models.email_body import EmailBody
 from app.models.calendar_event import CalendarEvent
 from app.models.activity_log import ActivityLog
 from app.models.preference import Preference, MemoryEntry
+from app.models.brief_projection import BriefProjection
+from app.models.daily_user_stats import DailyUserStats
 
 __all__ = [
     "User",
@@ -11,8 +14,12 @@ __all__ = [
     "EmailAction",
     "EmailClassification",
     "EmailStatus",
+    "LabelSource",
+    "EmailBody",
     "CalendarEvent",
     "ActivityLog",
     "Preference",
     "MemoryEntry",
+    "BriefProjection",
+    "DailyUserStats",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean, JSON
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -9,6 +9,10 @@ from app.database import Base
 
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # Activity history, newest first, paged by (created_at, id) cursors
+        Index("ix_activity_logs_user_created_at", "user_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
@@ -16,7 +20,7 @@ class ActivityLog(Base):
     # Action details
     action_type = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=False)
-    metadata = Column(JSON, nullable=True)
+    action_metadata = Column("metadata", JSON, nullable=True)
     
     # Undo capability
     can_undo = Column(Boolean, default=False, nullable=False)
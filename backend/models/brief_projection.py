@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from app.database import Base
+
+
+class BriefProjection(Base):
+    """Per-user Today's Brief, maintained incrementally as emails and events change"""
+    __tablename__ = "brief_projections"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    
+    # Bumped on every change; the response ETag is derived from it
+    version = Column(Integer, default=0, nullable=False)
+    
+    # Brief entries by section: {"handled": {id: entry}, "pending": {...}, "urgent": {...}, "upcoming": {...}}
+    sections = Column(JSON, nullable=False)
+    
+    # Serialized response for the current version
+    body = Column(Text, nullable=False)
+    
+    # When a time window (last 24 hours, next 7 days) next changes the rendered brief
+    valid_until = Column(DateTime, nullable=True)
+    
+    # Upcoming events are kept up to this start time; later ones are loaded
+    # once the 7-day window reaches it
+    upcoming_horizon = Column(DateTime, nullable=True)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<BriefProjection {self.user_id} v{self.version}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -9,21 +9,30 @@ from app.database import Base
 
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
+    __table_args__ = (
+        # Event ids are only unique within a calendar; shared events appear in several
+        UniqueConstraint("user_id", "google_event_id", name="uq_calendar_events_user_event"),
+        # Upcoming events and meetings today
+        Index("ix_calendar_events_user_start_time", "user_id", "start_time"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     
     # Google Calendar data
-    google_event_id = Column(String, nullable=False, unique=True, index=True)
+    google_event_id = Column(String, nullable=False, index=True)
+    recurring_event_id = Column(String, nullable=True)  # parent of a recurring-event instance
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     
-    # Time
+    # Time (UTC; all-day events span local midnight to midnight in the calendar's zone)
     start_time = Column(DateTime, nullable=False, index=True)
     end_time = Column(DateTime, nullable=False)
+    all_day = Column(Boolean, default=False, nullable=False)
     
     # Status
     status = Column(String, default="confirmed", nullable=False)
+    busy = Column(Boolean, default=True, nullable=False)  # False if marked free or declined
     
     # AI metadata
     related_email_id = Column(UUID(as_uuid=True), ForeignKey("emails.id"), nullable=True)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from app.database import Base
+
+
+class DailyUserStats(Base):
+    """Per-user daily email counters, maintained by the sync and action paths"""
+    __tablename__ = "daily_user_stats"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    
+    # Emails by received date
+    emails_received = Column(Integer, default=0, nullable=False)
+    
+    # Emails by the date the event happened
+    emails_processed = Column(Integer, default=0, nullable=False)
+    emails_archived = Column(Integer, default=0, nullable=False)
+    emails_replied = Column(Integer, default=0, nullable=False)
+    llm_calls_saved = Column(Integer, default=0, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<DailyUserStats {self.user_id} {self.day}>"
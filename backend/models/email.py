@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Boolean, JSON, Index, Enum as SQLEnum, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Optional
 import uuid
 import enum
 
@@ -15,6 +16,13 @@ class EmailClassification(str, enum.Enum):
     SPAM = "spam"
 
 
+class LabelSource(str, enum.Enum):
+    """Where an email's classification and priority came from"""
+    LLM = "llm"
+    RULES = "rules"
+    LOCAL_MODEL = "local_model"
+
+
 class EmailStatus(str, enum.Enum):
     UNPROCESSED = "unprocessed"
     PROCESSED = "processed"
@@ -25,6 +33,20 @@ class EmailStatus(str, enum.Enum):
 
 class Email(Base):
     __tablename__ = "emails"
+    __table_args__ = (
+        # Needs attention: pending approval and urgent processed emails by priority
+        Index("ix_emails_user_status_priority", "user_id", "status", "priority_score"),
+        Index(
+            "ix_emails_pending_approval",
+            "user_id",
+            "priority_score",
+            postgresql_where=text("status = 'PENDING_APPROVAL'")
+        ),
+        # Inbox listing, newest first
+        Index("ix_emails_user_received_at", "user_id", "received_at"),
+        # Handled automatically: archived/replied emails by processing time
+        Index("ix_emails_user_status_processed_at", "user_id", "status", "processed_at"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
@@ -35,12 +57,16 @@ class Email(Base):
     subject = Column(String, nullable=False)
     from_email = Column(String, nullable=False, index=True)
     from_name = Column(String, nullable=True)
-    body = Column(Text, nullable=False)
+    body_fetched = Column(Boolean, default=True, nullable=False)  # False: the stored body is the snippet until opened
+    body_tokens = Column(Integer, nullable=True)  # token count of the normalized body
     
     # AI processing
     classification = Column(SQLEnum(EmailClassification), nullable=True)
     priority_score = Column(Integer, nullable=True)  # 1-100
+    priority_factors = Column(JSON, nullable=True)
     summary = Column(Text, nullable=True)
+    next_action = Column(Text, nullable=True)
+    label_source = Column(SQLEnum(LabelSource), nullable=True)  # NULL for emails labelled before it was recorded
     
     # Status
     status = Column(SQLEnum(EmailStatus), default=EmailStatus.UNPROCESSED, nullable=False)
@@ -54,6 +80,25 @@ class Email(Base):
     user = relationship("User", back_populates="emails")
     actions = relationship("EmailAction", back_populates="email", cascade="all, delete-orphan")
     
+    # Body lives in email_bodies and is only loaded when asked for, e.g.
+    # .options(selectinload(Email.content)); otherwise body is None
+    content = relationship(
+        "EmailBody",
+        back_populates="email",
+        uselist=False,
+        lazy="noload",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+    
+    @property
+    def body(self) -> Optional[str]:
+        return self.content.text() if self.content else None
+    
+    @property
+    def normalized_body(self) -> Optional[str]:
+        return self.content.normalized_text() if self.content else None
+    
     def __repr__(self):
         return f"<Email {self.subject[:30]}>"
 
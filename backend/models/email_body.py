@@ -0,0 +1,85 @@
+from sqlalchemy import Column, String, Integer, LargeBinary, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from typing import Optional
+import zlib
+
+from app.config import settings
+from app.database import Base
+
+try:
+    import zstandard
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+except ImportError:
+    zstandard = None
+
+
+def compress_text(text: Optional[str]) -> tuple[str, Optional[bytes]]:
+    """Compress text with the configured codec, falling back to zlib without zstandard"""
+    codec = settings.EMAIL_BODY_CODEC
+    if codec == "zstd" and zstandard is None:
+        codec = "zlib"
+    
+    if text is None:
+        return codec, None
+    
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        return codec, _zstd_compressor.compress(data)
+    if codec == "zlib":
+        return codec, zlib.compress(data, 6)
+    return "none", data
+
+
+def decompress_text(codec: str, data: Optional[bytes]) -> Optional[str]:
+    """Inverse of compress_text"""
+    if data is None:
+        return None
+    
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed email bodies")
+        data = _zstd_decompressor.decompress(data)
+    elif codec == "zlib":
+        data = zlib.decompress(data)
+    
+    return data.decode("utf-8")
+
+
+class EmailBody(Base):
+    """Compressed email body, stored apart from the triage fields and loaded on demand"""
+    __tablename__ = "email_bodies"
+    
+    email_id = Column(UUID(as_uuid=True), ForeignKey("emails.id", ondelete="CASCADE"), primary_key=True)
+    
+    # "zstd", "zlib" or "none"; applies to both body columns
+    codec = Column(String, nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    normalized_body = Column(LargeBinary, nullable=True)  # HTML, quotes, signatures and boilerplate stripped
+    body_bytes = Column(Integer, nullable=False)  # uncompressed UTF-8 size of body
+    
+    # Relationship
+    email = relationship("Email", back_populates="content")
+    
+    @classmethod
+    def row(cls, email_id, body: str, normalized_body: Optional[str] = None) -> dict:
+        """Insert values for a body, compressed with the configured codec"""
+        codec, compressed_body = compress_text(body)
+        _, compressed_normalized = compress_text(normalized_body)
+        return {
+            "email_id": email_id,
+            "codec": codec,
+            "body": compressed_body,
+            "normalized_body": compressed_normalized,
+            "body_bytes": len(body.encode("utf-8"))
+        }
+    
+    def text(self) -> str:
+        return decompress_text(self.codec, self.body)
+    
+    def normalized_text(self) -> Optional[str]:
+        return decompress_text(self.codec, self.normalized_body)
+    
+    def __repr__(self):
+        return f"<EmailBody {self.email_id} {self.codec}>"
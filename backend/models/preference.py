@@ -36,7 +36,7 @@ class MemoryEntry(Base):
     # Memory data
     entry_type = Column(String, nullable=False, index=True)  # "writing_style", "contact", "pattern"
     content = Column(String, nullable=False)
-    metadata = Column(JSON, nullable=True)
+    entry_metadata = Column("metadata", JSON, nullable=True)
     
     # For future vector search (embeddings)
     # embedding = Column(Vector(1536), nullable=True)  # Requires pgvector extension
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, String, DateTime, Boolean, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -37,7 +37,10 @@ class User(Base):
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     last_sync = Column(DateTime, nullable=True)
-    onboarding_completed = Column(String, default=False, nullable=False)
+    gmail_history_id = Column(String, nullable=True)  # Gmail historyId as of last_sync
+    calendar_sync_token = Column(String, nullable=True)  # Google Calendar nextSyncToken for the local mirror
+    calendar_time_zone = Column(String, nullable=True)  # IANA zone of the primary calendar
+    onboarding_completed = Column(Boolean, default=False, nullable=False)
     
     # Relationships
     emails = relationship("Email", back_populates="user", cascade="all, delete-orphan")
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class ActivityLogResponse(BaseModel):
+    id: UUID
+    action_type: str
+    description: str
+    metadata: Optional[dict] = Field(default=None, validation_alias="action_metadata")
+    can_undo: bool
+    undone: bool
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
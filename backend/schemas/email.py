@@ -21,12 +21,15 @@ class EmailCreate(EmailBase):
 
 
 class EmailResponse(EmailBase):
+    body: Optional[str] = None  # only loaded on request; see list_emails include_body
     id: UUID
     gmail_id: str
     thread_id: str
     classification: Optional[EmailClassification]
     priority_score: Optional[int]
+    priority_factors: Optional[dict] = None
     summary: Optional[str]
+    next_action: Optional[str] = None
     status: EmailStatus
     received_at: datetime
     processed_at: Optional[datetime]
@@ -36,6 +39,22 @@ class EmailResponse(EmailBase):
         from_attributes = True
 
 
+class EmailSummary(BaseModel):
+    """Inbox list row: what the list view shows, without the body"""
+    id: UUID
+    subject: str
+    from_email: EmailStr
+    from_name: Optional[str] = None
+    summary: Optional[str]
+    classification: Optional[EmailClassification]
+    priority_score: Optional[int]
+    status: EmailStatus
+    received_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class EmailActionCreate(BaseModel):
     email_id: UUID
     action_type: str
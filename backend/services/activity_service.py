@@ -1,17 +1,20 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from typing import Optional
 import json
+import uuid
 
 from app.models import ActivityLog, User, Email, EmailAction
+from app.services.pagination import keyset_page
 
 
 class ActivityService:
     """Service for logging and managing AI actions"""
     
-    def log_action(
+    async def log_action(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: str,
         action_type: str,
         description: str,
@@ -32,35 +35,90 @@ class ActivityService:
             user_id=user_id,
             action_type=action_type,
             description=description,
-            metadata=metadata or {},
+            action_metadata=metadata or {},
             can_undo=can_undo,
             undone=False
         )
         
         db.add(activity)
-        db.commit()
-        db.refresh(activity)
+        await db.commit()
+        await db.refresh(activity)
         
         return activity
     
-    def get_recent_activity(
+    async def log_actions(
         self,
-        db: Session,
+        db: AsyncSession,
+        user_id: str,
+        actions: list[dict]
+    ) -> int:
+        """
+        Log several AI actions with a single bulk insert
+        
+        Unlike log_action this does not commit, so the logs land in the same
+        transaction as the caller's other writes.
+        
+        Args:
+            user_id: User ID
+            actions: Dicts with action_type, description and optionally
+                metadata and can_undo
+        
+        Returns:
+            Number of actions logged
+        """
+        if not actions:
+            return 0
+        
+        now = datetime.utcnow()
+        await db.execute(
+            insert(ActivityLog),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "action_type": action["action_type"],
+                    "description": action["description"],
+                    "action_metadata": action.get("metadata") or {},
+                    "can_undo": action.get("can_undo", False),
+                    "undone": False,
+                    "created_at": now
+                }
+                for action in actions
+            ]
+        )
+        
+        return len(actions)
+    
+    async def get_recent_activity(
+        self,
+        db: AsyncSession,
         user_id: str,
         limit: int = 50,
-        skip: int = 0
+        skip: int = 0,
+        cursor: Optional[str] = None
     ) -> list[ActivityLog]:
-        """Get recent activity logs for user"""
-        return db.query(ActivityLog)\
-            .filter(ActivityLog.user_id == user_id)\
-            .order_by(ActivityLog.created_at.desc())\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+        """
+        Get recent activity logs for user, newest first
+        
+        Pass the cursor from next_cursor(logs, limit, "created_at") to get the
+        following page; skip is only used when no cursor is given.
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = select(ActivityLog).where(ActivityLog.user_id == user_id)
+        
+        if cursor:
+            query = keyset_page(query, ActivityLog.created_at, ActivityLog.id, cursor, limit)
+        else:
+            query = query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).offset(skip).limit(limit)
+        
+        result = await db.execute(query)
+        return list(result.scalars().all())
     
     async def undo_action(
         self,
-        db: Session,
+        db: AsyncSession,
         activity_id: str,
         gmail_service,
         calendar_service
@@ -71,7 +129,7 @@ class ActivityService:
         Returns:
             True if successfully undone, False otherwise
         """
-        activity = db.query(ActivityLog).filter(ActivityLog.id == activity_id).first()
+        activity = await db.get(ActivityLog, activity_id)
         
         if not activity or not activity.can_undo or activity.undone:
             return False
@@ -80,7 +138,7 @@ class ActivityService:
             # Handle different action types
             if activity.action_type == "email_archived":
                 # Unarchive email (add back to inbox)
-                gmail_id = activity.metadata.get("gmail_id")
+                gmail_id = activity.action_metadata.get("gmail_id")
                 if gmail_id:
                     # This would require Gmail API call to add INBOX label
                     pass
@@ -91,17 +149,17 @@ class ActivityService:
             
             elif activity.action_type == "meeting_scheduled":
                 # Delete calendar event
-                google_event_id = activity.metadata.get("google_event_id")
+                google_event_id = activity.action_metadata.get("google_event_id")
                 if google_event_id:
                     # This would require Calendar API call to delete event
                     pass
             
             # Mark as undone
             activity.undone = True
-            db.commit()
+            await db.commit()
             
             return True
-            
+        
         except Exception as e:
             print(f"Error undoing action: {e}")
             return False
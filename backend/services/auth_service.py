@@ -1,13 +1,17 @@
+import google.auth.transport.requests
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
+import asyncio
 from jose import JWTError, jwt
 
 from app.config import settings
 from app.models import User
 from app.schemas.user import UserCreate
+from app.services.google_service_factory import google_services
 
 SCOPES = [
     'https://www.googleapis.com/auth/gmail.modify',
@@ -49,7 +53,7 @@ class AuthService:
         
         return auth_url, state
     
-    async def handle_callback(self, code: str, state: str, db: Session) -> dict:
+    async def handle_callback(self, code: str, state: str, db: AsyncSession) -> dict:
         """Handle OAuth callback and create/update user"""
         # Exchange code for tokens
         flow = Flow.from_client_config(
@@ -58,15 +62,16 @@ class AuthService:
             redirect_uri=settings.GOOGLE_REDIRECT_URI,
             state=state
         )
-        flow.fetch_token(code=code)
+        # The Google client libraries are blocking; keep them off the event loop
+        await asyncio.to_thread(flow.fetch_token, code=code)
         credentials = flow.credentials
         
         # Get user info from Google
-        user_info_service = build('oauth2', 'v2', credentials=credentials)
-        user_info = user_info_service.userinfo().get().execute()
+        user_info = await asyncio.to_thread(self._fetch_user_info, credentials)
         
         # Create or update user in database
-        user = db.query(User).filter(User.google_id == user_info['id']).first()
+        result = await db.execute(select(User).where(User.google_id == user_info['id']))
+        user = result.scalar_one_or_none()
         
         if user:
             # Update existing user
@@ -85,8 +90,8 @@ class AuthService:
             )
             db.add(user)
         
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         
         # Generate JWT token
         jwt_token = self.create_access_token(user.id)
@@ -97,6 +102,10 @@ class AuthService:
             'user': user
         }
     
+    def _fetch_user_info(self, credentials: Credentials) -> dict:
+        user_info_service = build('oauth2', 'v2', credentials=credentials)
+        return user_info_service.userinfo().get().execute()
+    
     def create_access_token(self, user_id: str) -> str:
         """Create JWT access token"""
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -118,7 +127,7 @@ class AuthService:
         except JWTError:
             raise ValueError("Invalid token")
     
-    async def refresh_google_token(self, user: User, db: Session) -> User:
+    async def refresh_google_token(self, user: User, db: AsyncSession) -> User:
         """Refresh Google OAuth token if expired"""
         if user.token_expiry and user.token_expiry < datetime.utcnow():
             credentials = Credentials(
@@ -129,11 +138,12 @@ class AuthService:
                 client_secret=settings.GOOGLE_CLIENT_SECRET
             )
             
-            credentials.refresh()
+            await asyncio.to_thread(credentials.refresh, google.auth.transport.requests.Request())
             
             user.access_token = credentials.token
             user.token_expiry = credentials.expiry
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
+            google_services.invalidate(user.id)
         
         return user
@@ -0,0 +1,153 @@
+"""
+Interval-based availability.
+
+Calendar events are parsed once into UTC intervals and merged into a sorted
+list of disjoint busy intervals. Free slots are then swept from the gaps
+between them inside each day's working hours, so finding slots costs
+O(events log events) to build plus one pass over the busy intervals.
+"""
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+from zoneinfo import ZoneInfo
+
+Interval = tuple[datetime, datetime]
+
+
+def parse_event_time(value: dict, zone: ZoneInfo) -> datetime:
+    """
+    Parse a Google Calendar start/end value into an aware UTC datetime
+    
+    All-day events ({"date": "YYYY-MM-DD"}) start at local midnight in the
+    calendar's time zone. Timed values without an offset use their own
+    timeZone, else the calendar's.
+    """
+    if 'dateTime' in value:
+        parsed = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=ZoneInfo(value['timeZone']) if value.get('timeZone') else zone)
+    else:
+        parsed = datetime.combine(date.fromisoformat(value['date']), time(), tzinfo=zone)
+    
+    return parsed.astimezone(timezone.utc)
+
+
+def event_interval(event: dict, zone: ZoneInfo) -> Optional[Interval]:
+    """
+    The busy interval of a Google Calendar event
+    
+    Returns None for events that don't block time: cancelled, marked as
+    free (transparent), or declined by the user.
+    """
+    if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent':
+        return None
+    
+    for attendee in event.get('attendees', []):
+        if attendee.get('self') and attendee.get('responseStatus') == 'declined':
+            return None
+    
+    try:
+        start = parse_event_time(event['start'], zone)
+        end = parse_event_time(event['end'], zone)
+    except (KeyError, ValueError) as e:
+        print(f"Skipping event with unparseable time: {e}")
+        return None
+    
+    return (start, end) if end > start else None
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> list[Interval]:
+    """Sort intervals and merge overlapping or touching ones"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def busy_intervals(events: Iterable[dict], zone: ZoneInfo) -> list[Interval]:
+    """Merged, sorted busy intervals for a list of Google Calendar events"""
+    return merge_intervals(
+        interval for interval in (event_interval(event, zone) for event in events) if interval
+    )
+
+
+def working_windows(
+    window_start: datetime,
+    window_end: datetime,
+    working_hours: tuple[int, int],
+    zone: ZoneInfo,
+    skip_weekends: bool = True
+) -> Iterator[tuple[datetime, datetime, datetime]]:
+    """
+    Each day's working hours in the zone, clipped to the window
+    
+    Yields (day_start, start, end) in UTC, where day_start is the unclipped
+    start of that day's working hours.
+    """
+    start_hour, end_hour = working_hours
+    day = window_start.astimezone(zone).date()
+    last_day = window_end.astimezone(zone).date()
+    
+    while day <= last_day:
+        if not (skip_weekends and day.weekday() >= 5):
+            day_start = datetime.combine(day, time(start_hour), tzinfo=zone).astimezone(timezone.utc)
+            day_end = datetime.combine(day, time(end_hour), tzinfo=zone).astimezone(timezone.utc)
+            start, end = max(day_start, window_start), min(day_end, window_end)
+            if end > start:
+                yield day_start, start, end
+        day += timedelta(days=1)
+
+
+def free_slots(
+    busy: list[Interval],
+    window_start: datetime,
+    window_end: datetime,
+    duration: timedelta,
+    granularity: timedelta,
+    working_hours: tuple[int, int],
+    zone: ZoneInfo,
+    limit: Optional[int] = None,
+    skip_weekends: bool = True
+) -> list[Interval]:
+    """
+    Sweep free slots out of the gaps between busy intervals
+    
+    Slots lie within working hours, start on granularity boundaries counted
+    from the start of the working day, and don't overlap each other.
+    
+    Args:
+        busy: Merged busy intervals from merge_intervals, in UTC
+        window_start, window_end: Aware datetimes bounding the search
+        limit: Stop after this many slots
+    """
+    busy_ends = [end for _, end in busy]
+    slots = []
+    
+    for day_start, start, end in working_windows(window_start, window_end, working_hours, zone, skip_weekends):
+        # First busy interval that ends after the window opens
+        index = bisect_right(busy_ends, start)
+        cursor = start
+        
+        while cursor < end:
+            gap_end = min(busy[index][0], end) if index < len(busy) else end
+            
+            # Align to the granularity grid anchored at the working day's start
+            steps = -((day_start - cursor) // granularity)
+            candidate = day_start + steps * granularity
+            while candidate + duration <= gap_end:
+                slots.append((candidate, candidate + duration))
+                if limit and len(slots) >= limit:
+                    return slots
+                steps = -((day_start - (candidate + duration)) // granularity)
+                candidate = day_start + steps * granularity
+            
+            if index >= len(busy):
+                break
+            cursor = busy[index][1]
+            index += 1
+    
+    return slots
@@ -0,0 +1,379 @@
+"""
+Incrementally maintained Today's Brief.
+
+Each user's brief is stored as a BriefProjection row holding the entries of
+every section and the serialized response. The sync pipeline and the
+approve/archive endpoints update it in the same transaction as the email
+change, so GET /api/brief/today reads one row instead of re-running the
+section queries.
+
+Consistency check (rebuilds projections from scratch and diffs them):
+    python -m app.services.brief_service [--user-id ID] [--repair]
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.database import AsyncSessionLocal
+from app.models import BriefProjection, CalendarEvent, Email, EmailClassification, EmailStatus
+
+HANDLED_WINDOW = timedelta(days=1)
+UPCOMING_WINDOW = timedelta(days=7)
+
+# Upcoming events are kept this far past the window, so the projection only
+# reloads them from the database once a week instead of holding the whole
+# future calendar
+UPCOMING_MARGIN = timedelta(days=7)
+
+# Entries shown per section; the projection itself keeps every qualifying entry
+SECTION_LIMITS = {"handled": 20, "pending": 20, "urgent": 10, "upcoming": 20}
+EMAIL_SECTIONS = ("handled", "pending", "urgent")
+
+
+def email_section(email: Email, now: datetime) -> Optional[str]:
+    """The brief section an email belongs in, if any"""
+    if email.status in (EmailStatus.ARCHIVED, EmailStatus.REPLIED):
+        if email.processed_at and email.processed_at >= now - HANDLED_WINDOW:
+            return "handled"
+        return None
+    
+    if email.status == EmailStatus.PENDING_APPROVAL:
+        return "pending"
+    
+    if (
+        email.status == EmailStatus.PROCESSED
+        and email.classification in (EmailClassification.URGENT, EmailClassification.ACTION_REQUIRED)
+        and (email.priority_score or 0) >= 70
+    ):
+        return "urgent"
+    
+    return None
+
+
+def email_entry(email: Email, section: str) -> dict:
+    """Serialized brief entry for an email"""
+    if section == "handled":
+        return {
+            "id": str(email.id),
+            "subject": email.subject,
+            "from_email": email.from_email,
+            "from_name": email.from_name,
+            "summary": email.summary,
+            "status": email.status.value,
+            "processed_at": email.processed_at.isoformat() if email.processed_at else None
+        }
+    
+    return {
+        "id": str(email.id),
+        "subject": email.subject,
+        "from_email": email.from_email,
+        "from_name": email.from_name,
+        "summary": email.summary,
+        "priority_score": email.priority_score,
+        "classification": email.classification.value if email.classification else None,
+        "received_at": email.received_at.isoformat()
+    }
+
+
+def event_entry(event: CalendarEvent) -> dict:
+    """Serialized brief entry for a calendar event"""
+    return {
+        "id": str(event.id),
+        "title": event.title,
+        "start_time": event.start_time.isoformat(),
+        "end_time": event.end_time.isoformat(),
+        "auto_scheduled": event.auto_scheduled
+    }
+
+
+def upcoming_horizon(now: datetime) -> datetime:
+    """Latest start time of the upcoming events a projection loaded at now keeps"""
+    return now + UPCOMING_WINDOW + UPCOMING_MARGIN
+
+
+def render(sections: dict, now: datetime, horizon: Optional[datetime] = None) -> tuple[dict, Optional[datetime]]:
+    """
+    Render the brief from projection sections
+    
+    Entries that have aged out of their time window are dropped from
+    sections in place.
+    
+    Returns:
+        (brief, valid_until) where valid_until is the next time a time window
+        changes the rendered brief, or None if nothing is time-dependent.
+        Once the upcoming window reaches horizon, the events past it have to
+        be loaded, so that is a boundary too.
+    """
+    boundaries = [horizon - UPCOMING_WINDOW] if horizon else []
+    
+    handled = sections["handled"]
+    for entry_id, entry in list(handled.items()):
+        expires_at = datetime.fromisoformat(entry["processed_at"]) + HANDLED_WINDOW
+        if expires_at <= now:
+            del handled[entry_id]
+        else:
+            boundaries.append(expires_at)
+    
+    upcoming = sections["upcoming"]
+    for entry_id, entry in list(upcoming.items()):
+        start_time = datetime.fromisoformat(entry["start_time"])
+        if start_time < now:
+            del upcoming[entry_id]
+        elif start_time <= now + UPCOMING_WINDOW:
+            boundaries.append(start_time)
+        else:
+            boundaries.append(start_time - UPCOMING_WINDOW)
+    
+    def top(section: str, key) -> list[dict]:
+        entries = sorted(sections[section].values(), key=key, reverse=True)
+        return entries[:SECTION_LIMITS[section]]
+    
+    def by_priority(entry: dict) -> int:
+        return entry["priority_score"] or 0
+    
+    upcoming_entries = sorted(
+        (entry for entry in upcoming.values() if datetime.fromisoformat(entry["start_time"]) <= now + UPCOMING_WINDOW),
+        key=lambda entry: entry["start_time"]
+    )
+    
+    brief = {
+        "handled_automatically": top("handled", lambda entry: entry["processed_at"]),
+        "needs_attention": top("pending", by_priority) + top("urgent", by_priority),
+        "upcoming": upcoming_entries[:SECTION_LIMITS["upcoming"]]
+    }
+    
+    return brief, min(boundaries) if boundaries else None
+
+
+class BriefService:
+    """Reads and incrementally maintains per-user Today's Brief projections"""
+    
+    async def get(self, db: AsyncSession, user_id: UUID) -> BriefProjection:
+        """
+        Get the user's brief projection, ready to serve
+        
+        Builds the projection on first use, and re-renders it once a time
+        window has moved past one of its entries. Upcoming events are
+        reloaded once the window reaches the horizon they were loaded to.
+        """
+        projection = await db.get(BriefProjection, user_id)
+        
+        def expired(projection: BriefProjection) -> bool:
+            return bool(projection.valid_until and projection.valid_until <= datetime.utcnow())
+        
+        if projection is None or expired(projection):
+            projection = await self._lock(db, user_id)
+            if expired(projection):
+                now = datetime.utcnow()
+                sections = projection.sections
+                if not projection.upcoming_horizon or projection.upcoming_horizon <= now + UPCOMING_WINDOW:
+                    projection.upcoming_horizon = upcoming_horizon(now)
+                    sections["upcoming"] = await self._upcoming(db, user_id, now, projection.upcoming_horizon)
+                self._render(projection, sections)
+            await db.commit()
+        
+        return projection
+    
+    async def apply_emails(self, db: AsyncSession, user_id: UUID, emails: Iterable[Email]):
+        """
+        Move emails into, between or out of brief sections after they change
+        
+        The projection row is locked until the caller commits, so this should
+        run in the same transaction as the email change. Does not commit.
+        """
+        projection = await self._lock(db, user_id)
+        sections = projection.sections
+        now = datetime.utcnow()
+        
+        for email in emails:
+            email_id = str(email.id)
+            for section in EMAIL_SECTIONS:
+                sections[section].pop(email_id, None)
+            
+            section = email_section(email, now)
+            if section:
+                sections[section][email_id] = email_entry(email, section)
+        
+        self._render(projection, sections)
+    
+    async def apply_events(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        events: Iterable[CalendarEvent] = (),
+        removed_ids: Iterable[UUID] = ()
+    ):
+        """
+        Add, update or remove upcoming events. Does not commit.
+        
+        Events starting past the projection's upcoming horizon are left out;
+        they are loaded once the window gets near them.
+        """
+        projection = await self._lock(db, user_id)
+        sections = projection.sections
+        now = datetime.utcnow()
+        
+        for event_id in removed_ids:
+            sections["upcoming"].pop(str(event_id), None)
+        
+        for event in events:
+            sections["upcoming"].pop(str(event.id), None)
+            if now <= event.start_time <= projection.upcoming_horizon and event.status != "cancelled":
+                sections["upcoming"][str(event.id)] = event_entry(event)
+        
+        self._render(projection, sections)
+    
+    async def rebuild(self, db: AsyncSession, user_id: UUID, horizon: datetime) -> dict:
+        """Compute projection sections from scratch, with upcoming events up to horizon"""
+        now = datetime.utcnow()
+        sections = {section: {} for section in SECTION_LIMITS}
+        
+        email_queries = {
+            "handled": select(Email).where(
+                Email.user_id == user_id,
+                Email.status.in_([EmailStatus.ARCHIVED, EmailStatus.REPLIED]),
+                Email.processed_at >= now - HANDLED_WINDOW
+            ),
+            "pending": select(Email).where(
+                Email.user_id == user_id,
+                Email.status == EmailStatus.PENDING_APPROVAL
+            ),
+            "urgent": select(Email).where(
+                Email.user_id == user_id,
+                Email.status == EmailStatus.PROCESSED,
+                Email.classification.in_([EmailClassification.URGENT, EmailClassification.ACTION_REQUIRED]),
+                Email.priority_score >= 70
+            )
+        }
+        for section, query in email_queries.items():
+            for email in (await db.execute(query)).scalars():
+                sections[section][str(email.id)] = email_entry(email, section)
+        
+        sections["upcoming"] = await self._upcoming(db, user_id, now, horizon)
+        
+        return sections
+    
+    async def _upcoming(self, db: AsyncSession, user_id: UUID, now: datetime, horizon: datetime) -> dict:
+        """Upcoming section entries for events starting between now and horizon"""
+        result = await db.execute(
+            select(CalendarEvent).where(
+                CalendarEvent.user_id == user_id,
+                CalendarEvent.start_time >= now,
+                CalendarEvent.start_time <= horizon,
+                CalendarEvent.status != "cancelled"
+            )
+        )
+        return {str(event.id): event_entry(event) for event in result.scalars()}
+    
+    async def check(self, db: AsyncSession, user_id: UUID, repair: bool = False) -> dict:
+        """
+        Diff the stored projection against a fresh rebuild
+        
+        Returns:
+            {section: {"missing": [ids], "unexpected": [ids], "changed": [ids]}}
+            for every section that differs; empty if the projection is consistent
+        """
+        projection = await self._lock(db, user_id)
+        stored = projection.sections
+        render(stored, datetime.utcnow())
+        expected = await self.rebuild(db, user_id, projection.upcoming_horizon)
+        
+        diff = {}
+        for section in SECTION_LIMITS:
+            have, want = stored[section], expected[section]
+            section_diff = {
+                "missing": sorted(want.keys() - have.keys()),
+                "unexpected": sorted(have.keys() - want.keys()),
+                "changed": sorted(
+                    entry_id for entry_id in want.keys() & have.keys()
+                    if want[entry_id] != have[entry_id]
+                )
+            }
+            if any(section_diff.values()):
+                diff[section] = section_diff
+        
+        if diff and repair:
+            self._render(projection, expected)
+        
+        await db.commit()
+        return diff
+    
+    async def _lock(self, db: AsyncSession, user_id: UUID) -> BriefProjection:
+        """Load the projection row for update, building it if it doesn't exist"""
+        projection = await self._select_for_update(db, user_id)
+        
+        if projection is None:
+            # SELECT ... FOR UPDATE locks nothing while the row is missing, so
+            # concurrent first requests claim it with an insert instead; the
+            # loser waits for the winner to commit and then locks its row
+            await db.execute(
+                insert(BriefProjection)
+                .values(
+                    user_id=user_id,
+                    version=0,
+                    sections={section: {} for section in SECTION_LIMITS},
+                    body="{}"
+                )
+                .on_conflict_do_nothing(index_elements=["user_id"])
+            )
+            projection = await self._select_for_update(db, user_id)
+        
+        # Version 0 has never been rendered
+        if not projection.version:
+            projection.upcoming_horizon = upcoming_horizon(datetime.utcnow())
+            self._render(projection, await self.rebuild(db, user_id, projection.upcoming_horizon))
+        
+        return projection
+    
+    async def _select_for_update(self, db: AsyncSession, user_id: UUID) -> Optional[BriefProjection]:
+        result = await db.execute(
+            select(BriefProjection)
+            .where(BriefProjection.user_id == user_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+    
+    def _render(self, projection: BriefProjection, sections: dict):
+        """Re-render the cached response and bump the projection version"""
+        brief, valid_until = render(sections, datetime.utcnow(), projection.upcoming_horizon)
+        
+        projection.sections = sections
+        projection.body = json.dumps(brief)
+        projection.valid_until = valid_until
+        projection.version = (projection.version or 0) + 1
+        flag_modified(projection, "sections")
+
+
+async def main(user_id: Optional[str], repair: bool):
+    async with AsyncSessionLocal() as db:
+        if user_id:
+            user_ids = [UUID(user_id)]
+        else:
+            user_ids = (await db.execute(select(BriefProjection.user_id))).scalars().all()
+        
+        inconsistent = 0
+        for uid in user_ids:
+            diff = await BriefService().check(db, uid, repair=repair)
+            if diff:
+                inconsistent += 1
+                print(f"{uid}: {json.dumps(diff)}")
+        
+        action = "repaired" if repair else "found"
+        print(f"{inconsistent} of {len(user_ids)} brief projections inconsistent ({action})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check brief projections against a fresh rebuild")
+    parser.add_argument("--user-id", help="Check a single user")
+    parser.add_argument("--repair", action="store_true", help="Replace inconsistent projections with the rebuild")
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id, args.repair))
@@ -0,0 +1,256 @@
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+import uuid
+
+from app.config import settings
+from app.models import User, CalendarEvent
+from app.services.availability import Interval, event_interval, free_slots, merge_intervals, parse_event_time
+from app.services.brief_service import BriefService
+from app.services.google_client import GoogleAPIError
+from app.services.google_service_factory import get_calendar_service
+
+# How far back a full sync reaches; later changes arrive through the sync token
+FULL_SYNC_LOOKBACK = timedelta(days=30)
+
+# Rows per upsert statement, well under the driver's bind parameter limit
+UPSERT_CHUNK_SIZE = 1000
+
+MIRRORED_FIELDS = (
+    "title",
+    "description",
+    "start_time",
+    "end_time",
+    "all_day",
+    "status",
+    "busy",
+    "recurring_event_id",
+)
+
+
+def _utc_naive(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class CalendarMirror:
+    """
+    Local copy of each user's primary calendar in calendar_events
+    
+    The first sync pulls every event from FULL_SYNC_LOOKBACK on; after that
+    only changes since the stored Google syncToken are fetched. Calendar
+    reads (upcoming events, availability, reply context) never call Google.
+    """
+    
+    async def sync(self, user: User, db: AsyncSession) -> dict:
+        """
+        Bring the user's mirror up to date and commit
+        
+        Returns:
+            {
+                "status": "success",
+                "full_sync": bool,
+                "updated": int,
+                "removed": int
+            }
+        """
+        calendar_service = get_calendar_service(user)
+        user.calendar_time_zone = await calendar_service.get_time_zone()
+        zone = ZoneInfo(user.calendar_time_zone)
+        
+        full_sync = not user.calendar_sync_token
+        sync_started_at = datetime.utcnow()
+        time_min = datetime.now(timezone.utc) - FULL_SYNC_LOOKBACK
+        try:
+            items, sync_token = await calendar_service.list_event_changes(user.calendar_sync_token, time_min)
+        except GoogleAPIError as e:
+            if e.status_code != 410:
+                raise
+            # Sync token expired: start over with a full sync
+            full_sync = True
+            items, sync_token = await calendar_service.list_event_changes(None, time_min)
+        
+        rows = []
+        cancelled_ids = []
+        for item in items:
+            if item.get('status') == 'cancelled':
+                cancelled_ids.append(item['id'])
+                continue
+            
+            row = self._event_row(user, item, zone)
+            if row:
+                rows.append(row)
+        
+        # Every row this sync writes gets updated_at >= sync_started_at, which
+        # is how a full sync tells current events from ones Google dropped
+        updated = []
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            statement = insert(CalendarEvent).values(rows[start:start + UPSERT_CHUNK_SIZE])
+            statement = statement.on_conflict_do_update(
+                constraint="uq_calendar_events_user_event",
+                set_={
+                    "updated_at": statement.excluded.updated_at,
+                    **{field: statement.excluded[field] for field in MIRRORED_FIELDS}
+                }
+            ).returning(CalendarEvent)
+            updated.extend(
+                (await db.scalars(statement, execution_options={"populate_existing": True})).all()
+            )
+        
+        # A full sync replaces the mirror; an incremental one only drops
+        # cancellations. Cancelling a whole series only reports the parent id,
+        # so its mirrored instances are matched on recurring_event_id.
+        removal = delete(CalendarEvent).where(CalendarEvent.user_id == user.id).returning(CalendarEvent.id)
+        if full_sync:
+            removed_ids = (await db.execute(
+                removal.where(CalendarEvent.updated_at < sync_started_at)
+            )).scalars().all()
+        else:
+            removed_ids = []
+            for start in range(0, len(cancelled_ids), UPSERT_CHUNK_SIZE):
+                chunk = cancelled_ids[start:start + UPSERT_CHUNK_SIZE]
+                removed_ids.extend((await db.execute(
+                    removal.where(or_(
+                        CalendarEvent.google_event_id.in_(chunk),
+                        CalendarEvent.recurring_event_id.in_(chunk)
+                    ))
+                )).scalars().all())
+        
+        await BriefService().apply_events(db, user.id, updated, removed_ids)
+        
+        user.calendar_sync_token = sync_token
+        await db.commit()
+        
+        return {
+            "status": "success",
+            "full_sync": full_sync,
+            "updated": len(updated),
+            "removed": len(removed_ids)
+        }
+    
+    def _event_row(self, user: User, item: dict, zone: ZoneInfo) -> Optional[dict]:
+        """calendar_events values for a Google event, or None if its times can't be parsed"""
+        try:
+            start_time = parse_event_time(item['start'], zone)
+            end_time = parse_event_time(item['end'], zone)
+        except (KeyError, ValueError) as e:
+            print(f"Skipping calendar event {item.get('id')}: {e}")
+            return None
+        
+        return {
+            "id": uuid.uuid4(),
+            "user_id": user.id,
+            "google_event_id": item['id'],
+            "recurring_event_id": item.get('recurringEventId'),
+            "title": item.get('summary') or "(No title)",
+            "description": item.get('description'),
+            "start_time": _utc_naive(start_time),
+            "end_time": _utc_naive(end_time),
+            "all_day": 'date' in item['start'],
+            "status": item.get('status', 'confirmed'),
+            "busy": event_interval(item, zone) is not None,
+            "updated_at": datetime.utcnow()
+        }
+    
+    async def get_upcoming_events(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        days: int = 7
+    ) -> list[CalendarEvent]:
+        """Mirrored events that haven't ended and start within the next `days` days"""
+        now = datetime.utcnow()
+        result = await db.execute(
+            select(CalendarEvent).where(
+                CalendarEvent.user_id == user_id,
+                CalendarEvent.end_time > now,
+                CalendarEvent.start_time < now + timedelta(days=days)
+            ).order_by(CalendarEvent.start_time)
+        )
+        return list(result.scalars().all())
+    
+    async def busy_intervals(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        start: datetime,
+        end: datetime
+    ) -> list[Interval]:
+        """Merged busy intervals overlapping [start, end), as aware UTC datetimes"""
+        result = await db.execute(
+            select(CalendarEvent.start_time, CalendarEvent.end_time).where(
+                CalendarEvent.user_id == user_id,
+                CalendarEvent.busy,
+                CalendarEvent.start_time < _utc_naive(end),
+                CalendarEvent.end_time > _utc_naive(start)
+            )
+        )
+        return merge_intervals(
+            (row.start_time.replace(tzinfo=timezone.utc), row.end_time.replace(tzinfo=timezone.utc))
+            for row in result
+        )
+    
+    async def find_available_slots(
+        self,
+        db: AsyncSession,
+        user: User,
+        duration_minutes: int = 60,
+        days_ahead: int = 7,
+        num_slots: int = 3,
+        working_hours: tuple[int, int] = (9, 17),
+        granularity_minutes: Optional[int] = None,
+        time_zone: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Find available time slots
+        
+        Working hours and weekends are taken in time_zone (default: the
+        calendar's own). Slot times are ISO strings with that zone's offset.
+        """
+        zone = ZoneInfo(time_zone or user.calendar_time_zone or 'UTC')
+        granularity = timedelta(minutes=granularity_minutes or settings.CALENDAR_SLOT_GRANULARITY_MINUTES)
+        
+        window_start = datetime.now(timezone.utc)
+        window_end = window_start + timedelta(days=days_ahead)
+        
+        slots = free_slots(
+            await self.busy_intervals(db, user.id, window_start, window_end),
+            window_start,
+            window_end,
+            duration=timedelta(minutes=duration_minutes),
+            granularity=granularity,
+            working_hours=working_hours,
+            zone=zone,
+            limit=num_slots
+        )
+        
+        return [
+            {
+                'start': slot_start.astimezone(zone).isoformat(),
+                'end': slot_end.astimezone(zone).isoformat()
+            }
+            for slot_start, slot_end in slots
+        ]
+    
+    async def calendar_context(self, db: AsyncSession, user: User, days: int = 7) -> str:
+        """Upcoming events and open slots, as calendar_context for ReplyGenerator"""
+        zone = ZoneInfo(user.calendar_time_zone or 'UTC')
+        
+        def local(value: datetime) -> str:
+            return value.replace(tzinfo=timezone.utc).astimezone(zone).strftime('%a %b %d %H:%M')
+        
+        lines = [f"Time zone: {zone.key}", "Upcoming events:"]
+        events = await self.get_upcoming_events(db, user.id, days)
+        for event in events:
+            when = f"{local(event.start_time)[:10]}, all day" if event.all_day else f"{local(event.start_time)} - {local(event.end_time)}"
+            lines.append(f"- {event.title} ({when})")
+        if not events:
+            lines.append("- None")
+        
+        lines.append("Open slots:")
+        for slot in await self.find_available_slots(db, user, days_ahead=days):
+            lines.append(f"- {slot['start']} - {slot['end']}")
+        
+        return "\n".join(lines)
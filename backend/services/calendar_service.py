@@ -1,46 +1,20 @@
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 
-from app.config import settings
 from app.models import User
+from app.services.google_client import GoogleAPIClient
+
+CALENDAR_PATH = "/calendar/v3/calendars/primary"
+FREEBUSY_PATH = "/calendar/v3/freeBusy"
+FREEBUSY_MAX_CALENDARS = 50  # per freebusy.query request
 
 
 class CalendarService:
     """Handle Google Calendar API operations"""
     
-    def __init__(self, user: User):
+    def __init__(self, user: User, client: Optional[GoogleAPIClient] = None):
         """Initialize Calendar service with user credentials"""
-        creds = Credentials(
-            token=user.access_token,
-            refresh_token=user.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=settings.GOOGLE_CLIENT_ID,
-            client_secret=settings.GOOGLE_CLIENT_SECRET
-        )
-        self.service = build('calendar', 'v3', credentials=creds)
-    
-    async def get_upcoming_events(self, days: int = 7) -> list[dict]:
-        """Get upcoming calendar events"""
-        try:
-            now = datetime.utcnow().isoformat() + 'Z'
-            end = (datetime.utcnow() + timedelta(days=days)).isoformat() + 'Z'
-            
-            events_result = self.service.events().list(
-                calendarId='primary',
-                timeMin=now,
-                timeMax=end,
-                singleEvents=True,
-                orderBy='startTime',
-                maxResults=50
-            ).execute()
-            
-            return events_result.get('items', [])
-            
-        except Exception as e:
-            print(f"Error fetching calendar events: {e}")
-            return []
+        self.client = client or GoogleAPIClient(user)
     
     async def create_event(
         self,
@@ -68,11 +42,12 @@ class CalendarService:
             if attendees:
                 event['attendees'] = [{'email': email} for email in attendees]
             
-            created_event = self.service.events().insert(
-                calendarId='primary',
-                body=event,
-                sendUpdates='all'
-            ).execute()
+            created_event = await self.client.request(
+                'POST',
+                f'{CALENDAR_PATH}/events',
+                params={'sendUpdates': 'all'},
+                json_body=event
+            )
             
             return created_event
             
@@ -80,80 +55,80 @@ class CalendarService:
             print(f"Error creating calendar event: {e}")
             return None
     
-    async def find_available_slots(
-        self,
-        duration_minutes: int = 60,
-        days_ahead: int = 7,
-        num_slots: int = 3,
-        working_hours: tuple[int, int] = (9, 17)
-    ) -> list[dict]:
-        """Find available time slots"""
+    async def get_time_zone(self) -> str:
+        """The calendar's IANA time zone, falling back to UTC"""
         try:
-            events = await self.get_upcoming_events(days=days_ahead)
-            available_slots = []
-            current_time = datetime.utcnow()
-            
-            for day in range(days_ahead):
-                check_date = current_time + timedelta(days=day)
-                
-                # Skip weekends
-                if check_date.weekday() >= 5:
-                    continue
-                
-                # Check working hours
-                start_hour, end_hour = working_hours
-                for hour in range(start_hour, end_hour):
-                    slot_start = check_date.replace(
-                        hour=hour,
-                        minute=0,
-                        second=0,
-                        microsecond=0
-                    )
-                    slot_end = slot_start + timedelta(minutes=duration_minutes)
-                    
-                    # Skip past slots
-                    if slot_start < current_time:
-                        continue
-                    
-                    # Check if slot conflicts with existing events
-                    has_conflict = any(
-                        self._time_overlaps(slot_start, slot_end, event)
-                        for event in events
-                    )
-                    
-                    if not has_conflict:
-                        available_slots.append({
-                            'start': slot_start.isoformat(),
-                            'end': slot_end.isoformat()
-                        })
-                        
-                        if len(available_slots) >= num_slots:
-                            return available_slots
-            
-            return available_slots
-            
+            calendar = await self.client.request('GET', CALENDAR_PATH)
+            return calendar.get('timeZone') or 'UTC'
         except Exception as e:
-            print(f"Error finding available slots: {e}")
-            return []
+            print(f"Error fetching calendar time zone: {e}")
+            return 'UTC'
     
-    def _time_overlaps(self, start1: datetime, end1: datetime, event: dict) -> bool:
-        """Check if time range overlaps with event"""
-        try:
-            event_start_str = event['start'].get('dateTime', event['start'].get('date'))
-            event_end_str = event['end'].get('dateTime', event['end'].get('date'))
-            
-            # Parse datetime strings
-            event_start = datetime.fromisoformat(event_start_str.replace('Z', '+00:00'))
-            event_end = datetime.fromisoformat(event_end_str.replace('Z', '+00:00'))
-            
-            # Make timezone-naive for comparison
-            if event_start.tzinfo:
-                event_start = event_start.replace(tzinfo=None)
-            if event_end.tzinfo:
-                event_end = event_end.replace(tzinfo=None)
+    async def list_event_changes(
+        self,
+        sync_token: Optional[str] = None,
+        time_min: Optional[datetime] = None
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        One events.list sync pass over the primary calendar, following pagination
+        
+        Without sync_token this is a full sync of events from time_min on;
+        with it, only events changed since that token are returned, including
+        cancelled ones. Recurring events are expanded into their instances.
+        
+        Returns:
+            (events, next_sync_token)
+        
+        Raises:
+            GoogleAPIError: 410 if the sync token has expired and a full sync is needed
+        """
+        events = []
+        params = {'singleEvents': 'true', 'maxResults': 2500}
+        if sync_token:
+            params['syncToken'] = sync_token
+        elif time_min:
+            params['timeMin'] = time_min.isoformat()
+        
+        while True:
+            events_result = await self.client.request('GET', f'{CALENDAR_PATH}/events', params=params)
+            events.extend(events_result.get('items', []))
             
-            return start1 < event_end and end1 > event_start
+            page_token = events_result.get('nextPageToken')
+            if not page_token:
+                return events, events_result.get('nextSyncToken')
+            params['pageToken'] = page_token
+    
+    async def query_freebusy(
+        self,
+        emails: list[str],
+        time_min: datetime,
+        time_max: datetime
+    ) -> dict[str, Optional[list[dict]]]:
+        """
+        Busy periods for several people's primary calendars via freebusy.query
+        
+        All calendars go in one request, up to FREEBUSY_MAX_CALENDARS each.
+        
+        Returns:
+            {email: [{"start": str, "end": str}, ...]}, with None for calendars
+            that couldn't be read (not shared, unknown address)
+        """
+        busy = {}
+        for start in range(0, len(emails), FREEBUSY_MAX_CALENDARS):
+            chunk = emails[start:start + FREEBUSY_MAX_CALENDARS]
+            result = await self.client.request(
+                'POST',
+                FREEBUSY_PATH,
+                json_body={
+                    'timeMin': time_min.isoformat(),
+                    'timeMax': time_max.isoformat(),
+                    'items': [{'id': email} for email in chunk]
+                }
+            )
             
-        except Exception as e:
-            print(f"Error checking time overlap: {e}")
-            return False
+            calendars = result.get('calendars', {})
+            for email in chunk:
+                calendar = calendars.get(email)
+                busy[email] = None if not calendar or calendar.get('errors') else calendar.get('busy', [])
+        
+        return busy
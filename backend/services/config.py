@@ -7,14 +7,27 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: str = ""  # defaults to DATABASE_URL with the asyncpg driver
     
     # Google OAuth
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
     GOOGLE_REDIRECT_URI: str
+    GOOGLE_API_BASE_URL: str = "https://www.googleapis.com"
+    GOOGLE_API_TIMEOUT_SECONDS: float = 30.0
+    GOOGLE_CLIENT_CACHE_SIZE: int = 1000  # per-user API clients kept per process
     
     # OpenAI
     OPENAI_API_KEY: str
+    AI_MAX_CONCURRENCY: int = 5  # emails processed by the AI pipeline at once
+    AI_REQUESTS_PER_MINUTE: int = 500  # 0 disables rate limiting
+    AI_RULES_ENABLED: bool = True  # header/label pre-triage that skips the LLM
+    AI_TRIAGE_MODE: str = "per_stage"  # "per_stage" (3 calls per email) or "fused" (1 call)
+    LOCAL_MODEL_PATH: str = ""  # local triage model (.npz); may contain {user_id} for per-user models
+    LOCAL_MODEL_CONFIDENCE: float = 0.9  # below this the LLM is used instead
+    LLM_CACHE_BACKEND: str = "memory"  # "memory", "redis" or "none"
+    LLM_CACHE_MAX_ENTRIES: int = 10000
+    LLM_CACHE_TTL_SECONDS: int = 86400
     
     # JWT
     JWT_SECRET: str
@@ -27,6 +40,22 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Background jobs
+    JOB_QUEUE_BACKEND: str = "redis"  # "redis" or "memory" (single process, for tests)
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: float = 10.0
+    JOB_RESULT_TTL_SECONDS: int = 86400
+    JOB_LEASE_SECONDS: int = 300  # a running job is retried if its worker stops renewing this lease
+    
+    # Gmail
+    GMAIL_BATCH_SIZE: int = 50  # messages per HTTP batch request (Gmail caps at 100)
+    GMAIL_SYNC_MAX_EMAILS: int = 20  # new emails processed per sync; the rest wait for the next one
+    GMAIL_MAX_BODY_BYTES: int = 262144  # decoded body size cap per message
+    EMAIL_BODY_CODEC: str = "zstd"  # "zstd" (zlib if zstandard isn't installed), "zlib" or "none"
+    
+    # Calendar
+    CALENDAR_SLOT_GRANULARITY_MINUTES: int = 15  # proposed meeting starts are aligned to this
+    
     # Environment
     ENVIRONMENT: str = "development"
     
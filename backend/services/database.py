@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -14,6 +15,25 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the API handlers (asyncpg driver unless overridden)
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or settings.DATABASE_URL.replace(
+        "postgresql://", "postgresql+asyncpg://", 1
+    ),
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20
+)
+
+# Async session factory; objects stay usable after commit so handlers can
+# keep serializing them without another round trip
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -25,3 +45,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Email, User, AutomationLevel, EmailClassification
 
 
@@ -12,7 +12,7 @@ class DecisionEngine:
         self,
         email: Email,
         user: User,
-        db: Session
+        db: AsyncSession
     ) -> dict:
         """
         Decide what action to take with an email.
@@ -1,58 +1,221 @@
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
 import base64
+import html
+import time
+from dataclasses import dataclass
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional
+from urllib.parse import quote, urlencode
 
 from app.config import settings
 from app.models import User
+from app.ai.rules import TRIAGE_HEADERS
+from app.services.google_client import GoogleAPIClient, GoogleAPIError
+
+GMAIL_PATH = "/gmail/v1/users/me"
+GMAIL_BATCH_PATH = "/batch/gmail/v1"
+
+# Per-message statuses for mail deleted since it was listed
+GONE_STATUSES = (404, 410)
+
+# Phase-one fetch: just what rule-based triage and the inbox list need
+METADATA_HEADERS = ["From", "Subject", "List-Unsubscribe", "List-Id", "Precedence", "Auto-Submitted"]
+METADATA_FIELDS = "id,threadId,labelIds,snippet,internalDate,payload(mimeType,headers)"
+
+
+@dataclass
+class FetchMetrics:
+    """Gmail transfer and parse cost for one GmailService instance"""
+    round_trips: int = 0
+    bytes_received: int = 0
+    parse_ms: float = 0.0
 
 
 class GmailService:
     """Handle Gmail API operations"""
     
-    def __init__(self, user: User):
+    def __init__(self, user: User, client: Optional[GoogleAPIClient] = None):
         """Initialize Gmail service with user credentials"""
-        creds = Credentials(
-            token=user.access_token,
-            refresh_token=user.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=settings.GOOGLE_CLIENT_ID,
-            client_secret=settings.GOOGLE_CLIENT_SECRET
-        )
-        self.service = build('gmail', 'v1', credentials=creds)
+        self.client = client or GoogleAPIClient(user)
         self.user_email = user.email
+        self.metrics = FetchMetrics()
     
-    async def fetch_unread_emails(self, max_results: int = 50) -> list[dict]:
+    async def fetch_unread_emails(self, max_results: int = 50, format: str = 'full') -> list[dict]:
         """Fetch unread emails from inbox"""
         try:
-            results = self.service.users().messages().list(
-                userId='me',
-                q='is:unread in:inbox',
-                maxResults=max_results
-            ).execute()
-            
-            messages = results.get('messages', [])
-            emails = []
-            
-            for msg in messages:
-                email_data = self.service.users().messages().get(
-                    userId='me',
-                    id=msg['id'],
-                    format='full'
-                ).execute()
-                
-                parsed_email = self._parse_email(email_data)
-                if parsed_email:
-                    emails.append(parsed_email)
-            
+            message_ids = await self._list_unread(max_results)
+            emails, _ = await self.fetch_messages(message_ids, format)
             return emails
-            
+        
         except Exception as e:
             print(f"Error fetching emails: {e}")
             return []
     
+    async def list_new_message_ids(
+        self,
+        history_id: Optional[str],
+        max_results: int = 50
+    ) -> tuple[list[str], Optional[str]]:
+        """
+        List ids of unread inbox messages added since history_id, oldest first
+        
+        Uses users.history.list so only new mail is listed. Falls back to the
+        max_results newest unread messages when no history_id is stored yet
+        or Gmail reports it as expired (HTTP 404). Listing errors are raised,
+        never swallowed, so a failed sync can't move the stored history_id
+        past mail it hasn't seen.
+        
+        Returns:
+            (message_ids, history_id to store once every listed message is stored)
+        """
+        if history_id:
+            try:
+                return await self._list_history(history_id)
+            except GoogleAPIError as e:
+                if e.status_code != 404:
+                    raise
+        
+        # Full sync: record the mailbox position before listing so nothing
+        # arriving in between is missed by the next incremental sync
+        profile = await self.client.request('GET', f'{GMAIL_PATH}/profile', metrics=self.metrics)
+        self.metrics.round_trips += 1
+        
+        message_ids = await self._list_unread(max_results)
+        return list(reversed(message_ids)), profile.get('historyId')
+    
+    async def _list_unread(self, max_results: int) -> list[str]:
+        """List ids of the newest unread inbox messages"""
+        results = await self.client.request(
+            'GET',
+            f'{GMAIL_PATH}/messages',
+            params={'q': 'is:unread in:inbox', 'maxResults': max_results},
+            metrics=self.metrics
+        )
+        self.metrics.round_trips += 1
+        
+        return [msg['id'] for msg in results.get('messages', [])]
+    
+    async def _list_history(self, history_id: str) -> tuple[list[str], str]:
+        """List ids of unread inbox messages added since history_id"""
+        message_ids = []
+        seen = set()
+        latest_history_id = history_id
+        page_token = None
+        
+        while True:
+            params = {
+                'startHistoryId': history_id,
+                'historyTypes': ['messageAdded'],
+                'labelId': 'INBOX'
+            }
+            if page_token:
+                params['pageToken'] = page_token
+            
+            results = await self.client.request(
+                'GET',
+                f'{GMAIL_PATH}/history',
+                params=params,
+                metrics=self.metrics
+            )
+            self.metrics.round_trips += 1
+            
+            for record in results.get('history', []):
+                for added in record.get('messagesAdded', []):
+                    message = added['message']
+                    if 'UNREAD' not in message.get('labelIds', []):
+                        continue
+                    if message['id'] not in seen:
+                        seen.add(message['id'])
+                        message_ids.append(message['id'])
+            
+            latest_history_id = results.get('historyId', latest_history_id)
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        
+        return message_ids, latest_history_id
+    
+    async def fetch_messages(
+        self,
+        message_ids: list[str],
+        format: str = 'full'
+    ) -> tuple[list[dict], list[str]]:
+        """
+        Fetch and parse messages using Gmail HTTP batch requests
+        
+        Messages are fetched in chunks of GMAIL_BATCH_SIZE, one round trip per
+        chunk. A failure on one message (e.g. a per-item 429) or a whole chunk
+        is logged and reported without affecting the rest. Messages that are
+        gone (deleted since they were listed) and messages that can't be
+        parsed are dropped, not reported, since refetching won't help.
+        
+        Returns:
+            (parsed emails in the order of message_ids, ids that failed to fetch)
+        """
+        fetched = {}
+        failed_ids = []
+        batch_size = max(1, min(settings.GMAIL_BATCH_SIZE, 100))
+        
+        query = {'format': format}
+        if format == 'metadata':
+            query.update(metadataHeaders=METADATA_HEADERS, fields=METADATA_FIELDS)
+        query_string = urlencode(query, doseq=True)
+        
+        for start in range(0, len(message_ids), batch_size):
+            chunk = message_ids[start:start + batch_size]
+            try:
+                responses = await self.client.batch(
+                    GMAIL_BATCH_PATH,
+                    [f'{GMAIL_PATH}/messages/{quote(message_id)}?{query_string}' for message_id in chunk],
+                    metrics=self.metrics
+                )
+                self.metrics.round_trips += 1
+            except Exception as e:
+                print(f"Error fetching email batch: {e}")
+                failed_ids.extend(chunk)
+                continue
+            
+            for message_id, (status, response) in zip(chunk, responses):
+                if status == 200 and response is not None:
+                    fetched[message_id] = response
+                elif status in GONE_STATUSES:
+                    print(f"Skipping email {message_id}: no longer exists")
+                else:
+                    print(f"Error fetching email {message_id}: HTTP {status}")
+                    failed_ids.append(message_id)
+        
+        started = time.perf_counter()
+        emails = []
+        for message_id in message_ids:
+            if message_id not in fetched:
+                continue
+            parsed_email = self._parse_email(fetched[message_id])
+            if parsed_email:
+                emails.append(parsed_email)
+        self.metrics.parse_ms += (time.perf_counter() - started) * 1000
+        
+        return emails, failed_ids
+    
+    async def fetch_bodies(self, emails: list[dict]) -> list[str]:
+        """
+        Second fetch phase: load full bodies for emails fetched as metadata
+        
+        Updates each email's 'body' in place.
+        
+        Returns:
+            gmail_ids of emails whose full fetch failed; their body is unchanged
+        """
+        full_emails, _ = await self.fetch_messages([email['gmail_id'] for email in emails])
+        bodies = {full_email['gmail_id']: full_email['body'] for full_email in full_emails}
+        
+        failed_ids = []
+        for email in emails:
+            if email['gmail_id'] in bodies:
+                email['body'] = bodies[email['gmail_id']]
+            else:
+                failed_ids.append(email['gmail_id'])
+        return failed_ids
+    
     def _parse_email(self, email_data: dict) -> Optional[dict]:
         """Parse Gmail API response into structured format"""
         try:
@@ -72,30 +235,68 @@ class GmailService:
                 'from_email': self._extract_email(headers.get('From', '')),
                 'from_name': self._extract_name(headers.get('From', '')),
                 'body': body,
-                'received_at': received_at
+                'snippet': html.unescape(email_data.get('snippet', '')),
+                'received_at': received_at,
+                'label_ids': email_data.get('labelIds', []),
+                'triage_headers': {
+                    name.lower(): value for name, value in headers.items()
+                    if name.lower() in TRIAGE_HEADERS
+                }
             }
         except Exception as e:
             print(f"Error parsing email: {e}")
             return None
     
     def _extract_body(self, payload: dict) -> str:
-        """Extract email body from payload"""
-        body = ""
-        
-        if 'parts' in payload:
-            for part in payload['parts']:
-                if part['mimeType'] == 'text/plain':
-                    if 'data' in part['body']:
-                        body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8', errors='ignore')
-                        break
-                elif part['mimeType'] == 'text/html' and not body:
-                    if 'data' in part['body']:
-                        body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8', errors='ignore')
-        else:
-            if 'data' in payload['body']:
-                body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8', errors='ignore')
-        
-        return body
+        """
+        Extract email body from payload
+        
+        Walks nested multipart trees iteratively in document order and picks
+        the first text/plain part, falling back to the first text/html part.
+        Attachments are skipped without touching their data, only the chosen
+        part is decoded, and decoding stops at GMAIL_MAX_BODY_BYTES.
+        """
+        html_data = None
+        stack = [payload]
+        
+        while stack:
+            part = stack.pop()
+            
+            if part.get('parts'):
+                # Reversed so parts pop off the stack in document order
+                stack.extend(reversed(part['parts']))
+                continue
+            
+            if self._is_attachment(part):
+                continue
+            
+            data = part.get('body', {}).get('data')
+            if not data:
+                continue
+            
+            mime_type = part.get('mimeType', '')
+            if mime_type == 'text/plain':
+                return self._decode_body(data)
+            if mime_type == 'text/html' and html_data is None:
+                html_data = data
+        
+        return self._decode_body(html_data) if html_data else ""
+    
+    def _is_attachment(self, part: dict) -> bool:
+        if part.get('filename') or part.get('body', {}).get('attachmentId'):
+            return True
+        for header in part.get('headers', []):
+            if header['name'].lower() == 'content-disposition':
+                return header['value'].lower().startswith('attachment')
+        return False
+    
+    def _decode_body(self, data: str) -> str:
+        """Decode base64url body data, capped at GMAIL_MAX_BODY_BYTES"""
+        max_bytes = settings.GMAIL_MAX_BODY_BYTES
+        # Every 4 base64 characters decode to 3 bytes
+        data = data[:(max_bytes + 2) // 3 * 4]
+        data += '=' * (-len(data) % 4)
+        return base64.urlsafe_b64decode(data)[:max_bytes].decode('utf-8', errors='ignore')
     
     def _extract_email(self, from_field: str) -> str:
         """Extract email address from 'From' field"""
@@ -127,17 +328,18 @@ class GmailService:
             
             raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
             
-            send_params = {
-                'userId': 'me',
-                'body': {'raw': raw}
-            }
+            send_body = {'raw': raw}
             
             if thread_id:
-                send_params['body']['threadId'] = thread_id
+                send_body['threadId'] = thread_id
             
-            result = self.service.users().messages().send(**send_params).execute()
+            result = await self.client.request(
+                'POST',
+                f'{GMAIL_PATH}/messages/send',
+                json_body=send_body
+            )
             return result
-            
+        
         except Exception as e:
             print(f"Error sending email: {e}")
             raise
@@ -145,11 +347,11 @@ class GmailService:
     async def archive_email(self, gmail_id: str) -> bool:
         """Archive email (remove from inbox)"""
         try:
-            self.service.users().messages().modify(
-                userId='me',
-                id=gmail_id,
-                body={'removeLabelIds': ['INBOX']}
-            ).execute()
+            await self.client.request(
+                'POST',
+                f'{GMAIL_PATH}/messages/{quote(gmail_id)}/modify',
+                json_body={'removeLabelIds': ['INBOX']}
+            )
             return True
         except Exception as e:
             print(f"Error archiving email: {e}")
@@ -158,11 +360,11 @@ class GmailService:
     async def mark_as_read(self, gmail_id: str) -> bool:
         """Mark email as read"""
         try:
-            self.service.users().messages().modify(
-                userId='me',
-                id=gmail_id,
-                body={'removeLabelIds': ['UNREAD']}
-            ).execute()
+            await self.client.request(
+                'POST',
+                f'{GMAIL_PATH}/messages/{quote(gmail_id)}/modify',
+                json_body={'removeLabelIds': ['UNREAD']}
+            )
             return True
         except Exception as e:
             print(f"Error marking as read: {e}")
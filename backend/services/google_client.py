@@ -0,0 +1,176 @@
+import asyncio
+import json
+import uuid
+from typing import Optional
+
+import httpx
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+from app.config import settings
+from app.models import User
+
+
+class GoogleAPIError(Exception):
+    """Non-2xx response from a Google API"""
+    
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Google API error {status_code}: {message}")
+        self.status_code = status_code
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide HTTP client so keep-alive connections are pooled across requests"""
+    global _http_client
+    
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.GOOGLE_API_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    
+    return _http_client
+
+
+def build_credentials(user: User) -> Credentials:
+    """OAuth credentials for a user's stored tokens"""
+    return Credentials(
+        token=user.access_token,
+        refresh_token=user.refresh_token,
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id=settings.GOOGLE_CLIENT_ID,
+        client_secret=settings.GOOGLE_CLIENT_SECRET,
+        expiry=user.token_expiry
+    )
+
+
+class GoogleAPIClient:
+    """
+    Async client for the Google REST APIs (Gmail, Calendar)
+    
+    Requests go through the shared pooled httpx client against
+    GOOGLE_API_BASE_URL, which can point at a local stand-in for testing.
+    """
+    
+    def __init__(
+        self,
+        user: User,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
+        self.credentials = build_credentials(user)
+        self.base_url = (base_url or settings.GOOGLE_API_BASE_URL).rstrip('/')
+        self.http_client = http_client
+    
+    async def _authorization(self) -> str:
+        if not self.credentials.valid and self.credentials.refresh_token:
+            # google-auth refreshes synchronously; keep it off the event loop
+            await asyncio.to_thread(self.credentials.refresh, Request())
+        return f"Bearer {self.credentials.token}"
+    
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict] = None,
+        json_body: Optional[dict] = None,
+        metrics=None
+    ) -> dict:
+        """
+        Send a single API request and return the decoded JSON response
+        
+        If metrics is given, its bytes_received is incremented by the bytes
+        transferred, before httpx decompresses the body.
+        """
+        client = self.http_client or get_http_client()
+        response = await client.request(
+            method,
+            self.base_url + path,
+            params=params,
+            json=json_body,
+            headers={"Authorization": await self._authorization()}
+        )
+        if metrics is not None:
+            metrics.bytes_received += response.num_bytes_downloaded
+        
+        if response.status_code >= 400:
+            raise GoogleAPIError(response.status_code, response.text)
+        
+        return response.json() if response.content else {}
+    
+    async def batch(
+        self,
+        batch_path: str,
+        paths: list[str],
+        metrics=None
+    ) -> list[tuple[int, Optional[dict]]]:
+        """
+        Send GET requests as a single multipart/mixed batch request
+        
+        Args:
+            batch_path: Batch endpoint, e.g. "/batch/gmail/v1"
+            paths: Request paths (with query string) for each item
+        
+        Returns:
+            (status, decoded JSON body) for each path, in order. A failed item
+            does not affect the others.
+        """
+        boundary = f"batch_{uuid.uuid4().hex}"
+        body = "".join(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <item{index}>\r\n\r\n"
+            f"GET {path}\r\n\r\n"
+            for index, path in enumerate(paths)
+        ) + f"--{boundary}--\r\n"
+        
+        client = self.http_client or get_http_client()
+        response = await client.post(
+            self.base_url + batch_path,
+            content=body.encode(),
+            headers={
+                "Authorization": await self._authorization(),
+                "Content-Type": f"multipart/mixed; boundary={boundary}"
+            }
+        )
+        if metrics is not None:
+            metrics.bytes_received += response.num_bytes_downloaded
+        
+        if response.status_code >= 400:
+            raise GoogleAPIError(response.status_code, response.text)
+        
+        return self._parse_batch_response(response, len(paths))
+    
+    def _parse_batch_response(self, response: httpx.Response, count: int) -> list[tuple[int, Optional[dict]]]:
+        content_type = response.headers.get("content-type", "")
+        boundary = content_type.split("boundary=", 1)[-1].strip('"')
+        results: list[tuple[int, Optional[dict]]] = [(0, None)] * count
+        
+        for part in response.text.split(f"--{boundary}"):
+            part = part.strip()
+            if not part or part == "--":
+                continue
+            
+            # Outer part headers, then the embedded HTTP response
+            part_headers, _, http_response = part.partition("\r\n\r\n")
+            index = None
+            for line in part_headers.split("\r\n"):
+                name, _, value = line.partition(":")
+                if name.strip().lower() == "content-id":
+                    index = int(value.strip().strip("<>").rsplit("item", 1)[-1])
+            if index is None or index >= count:
+                continue
+            
+            status_line, _, rest = http_response.partition("\r\n")
+            _, _, payload = rest.partition("\r\n\r\n")
+            status = int(status_line.split(" ")[1])
+            
+            try:
+                results[index] = (status, json.loads(payload) if payload.strip() else None)
+            except ValueError:
+                results[index] = (status, None)
+        
+        return results
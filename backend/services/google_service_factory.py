@@ -0,0 +1,101 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.config import settings
+from app.models import User
+from app.services.google_client import GoogleAPIClient
+from app.services.gmail_service import GmailService
+from app.services.calendar_service import CalendarService
+
+
+@dataclass
+class ServiceFactoryStats:
+    """Counters for the per-process Google client cache"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    construction_ms_total: float = 0.0
+    last_construction_ms: float = 0.0
+
+
+def credential_version(user: User) -> str:
+    """Changes whenever the user's stored OAuth tokens change"""
+    material = f"{user.access_token}|{user.refresh_token}|{user.token_expiry}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+class GoogleServiceFactory:
+    """
+    Build Gmail and Calendar services on cached per-user API clients
+    
+    Clients (credentials plus auth state) are cached per user with LRU
+    eviction and keyed by credential version, so a token refresh stored on
+    the user replaces the cached client. A client that refreshes its own
+    expired access token keeps it across requests. The services themselves
+    are thin and built per request.
+    """
+    
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or settings.GOOGLE_CLIENT_CACHE_SIZE
+        self.stats = ServiceFactoryStats()
+        self._clients: OrderedDict[str, tuple[str, GoogleAPIClient]] = OrderedDict()
+    
+    def _client(self, user: User) -> GoogleAPIClient:
+        key = str(user.id)
+        version = credential_version(user)
+        entry = self._clients.get(key)
+        
+        if entry is not None and entry[0] == version:
+            self._clients.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+        
+        if entry is not None:
+            self.stats.invalidations += 1
+        self.stats.misses += 1
+        
+        client = GoogleAPIClient(user)
+        self._clients[key] = (version, client)
+        self._clients.move_to_end(key)
+        
+        while len(self._clients) > self.max_entries:
+            self._clients.popitem(last=False)
+            self.stats.evictions += 1
+        
+        return client
+    
+    def _record(self, service, started: float):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        service.construction_ms = elapsed_ms
+        self.stats.last_construction_ms = elapsed_ms
+        self.stats.construction_ms_total += elapsed_ms
+        return service
+    
+    def gmail(self, user: User) -> GmailService:
+        started = time.perf_counter()
+        return self._record(GmailService(user, client=self._client(user)), started)
+    
+    def calendar(self, user: User) -> CalendarService:
+        started = time.perf_counter()
+        return self._record(CalendarService(user, client=self._client(user)), started)
+    
+    def invalidate(self, user_id):
+        """Drop a user's cached client, e.g. after their tokens were refreshed"""
+        if self._clients.pop(str(user_id), None) is not None:
+            self.stats.invalidations += 1
+
+
+google_services = GoogleServiceFactory()
+
+
+def get_gmail_service(user: User) -> GmailService:
+    """Gmail service for a user, built on the process-wide client cache"""
+    return google_services.gmail(user)
+
+
+def get_calendar_service(user: User) -> CalendarService:
+    """Calendar service for a user, built on the process-wide client cache"""
+    return google_services.calendar(user)
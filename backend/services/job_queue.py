@@ -0,0 +1,369 @@
+import asyncio
+import enum
+import json
+import time
+import uuid
+from typing import Optional
+
+from app.config import settings
+
+SYNC_JOB = "email_sync"
+CALENDAR_SYNC_JOB = "calendar_sync"
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+def _new_job(job_type: str, user_id: str) -> dict:
+    now = time.time()
+    return {
+        "id": str(uuid.uuid4()),
+        "type": job_type,
+        "user_id": str(user_id),
+        "status": JobStatus.QUEUED.value,
+        "attempts": 0,
+        "result": None,
+        "error": None,
+        "run_at": now,
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff before the next attempt"""
+    return settings.JOB_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+
+
+async def keep_lease(queue, job_id: str):
+    """Renew a running job's lease until cancelled or the lease is lost"""
+    while True:
+        await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+        if not await queue.heartbeat(job_id):
+            print(f"Job {job_id} lost its lease")
+            return
+
+
+class InMemoryJobQueue:
+    """
+    Single-process job queue for tests and local development
+    
+    Same interface as RedisJobQueue: at most one queued or running job per
+    (type, user), failed attempts are retried with exponential backoff, a
+    running job whose lease runs out is retried the same way, and finished
+    jobs stay readable for status checks.
+    """
+    
+    def __init__(self):
+        self._jobs: dict[str, dict] = {}
+        self._active: dict[tuple[str, str], str] = {}
+        self._scheduled: list[str] = []
+        self._leases: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+    
+    async def enqueue(self, job_type: str, user_id: str) -> dict:
+        """Queue a job, or return the user's already active job of this type"""
+        async with self._lock:
+            active_id = self._active.get((job_type, str(user_id)))
+            if active_id:
+                return dict(self._jobs[active_id])
+            
+            job = _new_job(job_type, user_id)
+            self._jobs[job["id"]] = job
+            self._active[(job_type, job["user_id"])] = job["id"]
+            self._scheduled.append(job["id"])
+            return dict(job)
+    
+    async def start(self, job_type: str, user_id: str) -> tuple[dict, bool]:
+        """
+        Claim a job to run in the caller's own process, under a lease
+        
+        Returns:
+            (job, started); when the user already has an active job of this
+            type, that job and False
+        """
+        async with self._lock:
+            active_id = self._active.get((job_type, str(user_id)))
+            if active_id:
+                return dict(self._jobs[active_id]), False
+            
+            job = _new_job(job_type, user_id)
+            job.update(status=JobStatus.RUNNING.value, attempts=1)
+            self._jobs[job["id"]] = job
+            self._active[(job_type, job["user_id"])] = job["id"]
+            self._leases[job["id"]] = time.time() + settings.JOB_LEASE_SECONDS
+            return dict(job), True
+    
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+    
+    async def dequeue(self) -> Optional[dict]:
+        """Claim the next job whose run_at has passed, if any, under a JOB_LEASE_SECONDS lease"""
+        async with self._lock:
+            now = time.time()
+            
+            # Jobs whose worker stopped renewing the lease count as failed attempts
+            for job_id, expires_at in list(self._leases.items()):
+                if expires_at <= now:
+                    del self._leases[job_id]
+                    self._retry(self._jobs[job_id], "Lease expired")
+            
+            for job_id in self._scheduled:
+                job = self._jobs[job_id]
+                if job["run_at"] <= now:
+                    self._scheduled.remove(job_id)
+                    self._leases[job_id] = now + settings.JOB_LEASE_SECONDS
+                    job.update(
+                        status=JobStatus.RUNNING.value,
+                        attempts=job["attempts"] + 1,
+                        updated_at=now
+                    )
+                    return dict(job)
+            return None
+    
+    async def heartbeat(self, job_id: str) -> bool:
+        """Extend a running job's lease; False if the lease was already lost"""
+        async with self._lock:
+            if job_id not in self._leases:
+                return False
+            self._leases[job_id] = time.time() + settings.JOB_LEASE_SECONDS
+            return True
+    
+    async def complete(self, job_id: str, result: dict):
+        async with self._lock:
+            if self._leases.pop(job_id, None) is None:
+                return
+            job = self._jobs[job_id]
+            job.update(status=JobStatus.SUCCEEDED.value, result=result, error=None, updated_at=time.time())
+            self._active.pop((job["type"], job["user_id"]), None)
+    
+    async def fail(self, job_id: str, error: str):
+        """Reschedule with backoff, or mark failed once JOB_MAX_ATTEMPTS is reached"""
+        async with self._lock:
+            if self._leases.pop(job_id, None) is None:
+                return
+            self._retry(self._jobs[job_id], error)
+    
+    def _retry(self, job: dict, error: str):
+        now = time.time()
+        
+        if job["attempts"] < settings.JOB_MAX_ATTEMPTS:
+            job.update(
+                status=JobStatus.QUEUED.value,
+                error=error,
+                run_at=now + retry_delay(job["attempts"]),
+                updated_at=now
+            )
+            self._scheduled.append(job["id"])
+        else:
+            job.update(status=JobStatus.FAILED.value, error=error, updated_at=now)
+            self._active.pop((job["type"], job["user_id"]), None)
+
+
+class RedisJobQueue:
+    """
+    Redis-backed job queue shared by the API and any number of workers
+    
+    Keys:
+        job:<id>                     job record (JSON)
+        job:active:<type>:<user_id>  id of the user's queued or running job
+        jobs:scheduled               sorted set of job ids by run_at
+        jobs:running                 sorted set of claimed job ids by lease expiry
+    
+    A worker renews its lease with heartbeat() while the job runs. Jobs whose
+    lease expires (the worker crashed or hung) are retried like failures, and
+    the active marker expires with the lease, so a lost job can never block
+    the user's next sync for longer than that.
+    """
+    
+    SCHEDULED_KEY = "jobs:scheduled"
+    RUNNING_KEY = "jobs:running"
+    
+    # Marker check, record write and scheduling in one step, so two API
+    # processes can't both see no active job and create one each. Returns the
+    # active job's record if there is one, else the new one.
+    # KEYS: active marker, scheduled or running set
+    # ARGV: job id, record, score in the set, record TTL, marker TTL
+    ENQUEUE_SCRIPT = """
+        local active_id = redis.call('GET', KEYS[1])
+        if active_id then
+            local active = redis.call('GET', 'job:' .. active_id)
+            if active then
+                return active
+            end
+        end
+        redis.call('SET', 'job:' .. ARGV[1], ARGV[2], 'EX', ARGV[4])
+        redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[5])
+        redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+        return ARGV[2]
+    """
+    
+    # Move a job between sorted sets; only the caller whose ZREM succeeds owns it.
+    # KEYS: from set, to set; ARGV: job id, score in the new set
+    MOVE_SCRIPT = """
+        if redis.call('ZREM', KEYS[1], ARGV[1]) == 1 then
+            redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+            return 1
+        end
+        return 0
+    """
+    
+    def __init__(self, url: Optional[str] = None, client=None):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url or settings.REDIS_URL, decode_responses=True)
+        self.client = client
+        self._enqueue_script = client.register_script(self.ENQUEUE_SCRIPT)
+        self._move_script = client.register_script(self.MOVE_SCRIPT)
+    
+    def _active_key(self, job: dict) -> str:
+        return f"job:active:{job['type']}:{job['user_id']}"
+    
+    async def _save(self, job: dict):
+        await self.client.set(f"job:{job['id']}", json.dumps(job), ex=settings.JOB_RESULT_TTL_SECONDS)
+    
+    async def enqueue(self, job_type: str, user_id: str) -> dict:
+        """Queue a job, or return the user's already active job of this type"""
+        job = _new_job(job_type, user_id)
+        
+        stored = await self._enqueue_script(
+            keys=[self._active_key(job), self.SCHEDULED_KEY],
+            args=[
+                job["id"],
+                json.dumps(job),
+                job["run_at"],
+                settings.JOB_RESULT_TTL_SECONDS,
+                settings.JOB_RESULT_TTL_SECONDS
+            ]
+        )
+        return json.loads(stored)
+    
+    async def start(self, job_type: str, user_id: str) -> tuple[dict, bool]:
+        """
+        Claim a job to run in the caller's own process, under a lease
+        
+        Returns:
+            (job, started); when the user already has an active job of this
+            type, that job and False
+        """
+        job = _new_job(job_type, user_id)
+        job.update(status=JobStatus.RUNNING.value, attempts=1)
+        
+        stored = json.loads(await self._enqueue_script(
+            keys=[self._active_key(job), self.RUNNING_KEY],
+            args=[
+                job["id"],
+                json.dumps(job),
+                time.time() + settings.JOB_LEASE_SECONDS,
+                settings.JOB_RESULT_TTL_SECONDS,
+                2 * settings.JOB_LEASE_SECONDS
+            ]
+        ))
+        return stored, stored["id"] == job["id"]
+    
+    async def get(self, job_id: str) -> Optional[dict]:
+        data = await self.client.get(f"job:{job_id}")
+        return json.loads(data) if data else None
+    
+    async def dequeue(self) -> Optional[dict]:
+        """Claim the next job whose run_at has passed, if any, under a JOB_LEASE_SECONDS lease"""
+        now = time.time()
+        
+        # Jobs whose worker stopped renewing the lease count as failed attempts
+        for job_id in await self.client.zrangebyscore(self.RUNNING_KEY, 0, now, start=0, num=10):
+            if await self.client.zrem(self.RUNNING_KEY, job_id):
+                await self._retry(job_id, "Lease expired")
+        
+        due = await self.client.zrangebyscore(self.SCHEDULED_KEY, 0, now, start=0, num=10)
+        
+        for job_id in due:
+            lease_expires_at = time.time() + settings.JOB_LEASE_SECONDS
+            if not await self._move_script(keys=[self.SCHEDULED_KEY, self.RUNNING_KEY], args=[job_id, lease_expires_at]):
+                continue
+            
+            job = await self.get(job_id)
+            if not job:
+                await self.client.zrem(self.RUNNING_KEY, job_id)
+                continue
+            
+            job.update(
+                status=JobStatus.RUNNING.value,
+                attempts=job["attempts"] + 1,
+                updated_at=time.time()
+            )
+            await self._save(job)
+            await self.client.expire(self._active_key(job), 2 * settings.JOB_LEASE_SECONDS)
+            return job
+        
+        return None
+    
+    async def heartbeat(self, job_id: str) -> bool:
+        """Extend a running job's lease; False if the lease was already lost"""
+        lease_expires_at = time.time() + settings.JOB_LEASE_SECONDS
+        if not await self.client.zadd(self.RUNNING_KEY, {job_id: lease_expires_at}, xx=True, ch=True):
+            return False
+        
+        job = await self.get(job_id)
+        if job:
+            await self.client.expire(self._active_key(job), 2 * settings.JOB_LEASE_SECONDS)
+        return True
+    
+    async def complete(self, job_id: str, result: dict):
+        # A worker that lost its lease no longer owns the job
+        if not await self.client.zrem(self.RUNNING_KEY, job_id):
+            return
+        
+        job = await self.get(job_id)
+        if not job:
+            return
+        job.update(status=JobStatus.SUCCEEDED.value, result=result, error=None, updated_at=time.time())
+        await self._save(job)
+        await self.client.delete(self._active_key(job))
+    
+    async def fail(self, job_id: str, error: str):
+        """Reschedule with backoff, or mark failed once JOB_MAX_ATTEMPTS is reached"""
+        if not await self.client.zrem(self.RUNNING_KEY, job_id):
+            return
+        await self._retry(job_id, error)
+    
+    async def _retry(self, job_id: str, error: str):
+        job = await self.get(job_id)
+        if not job:
+            return
+        now = time.time()
+        
+        if job["attempts"] < settings.JOB_MAX_ATTEMPTS:
+            job.update(
+                status=JobStatus.QUEUED.value,
+                error=error,
+                run_at=now + retry_delay(job["attempts"]),
+                updated_at=now
+            )
+            await self._save(job)
+            await self.client.expire(self._active_key(job), settings.JOB_RESULT_TTL_SECONDS)
+            await self.client.zadd(self.SCHEDULED_KEY, {job_id: job["run_at"]})
+        else:
+            job.update(status=JobStatus.FAILED.value, error=error, updated_at=now)
+            await self._save(job)
+            await self.client.delete(self._active_key(job))
+
+
+_job_queue = None
+
+
+def get_job_queue():
+    """Process-wide job queue for JOB_QUEUE_BACKEND"""
+    global _job_queue
+    
+    if _job_queue is None:
+        if settings.JOB_QUEUE_BACKEND == "memory":
+            _job_queue = InMemoryJobQueue()
+        else:
+            _job_queue = RedisJobQueue()
+    
+    return _job_queue
@@ -1,7 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from app.config import settings
 from app.database import engine, Base
+from app.api.responses import FastJSONResponse
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 # Import API routers (will create these next)
 # from app.api import auth, emails, calendar, brief, activity, preferences
@@ -13,9 +20,18 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="AI Executive Assistant API",
     description="Production-grade AI-powered executive assistant for Gmail and Calendar management",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Response compression: brotli when the client accepts it and brotli-asgi is
+# installed (it falls back to gzip itself), else gzip. Server-sent event
+# streams are left uncompressed.
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=1000, excluded_handlers=[r"^/api/emails/sync/stream$"])
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +39,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Health check endpoint
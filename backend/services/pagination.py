@@ -0,0 +1,58 @@
+"""
+Keyset pagination with opaque cursors.
+
+A cursor encodes the (sort key, id) of the last row on a page; the next page
+continues strictly after it, so fetching page 1000 costs the same index range
+scan as page 1, unlike OFFSET.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import Select, tuple_
+
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    """Opaque cursor for the position just after a row"""
+    payload = json.dumps([sort_value.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decode a cursor from encode_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), UUID(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_page(query: Select, sort_column, id_column, cursor: Optional[str], limit: int) -> Select:
+    """
+    Limit a query to one page in descending (sort_column, id_column) order
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+    
+    return query.order_by(sort_column.desc(), id_column.desc()).limit(limit)
+
+
+def next_cursor(rows: list, limit: int, sort_attr: str) -> Optional[str]:
+    """Cursor for the page after rows, or None if rows was the last page"""
+    if not rows or len(rows) < limit:
+        return None
+    
+    last = rows[-1]
+    return encode_cursor(getattr(last, sort_attr), last.id)
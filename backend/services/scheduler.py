@@ -0,0 +1,270 @@
+"""
+Multi-attendee scheduling on availability bitmaps.
+
+The search horizon is cut into fixed quanta (CALENDAR_SLOT_GRANULARITY_MINUTES).
+Each attendee becomes one boolean NumPy row, True where they are free and
+inside their working hours, so a 4-week horizon at 15 minutes is 2,688
+booleans per person. Candidate slots for all attendees at once come from
+cumulative sums over the stacked rows.
+"""
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Preference, User
+from app.services.availability import Interval, parse_event_time
+from app.services.calendar_mirror import CalendarMirror
+from app.services.google_service_factory import get_calendar_service
+
+WORKING_HOURS_KEY = "working_hours"
+UTC = ZoneInfo("UTC")
+
+
+@dataclass(frozen=True)
+class WorkingHours:
+    """
+    When someone can be scheduled, from their "working_hours" Preference
+    
+    Preference value: {"start": 9, "end": 17, "days": [0, 1, 2, 3, 4], "time_zone": "Europe/Paris"},
+    every key optional; days are weekday numbers with Monday as 0.
+    """
+    start_hour: int = 9
+    end_hour: int = 17
+    days: tuple[int, ...] = (0, 1, 2, 3, 4)
+    time_zone: str = "UTC"
+    
+    @classmethod
+    def from_preference(cls, value: Optional[dict], default_time_zone: Optional[str] = None) -> "WorkingHours":
+        value = value or {}
+        return cls(
+            start_hour=int(value.get("start", cls.start_hour)),
+            end_hour=int(value.get("end", cls.end_hour)),
+            days=tuple(value.get("days", cls.days)),
+            time_zone=value.get("time_zone") or default_time_zone or cls.time_zone
+        )
+
+
+def busy_bitmaps(
+    busy: list[Iterable[Interval]],
+    horizon_start: datetime,
+    quanta: int,
+    quantum: timedelta
+) -> np.ndarray:
+    """
+    One row per person, True for every quantum that overlaps one of their intervals
+    
+    All rows are built in a single pass over everyone's intervals.
+    """
+    rows, bounds = [], []
+    for row, intervals in enumerate(busy):
+        for start, end in intervals:
+            rows.append(row)
+            bounds.append(((start - horizon_start).total_seconds(), (end - horizon_start).total_seconds()))
+    
+    bounds = np.array(bounds, dtype=np.float64).reshape(-1, 2) / quantum.total_seconds()
+    starts = np.clip(np.floor(bounds[:, 0]), 0, quanta).astype(np.int64)
+    ends = np.clip(np.ceil(bounds[:, 1]), 0, quanta).astype(np.int64)
+    
+    # +1 at each start, -1 at each end; a positive running sum means covered
+    width = quanta + 1
+    offsets = np.array(rows, dtype=np.int64) * width
+    size = len(busy) * width
+    edges = np.bincount(offsets + starts, minlength=size) - np.bincount(offsets + ends, minlength=size)
+    return np.cumsum(edges.reshape(len(busy), width)[:, :-1], axis=1) > 0
+
+
+def interval_bitmap(
+    intervals: Iterable[Interval],
+    horizon_start: datetime,
+    quanta: int,
+    quantum: timedelta
+) -> np.ndarray:
+    """True for every quantum that overlaps one of the intervals"""
+    return busy_bitmaps([intervals], horizon_start, quanta, quantum)[0]
+
+
+def working_bitmap(
+    hours: WorkingHours,
+    horizon_start: datetime,
+    quanta: int,
+    quantum: timedelta
+) -> np.ndarray:
+    """True for every quantum that lies fully inside working hours, in the hours' own time zone"""
+    zone = ZoneInfo(hours.time_zone)
+    horizon_end = horizon_start + quanta * quantum
+    windows = []
+    
+    day = horizon_start.astimezone(zone).date()
+    while day <= horizon_end.astimezone(zone).date():
+        if day.weekday() in hours.days:
+            windows.append((
+                datetime.combine(day, time(hours.start_hour), tzinfo=zone).astimezone(timezone.utc),
+                datetime.combine(day, time(hours.end_hour), tzinfo=zone).astimezone(timezone.utc)
+            ))
+        day += timedelta(days=1)
+    
+    # A quantum is working time unless any part of it falls outside a window
+    outside = [
+        (previous_end, next_start)
+        for (_, previous_end), (next_start, _) in zip(
+            [(None, horizon_start)] + windows,
+            windows + [(horizon_end, None)]
+        )
+        if next_start > previous_end
+    ]
+    return ~interval_bitmap(outside, horizon_start, quanta, quantum)
+
+
+def rank_slots(
+    required: np.ndarray,
+    optional: np.ndarray,
+    duration: int,
+    num_slots: int
+) -> list[tuple[int, int]]:
+    """
+    Pick the best non-overlapping slots
+    
+    Args:
+        required: (attendees, quanta) availability; every row must be free
+        optional: (attendees, quanta) availability; more free rows rank higher
+        duration: Slot length in quanta
+    
+    Returns:
+        [(start quantum, optional attendees free), ...], best first; ties go
+        to the earlier slot
+    """
+    def window_free(rows: np.ndarray) -> np.ndarray:
+        counts = np.zeros((rows.shape[0], rows.shape[1] + 1), dtype=np.int32)
+        np.cumsum(rows, axis=1, out=counts[:, 1:])
+        return counts[:, duration:] - counts[:, :-duration] == duration
+    
+    starts = required.shape[1] - duration + 1
+    if starts <= 0:
+        return []
+    
+    candidates = window_free(required).all(axis=0)
+    optional_free = window_free(optional).sum(axis=0) if len(optional) else np.zeros(starts, dtype=np.int64)
+    
+    # Higher optional count first, then earlier start; -1 marks unusable starts
+    keys = np.where(candidates, optional_free.astype(np.int64) * starts + (starts - 1 - np.arange(starts)), -1)
+    
+    slots = []
+    while len(slots) < num_slots:
+        best = int(np.argmax(keys))
+        if keys[best] < 0:
+            break
+        slots.append((best, int(optional_free[best])))
+        keys[max(0, best - duration + 1):best + duration] = -1
+    
+    return slots
+
+
+class MeetingScheduler:
+    """Find meeting times that work for the user and a list of attendees"""
+    
+    async def find_meeting_slots(
+        self,
+        db: AsyncSession,
+        user: User,
+        attendees: list[str],
+        optional_attendees: Iterable[str] = (),
+        duration_minutes: int = 60,
+        days_ahead: int = 28,
+        num_slots: int = 3
+    ) -> dict:
+        """
+        Rank slots where the user and every attendee are free and working
+        
+        The user's busy time comes from the local calendar mirror, everyone
+        else's from a single freebusy query. Attendees who are also users
+        are held to their own working hours; others only to their busy time.
+        
+        Returns:
+            {
+                "slots": [{"start": str, "end": str, "optional_available": [str]}, ...],
+                "unknown_availability": [emails whose calendars couldn't be read]
+            }
+        """
+        optional_attendees = [email for email in optional_attendees if email not in attendees]
+        others = [email for email in dict.fromkeys(attendees + optional_attendees) if email != user.email]
+        
+        quantum = timedelta(minutes=settings.CALENDAR_SLOT_GRANULARITY_MINUTES)
+        now = datetime.now(timezone.utc)
+        horizon_start = datetime.fromtimestamp(
+            -(-now.timestamp() // quantum.total_seconds()) * quantum.total_seconds(),
+            tz=timezone.utc
+        )
+        quanta = int(timedelta(days=days_ahead) / quantum)
+        horizon_end = horizon_start + quanta * quantum
+        
+        # Busy time: the user from the mirror, everyone else in one freebusy query
+        busy = {
+            user.email: await CalendarMirror().busy_intervals(db, user.id, horizon_start, horizon_end)
+        }
+        unknown = []
+        if others:
+            freebusy = await get_calendar_service(user).query_freebusy(others, horizon_start, horizon_end)
+            for email in others:
+                if freebusy.get(email) is None:
+                    unknown.append(email)
+                    continue
+                busy[email] = [
+                    (
+                        parse_event_time({'dateTime': period['start']}, UTC),
+                        parse_event_time({'dateTime': period['end']}, UTC)
+                    )
+                    for period in freebusy[email]
+                ]
+        
+        working_hours = await self._working_hours(db, user, others)
+        
+        required_emails = [user.email] + [email for email in others if email in attendees and email in busy]
+        optional_emails = [email for email in optional_attendees if email in busy and email != user.email]
+        
+        # One availability row per person; working-hours masks are shared between equal settings
+        emails = required_emails + optional_emails
+        rows = ~busy_bitmaps([busy[email] for email in emails], horizon_start, quanta, quantum)
+        masks = {}
+        for row, email in zip(rows, emails):
+            hours = working_hours.get(email)
+            if hours:
+                if hours not in masks:
+                    masks[hours] = working_bitmap(hours, horizon_start, quanta, quantum)
+                row &= masks[hours]
+        required, optional = rows[:len(required_emails)], rows[len(required_emails):]
+        
+        duration = max(1, -(-duration_minutes // settings.CALENDAR_SLOT_GRANULARITY_MINUTES))
+        slots = []
+        for start, _ in rank_slots(required, optional, duration, num_slots):
+            slot_start = horizon_start + start * quantum
+            slots.append({
+                "start": slot_start.isoformat(),
+                "end": (slot_start + timedelta(minutes=duration_minutes)).isoformat(),
+                "optional_available": [
+                    email for email, row in zip(optional_emails, optional)
+                    if row[start:start + duration].all()
+                ]
+            })
+        
+        return {"slots": slots, "unknown_availability": unknown}
+    
+    async def _working_hours(self, db: AsyncSession, user: User, emails: list[str]) -> dict[str, WorkingHours]:
+        """Working hours for the user and any attendees who are also users, by email"""
+        result = await db.execute(
+            select(User.email, User.calendar_time_zone, Preference.value)
+            .outerjoin(
+                Preference,
+                (Preference.user_id == User.id) & (Preference.key == WORKING_HOURS_KEY)
+            )
+            .where(User.email.in_([user.email] + emails))
+        )
+        return {
+            row.email: WorkingHours.from_preference(row.value, row.calendar_time_zone)
+            for row in result
+        }
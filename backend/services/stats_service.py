@@ -0,0 +1,102 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from app.models import DailyUserStats
+
+STAT_FIELDS = (
+    "emails_received",
+    "emails_processed",
+    "emails_archived",
+    "emails_replied",
+    "llm_calls_saved",
+)
+
+
+class StatsService:
+    """Maintains and reads the daily_user_stats rollups"""
+    
+    async def record(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        increments: dict[date, Counter]
+    ):
+        """
+        Add to a user's daily counters
+        
+        Does not commit, so the counters move in the same transaction as the
+        emails they count.
+        
+        Args:
+            user_id: User ID
+            increments: Per day, a Counter of STAT_FIELDS to add
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "day": day,
+                "updated_at": now,
+                **{field: counts.get(field, 0) for field in STAT_FIELDS}
+            }
+            for day, counts in increments.items()
+            if any(counts.values())
+        ]
+        if not rows:
+            return
+        
+        statement = insert(DailyUserStats).values(rows)
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "day"],
+                set_={
+                    "updated_at": statement.excluded.updated_at,
+                    **{
+                        field: getattr(DailyUserStats, field) + getattr(statement.excluded, field)
+                        for field in STAT_FIELDS
+                    }
+                }
+            )
+        )
+    
+    async def record_today(self, db: AsyncSession, user_id: str, **counts: int):
+        """Add to today's counters, e.g. record_today(db, user_id, emails_archived=1)"""
+        await self.record(db, user_id, {datetime.utcnow().date(): Counter(counts)})
+    
+    async def history(self, db: AsyncSession, user_id: str, days: int) -> dict:
+        """
+        Daily counters for the last `days` days, oldest first
+        
+        Returns:
+            {
+                "days": [{"date": str, "emails_received": int, ...}, ...],
+                "totals": {"emails_received": int, ...}
+            }
+        """
+        today = datetime.utcnow().date()
+        start = today - timedelta(days=days - 1)
+        
+        result = await db.execute(
+            select(DailyUserStats).where(
+                DailyUserStats.user_id == user_id,
+                DailyUserStats.day >= start
+            )
+        )
+        stored = {stats.day: stats for stats in result.scalars()}
+        
+        history = []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            stats = stored.get(day)
+            history.append({
+                "date": day.isoformat(),
+                **{field: getattr(stats, field) if stats else 0 for field in STAT_FIELDS}
+            })
+        
+        return {
+            "days": history,
+            "totals": {field: sum(entry[field] for entry in history) for field in STAT_FIELDS}
+        }
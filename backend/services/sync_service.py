@@ -0,0 +1,276 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import Counter, defaultdict
+from dataclasses import asdict
+from datetime import datetime
+import uuid
+
+from app.config import settings
+from app.models import User, Email, EmailBody, EmailStatus
+from app.services.google_service_factory import get_gmail_service
+from app.services.activity_service import ActivityService
+from app.services.brief_service import BriefService
+from app.services.stats_service import StatsService
+from app.services.decision_engine import DecisionEngine
+from app.services.job_queue import CALENDAR_SYNC_JOB, get_job_queue
+from app.ai.pipeline import EmailPipeline
+from app.ai.normalizer import count_tokens, normalize_body
+
+
+class EmailSyncService:
+    """Fetch new Gmail messages for a user, run them through the AI pipeline and store them"""
+    
+    async def sync(self, user: User, db: AsyncSession) -> dict:
+        """
+        Run one sync for a user
+        
+        Returns:
+            {
+                "status": "success",
+                "processed": int,
+                "remaining": int,
+                "llm_calls_saved": int,
+                "emails": [{"gmail_id": str, "id": str}, ...],
+                "skipped": [gmail_id, ...],
+                "fetch": {"round_trips": int, "bytes_received": int, "parse_ms": float},
+                "message": str
+            }
+        """
+        summary = None
+        async for event in self.stream(user, db):
+            if event["event"] == "complete":
+                summary = event["data"]
+        return summary
+    
+    async def stream(self, user: User, db: AsyncSession):
+        """
+        Run one sync for a user, yielding progress events
+        
+        Yields an "email" event as soon as each email has been classified,
+        scored, summarized and routed, then a single "complete" event with
+        the sync summary once the batch is committed. Email events are keyed
+        by gmail_id; database ids only appear in "complete", for the emails
+        that were actually stored, and "skipped" lists those a concurrent
+        sync stored first.
+        """
+        # Initialize services
+        gmail_service = get_gmail_service(user)
+        pipeline = EmailPipeline(user_id=user.id)
+        decision_engine = DecisionEngine()
+        activity_service = ActivityService()
+        brief_service = BriefService()
+        stats_service = StatsService()
+        
+        # List unread emails added since the last sync, minus those already stored
+        message_ids, latest_history_id = await gmail_service.list_new_message_ids(
+            user.gmail_history_id,
+            max_results=settings.GMAIL_SYNC_MAX_EMAILS
+        )
+        existing_ids = set((await db.execute(
+            select(Email.gmail_id).where(Email.gmail_id.in_(message_ids))
+        )).scalars().all()) if message_ids else set()
+        pending_ids = [message_id for message_id in message_ids if message_id not in existing_ids]
+        
+        # Phase one: metadata (headers, labels, snippet), capped per sync so a
+        # long gap doesn't send hundreds of emails to the LLM in one request
+        batch_ids = pending_ids[:settings.GMAIL_SYNC_MAX_EMAILS]
+        raw_emails, failed_ids = await gmail_service.fetch_messages(batch_ids, format='metadata')
+        
+        # Phase two: full bodies only for emails the rules can't triage. The
+        # rest keep their snippet as body until someone opens them (see
+        # load_body). An email whose body can't be fetched waits for the next
+        # sync rather than going to the LLM with its snippet.
+        llm_emails = [raw_email for raw_email in raw_emails if pipeline.needs_llm(raw_email)]
+        body_failed_ids = set(await gmail_service.fetch_bodies(llm_emails))
+        if body_failed_ids:
+            print(f"Deferring {len(body_failed_ids)} emails whose body fetch failed")
+            raw_emails = [raw_email for raw_email in raw_emails if raw_email['gmail_id'] not in body_failed_ids]
+        fetched_ids = {raw_email['gmail_id'] for raw_email in llm_emails} - body_failed_ids
+        
+        # Only move the stored history_id forward once every listed email is
+        # stored; until then the next sync lists them again and the lookup
+        # above skips the ones already done
+        complete = len(pending_ids) == len(batch_ids) and not failed_ids and not body_failed_ids
+        history_id = latest_history_id if complete else user.gmail_history_id
+        
+        # Normalize bodies once at ingest; the AI stages only see normalized text
+        for raw_email in raw_emails:
+            if raw_email['gmail_id'] in fetched_ids:
+                raw_email['normalized_body'] = normalize_body(raw_email['body'])
+                raw_email['body_tokens'] = count_tokens(raw_email['normalized_body'])
+            else:
+                raw_email.update(body=raw_email['snippet'], normalized_body=None, body_tokens=None)
+        
+        email_rows = []
+        body_rows = {}
+        emails = {}
+        decisions = {}
+        
+        # AI Processing: classify, score and summarize concurrently
+        async for raw_email, result in pipeline.process_as_completed(raw_emails):
+            email_row = {
+                'id': uuid.uuid4(),
+                'user_id': user.id,
+                'gmail_id': raw_email['gmail_id'],
+                'thread_id': raw_email['thread_id'],
+                'subject': raw_email['subject'],
+                'from_email': raw_email['from_email'],
+                'from_name': raw_email['from_name'],
+                'body_fetched': raw_email['gmail_id'] in fetched_ids,
+                'body_tokens': raw_email['body_tokens'],
+                'received_at': raw_email['received_at'],
+                'classification': result['classification'],
+                'priority_score': result['priority_score'],
+                'priority_factors': result['factors'],
+                'summary': result['summary'],
+                'next_action': result['next_action'],
+                'label_source': result['label_source'],
+                'processed_at': datetime.utcnow(),
+                'status': EmailStatus.PROCESSED
+            }
+            email_rows.append(email_row)
+            body_rows[email_row['id']] = EmailBody.row(
+                email_row['id'],
+                raw_email['body'],
+                raw_email['normalized_body']
+            )
+            
+            # Decide action on a transient instance; nothing is added to the session
+            email = emails[email_row['id']] = Email(**email_row)
+            decision = decision_engine.decide_action(email, user, db)
+            decisions[email_row['id']] = decision
+            
+            yield {
+                "event": "email",
+                "data": {
+                    "gmail_id": email_row['gmail_id'],
+                    "subject": email_row['subject'],
+                    "from_email": email_row['from_email'],
+                    "from_name": email_row['from_name'],
+                    "classification": email_row['classification'].value,
+                    "priority_score": email_row['priority_score'],
+                    "summary": email_row['summary'],
+                    "next_action": email_row['next_action'],
+                    "received_at": email_row['received_at'].isoformat(),
+                    "decision": decision
+                }
+            }
+        
+        # Insert new emails in bulk. A concurrent sync may have inserted some of
+        # them already, so conflicts on gmail_id are skipped rather than raised
+        inserted_ids = set()
+        if email_rows:
+            inserted_ids = set((await db.execute(
+                insert(Email)
+                .values(email_rows)
+                .on_conflict_do_nothing(index_elements=['gmail_id'])
+                .returning(Email.id)
+            )).scalars().all())
+        
+        # Compressed bodies go to their own table, only for emails actually inserted
+        if inserted_ids:
+            await db.execute(
+                insert(EmailBody),
+                [body_rows[email_id] for email_id in inserted_ids]
+            )
+        
+        # Log activity for the emails this sync actually inserted
+        await activity_service.log_actions(
+            db=db,
+            user_id=user.id,
+            actions=[
+                {
+                    "action_type": "email_processed",
+                    "description": f"Processed email: {email_row['subject']}",
+                    "metadata": {
+                        "email_id": str(email_row['id']),
+                        "classification": email_row['classification'].value,
+                        "priority": email_row['priority_score'],
+                        "decision": decisions[email_row['id']]['action']
+                    }
+                }
+                for email_row in email_rows
+                if email_row['id'] in inserted_ids
+            ]
+        )
+        processed_count = len(inserted_ids)
+        
+        # Daily rollups: received by received date, the rest as of today
+        increments = defaultdict(Counter)
+        for email_id in inserted_ids:
+            increments[emails[email_id].received_at.date()]["emails_received"] += 1
+        today = increments[datetime.utcnow().date()]
+        today["emails_processed"] += processed_count
+        today["llm_calls_saved"] += pipeline.llm_calls_saved
+        await stats_service.record(db, user.id, increments)
+        
+        # Bring Today's Brief up to date in the same transaction
+        if inserted_ids:
+            await brief_service.apply_emails(
+                db,
+                user.id,
+                [emails[email_id] for email_id in inserted_ids]
+            )
+        
+        # Update last sync and commit the whole batch at once
+        user.last_sync = datetime.utcnow()
+        user.gmail_history_id = history_id
+        await db.commit()
+        
+        # Keep the calendar mirror behind the brief and availability as fresh
+        # as the inbox; the queue drops this if a calendar sync is already active
+        await get_job_queue().enqueue(CALENDAR_SYNC_JOB, user.id)
+        
+        yield {
+            "event": "complete",
+            "data": {
+                "status": "success",
+                "processed": processed_count,
+                "remaining": len(pending_ids) - len(email_rows),
+                "llm_calls_saved": pipeline.llm_calls_saved,
+                "emails": [
+                    {"gmail_id": email_row['gmail_id'], "id": str(email_row['id'])}
+                    for email_row in email_rows
+                    if email_row['id'] in inserted_ids
+                ],
+                "skipped": [
+                    email_row['gmail_id']
+                    for email_row in email_rows
+                    if email_row['id'] not in inserted_ids
+                ],
+                "fetch": asdict(gmail_service.metrics),
+                "message": f"Processed {processed_count} new emails"
+            }
+        }
+    
+    async def load_body(self, email: Email, user: User, db: AsyncSession) -> bool:
+        """
+        Fetch and store the full body of an email stored with only its snippet
+        
+        Rule-triaged emails skip the body fetch at sync time; this runs the
+        second phase when the email is actually opened. email.content must
+        be loaded, e.g. with selectinload(Email.content).
+        
+        Returns:
+            True if the email now has its full body
+        """
+        if email.body_fetched:
+            return True
+        
+        full_emails, _ = await get_gmail_service(user).fetch_messages([email.gmail_id])
+        if not full_emails:
+            return False
+        
+        body = full_emails[0]['body'] or email.body
+        normalized_body = normalize_body(body)
+        row = EmailBody.row(email.id, body, normalized_body)
+        if email.content is None:
+            email.content = EmailBody(**row)
+        else:
+            for column, value in row.items():
+                setattr(email.content, column, value)
+        email.body_tokens = count_tokens(normalized_body)
+        email.body_fetched = True
+        await db.commit()
+        return True
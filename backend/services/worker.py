@@ -0,0 +1,65 @@
+"""
+Background worker that runs queued email and calendar sync jobs.
+
+Usage:
+    python -m app.services.worker [--concurrency 4]
+"""
+import argparse
+import asyncio
+from uuid import UUID
+
+from app.database import AsyncSessionLocal
+from app.models import User
+from app.services.calendar_mirror import CalendarMirror
+from app.services.job_queue import CALENDAR_SYNC_JOB, SYNC_JOB, get_job_queue, keep_lease
+from app.services.sync_service import EmailSyncService
+
+JOB_HANDLERS = {
+    SYNC_JOB: lambda user, db: EmailSyncService().sync(user, db),
+    CALENDAR_SYNC_JOB: lambda user, db: CalendarMirror().sync(user, db),
+}
+
+
+async def run_job(job: dict) -> dict:
+    """Run a single job on its own database session"""
+    handler = JOB_HANDLERS.get(job["type"])
+    if not handler:
+        raise ValueError(f"Unknown job type: {job['type']}")
+    
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, UUID(job["user_id"]))
+        if not user:
+            raise ValueError(f"User not found: {job['user_id']}")
+        return await handler(user, db)
+
+
+async def work(poll_interval: float = 1.0):
+    """Claim and run jobs until cancelled"""
+    queue = get_job_queue()
+    
+    while True:
+        job = await queue.dequeue()
+        if not job:
+            await asyncio.sleep(poll_interval)
+            continue
+        
+        lease = asyncio.create_task(keep_lease(queue, job["id"]))
+        try:
+            result = await run_job(job)
+            await queue.complete(job["id"], result)
+        except Exception as e:
+            print(f"Job {job['id']} failed (attempt {job['attempts']}): {e}")
+            await queue.fail(job["id"], str(e))
+        finally:
+            lease.cancel()
+
+
+async def main(concurrency: int):
+    await asyncio.gather(*(work() for _ in range(concurrency)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Email sync worker")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jobs run at once by this process")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency))
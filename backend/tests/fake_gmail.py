@@ -0,0 +1,212 @@
+"""
+Local stand-in for the Gmail REST API.
+
+Serves messages.list, messages.get (full and metadata), history.list,
+users.getProfile and multipart/mixed batch requests from an in-memory
+mailbox over real HTTP, sleeping for a fixed latency on every round trip so
+batching shows up in wall-clock time.
+"""
+import base64
+import json
+import re
+import threading
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+from app.models import User
+from app.services.gmail_service import GmailService
+from app.services.google_client import GoogleAPIClient
+
+MESSAGE_PATH = re.compile(r"^/gmail/v1/users/me/messages/([^/]+)$")
+
+
+def encode(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+def make_message(index: int, body: str = None, labels: tuple = ()) -> dict:
+    """A Gmail API message resource with plain text and HTML alternatives"""
+    received = datetime(2024, 6, 3, 9, tzinfo=timezone.utc) + timedelta(minutes=index)
+    body = body or f"Hi,\n\nPlease look at item {index} before Friday.\n\nThanks,\nSam"
+    return {
+        "id": f"msg{index:05d}",
+        "threadId": f"thread{index // 3:05d}",
+        "historyId": str(100 + index),
+        "labelIds": ["INBOX", "UNREAD", *labels],
+        "snippet": body[:100],
+        "internalDate": str(int(received.timestamp() * 1000)),
+        "payload": {
+            "mimeType": "multipart/alternative",
+            "headers": [
+                {"name": "From", "value": f"Sam Sender <sam{index % 7}@example.com>"},
+                {"name": "To", "value": "me@example.com"},
+                {"name": "Subject", "value": f"Item {index}"},
+                {"name": "Date", "value": format_datetime(received)},
+            ],
+            "parts": [
+                {"mimeType": "text/plain", "body": {"size": len(body), "data": encode(body)}},
+                {"mimeType": "text/html", "body": {"size": len(body), "data": encode(f"<p>{body}</p>")}},
+            ]
+        }
+    }
+
+
+class FakeGmail:
+    """
+    Threaded HTTP server holding one mailbox
+    
+    errors maps message ids to the HTTP status their messages.get returns;
+    history.list answers 404 for a startHistoryId older than
+    oldest_history_id, as Gmail does once history expires; requests counts
+    HTTP round trips (a batch counts once).
+    """
+    
+    def __init__(self, messages: list[dict], latency: float = 0.0, history_id: str = "1000"):
+        self.messages = {message["id"]: message for message in messages}
+        self.latency = latency
+        self.history_id = history_id
+        self.errors: dict[str, int] = {}
+        self.oldest_history_id = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+    
+    def __enter__(self) -> "FakeGmail":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def gmail_service(self) -> GmailService:
+        """A GmailService whose API calls go to this server"""
+        user = User(email="me@example.com", access_token="token", refresh_token="refresh")
+        # Own HTTP client: each test drives the service from a fresh event loop
+        client = GoogleAPIClient(user, base_url=self.url, http_client=httpx.AsyncClient())
+        return GmailService(user, client=client)
+    
+    def respond(self, method: str, target: str) -> tuple[int, dict]:
+        """Status and JSON body for one API request"""
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        
+        if method == "GET" and url.path == "/gmail/v1/users/me/messages":
+            unread = [
+                {"id": message["id"], "threadId": message["threadId"]}
+                for message in sorted(self.messages.values(), key=lambda m: -int(m["internalDate"]))
+                if "UNREAD" in message["labelIds"]
+            ]
+            return 200, {"messages": unread[:int(query.get("maxResults", ["100"])[0])]}
+        
+        if method == "GET" and url.path == "/gmail/v1/users/me/history":
+            start = int(query["startHistoryId"][0])
+            if start < self.oldest_history_id:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            added = sorted(
+                (m for m in self.messages.values() if int(m["historyId"]) > start),
+                key=lambda m: int(m["historyId"])
+            )
+            return 200, {
+                "history": [
+                    {
+                        "id": message["historyId"],
+                        "messagesAdded": [{"message": {
+                            "id": message["id"],
+                            "threadId": message["threadId"],
+                            "labelIds": message["labelIds"]
+                        }}]
+                    }
+                    for message in added
+                ],
+                "historyId": self.history_id
+            }
+        
+        if method == "GET" and url.path == "/gmail/v1/users/me/profile":
+            return 200, {"emailAddress": "me@example.com", "historyId": self.history_id}
+        
+        match = MESSAGE_PATH.match(url.path)
+        if method == "GET" and match:
+            message_id = match.group(1)
+            if message_id in self.errors:
+                return self.errors[message_id], {"error": {"code": self.errors[message_id]}}
+            if message_id not in self.messages:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            message = self.messages[message_id]
+            if query.get("format") == ["metadata"]:
+                # Only the requested headers, no body parts
+                wanted = {name.lower() for name in query.get("metadataHeaders", [])}
+                payload = {
+                    "mimeType": message["payload"]["mimeType"],
+                    "headers": [h for h in message["payload"]["headers"] if h["name"].lower() in wanted]
+                }
+                return 200, {**{key: message[key] for key in message if key != "historyId"}, "payload": payload}
+            return 200, message
+        
+        return 404, {"error": {"code": 404, "message": f"No route for {method} {url.path}"}}
+    
+    def respond_batch(self, content_type: str, body: str) -> str:
+        """multipart/mixed response for a multipart/mixed batch request"""
+        boundary = content_type.split("boundary=", 1)[1].strip('"')
+        parts = []
+        for part in body.split(f"--{boundary}"):
+            if not part.strip() or part.strip() == "--":
+                continue
+            part_headers, request = re.split(r"\r?\n\r?\n", part.strip("\r\n"), maxsplit=1)
+            content_id = re.search(r"Content-ID:\s*<([^>]*)>", part_headers, re.IGNORECASE).group(1)
+            method, target = request.split("\n", 1)[0].strip().split(" ")[:2]
+            status, payload = self.respond(method, target)
+            parts.append(
+                f"--batch_response\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(payload)}\r\n"
+            )
+        return "".join(parts) + "--batch_response--\r\n"
+    
+    def _handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+            
+            def _send(self, status: int, content_type: str, body: str):
+                data = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def _count(self):
+                with fake._lock:
+                    fake.requests += 1
+                time.sleep(fake.latency)
+            
+            def do_GET(self):
+                self._count()
+                status, payload = fake.respond("GET", self.path)
+                self._send(status, "application/json; charset=UTF-8", json.dumps(payload))
+            
+            def do_POST(self):
+                self._count()
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                if urlsplit(self.path).path.startswith("/batch"):
+                    self._send(
+                        200,
+                        "multipart/mixed; boundary=batch_response",
+                        fake.respond_batch(self.headers["Content-Type"], body)
+                    )
+                else:
+                    self._send(404, "application/json", json.dumps({"error": {"code": 404}}))
+        
+        return Handler
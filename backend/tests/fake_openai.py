@@ -0,0 +1,45 @@
+"""
+Local stand-in for the AsyncOpenAI client.
+
+Answers every chat completion with a canned JSON reply after a fixed
+latency and records each request, so tests can count calls and prompt
+tokens without the network.
+"""
+import asyncio
+import re
+from types import SimpleNamespace
+
+# Rough token count: words and punctuation, close enough to compare prompts
+TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+class FakeOpenAI:
+    """
+    Drop-in for AsyncOpenAI(...) where only chat.completions.create is used
+    
+    reply is the message content returned for every request, or a function
+    of the request parameters; finish_reason is reported with it.
+    """
+    
+    def __init__(self, reply, latency: float = 0.0):
+        self.reply = reply
+        self.latency = latency
+        self.finish_reason = "stop"
+        self.requests: list[dict] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+    
+    async def create(self, **params):
+        self.requests.append(params)
+        await asyncio.sleep(self.latency)
+        content = self.reply(params) if callable(self.reply) else self.reply
+        return SimpleNamespace(choices=[
+            SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=self.finish_reason)
+        ])
+    
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(
+            len(TOKEN.findall(message["content"]))
+            for request in self.requests
+            for message in request["messages"]
+        )
@@ -0,0 +1,84 @@
+"""
+Throwaway Postgres schemas for tests that need a real database.
+
+Set TEST_DATABASE_URL to a Postgres URL, e.g.
+postgresql://postgres@/postgres?host=/tmp/pgdata, to run them; they are
+skipped otherwise. Sessions use the asyncpg driver like the API handlers.
+Each test gets its own schema holding the app's tables, dropped again
+afterwards; raw_connection, run_script and run_migration send raw SQL to
+that schema.
+"""
+import os
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.database import Base
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+requires_database = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+class QueryCounter:
+    """Counts statements sent to the database while attached to an engine"""
+    
+    def __init__(self):
+        self.count = 0
+    
+    def __call__(self, *args):
+        self.count += 1
+
+
+@asynccontextmanager
+async def scratch_session() -> AsyncIterator[tuple[AsyncSession, QueryCounter]]:
+    """A session on a fresh schema with the app's tables, plus its query counter"""
+    engine = create_async_engine(TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1))
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    async with engine.begin() as connection:
+        await connection.execute(text(f'CREATE SCHEMA "{schema}"'))
+    
+    schema_engine = engine.execution_options(schema_translate_map={None: schema})
+    async with schema_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    session = AsyncSession(schema_engine, expire_on_commit=False)
+    try:
+        yield session, counter
+    finally:
+        await session.close()
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+        async with engine.begin() as connection:
+            await connection.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        await engine.dispose()
+
+
+@asynccontextmanager
+async def raw_connection(db: AsyncSession):
+    """The asyncpg connection behind a fresh connection to the session's schema"""
+    schema = db.bind.get_execution_options()["schema_translate_map"][None]
+    async with db.bind.connect() as connection:
+        raw = (await connection.get_raw_connection()).driver_connection
+        await raw.execute(f'SET search_path TO "{schema}"')
+        try:
+            yield raw
+        finally:
+            await raw.execute("RESET search_path")
+
+
+async def run_script(db: AsyncSession, script: str):
+    """Run one or more SQL statements against the session's schema on their own connection"""
+    async with raw_connection(db) as raw:
+        await raw.execute(script)
+
+async def run_migration(db: AsyncSession, name: str):
+    """Run migrations/<name> against the session's schema, as psql -f would"""
+    await run_script(db, (Path(__file__).resolve().parent.parent / "migrations" / name).read_text())
@@ -0,0 +1,141 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.services.availability import busy_intervals, free_slots, merge_intervals, parse_event_time
+
+UTC = ZoneInfo("UTC")
+
+# Monday
+DAY = datetime(2024, 6, 3, tzinfo=timezone.utc)
+
+
+def at(hour: float, day: int = 0) -> datetime:
+    return DAY + timedelta(days=day, hours=hour)
+
+
+def slots(busy, start, end, duration=60, granularity=30, limit=None, zone=UTC):
+    return free_slots(
+        merge_intervals(busy), start, end,
+        duration=timedelta(minutes=duration),
+        granularity=timedelta(minutes=granularity),
+        working_hours=(9, 17),
+        zone=zone,
+        limit=limit
+    )
+
+
+def test_merge_intervals():
+    assert merge_intervals([(at(13), at(14)), (at(9), at(10)), (at(10), at(11)), (at(9.5), at(9.75))]) == [
+        (at(9), at(11)),
+        (at(13), at(14)),
+    ]
+
+
+def test_slots_fill_gaps_between_busy_intervals():
+    busy = [(at(9), at(10.25)), (at(11.5), at(16))]
+    
+    assert slots(busy, at(0), at(24)) == [(at(10.5), at(11.5)), (at(16), at(17))]
+
+
+def test_slots_align_to_the_working_day_grid():
+    # The window opens mid-slot; the first slot starts on the next 30-minute mark
+    assert slots([], at(9.1), at(12), limit=2) == [(at(9.5), at(10.5)), (at(10.5), at(11.5))]
+
+
+def test_weekends_are_skipped_and_limit_applies():
+    # Friday 16:00 to Monday 11:00
+    result = slots([], at(16, day=-3), at(11), duration=60, granularity=60)
+    
+    assert result == [(at(16, day=-3), at(17, day=-3)), (at(9), at(10)), (at(10), at(11))]
+    assert slots([], at(0), at(24), limit=3) == [(at(9), at(10)), (at(10), at(11)), (at(11), at(12))]
+
+
+def test_working_hours_are_in_the_given_zone():
+    zone = ZoneInfo("America/New_York")
+    
+    # 09:00 in New York on a summer Monday is 13:00 UTC
+    assert slots([], at(0), at(24), limit=1, zone=zone) == [(at(13), at(14))]
+
+
+def test_busy_intervals_skip_free_declined_and_cancelled_events():
+    zone = ZoneInfo("Europe/Paris")
+    events = [
+        {"start": {"dateTime": "2024-06-03T10:00:00+02:00"}, "end": {"dateTime": "2024-06-03T11:00:00+02:00"}},
+        {"start": {"dateTime": "2024-06-03T10:30:00"}, "end": {"dateTime": "2024-06-03T12:00:00"}},
+        {"start": {"date": "2024-06-04"}, "end": {"date": "2024-06-05"}, "transparency": "transparent"},
+        {"status": "cancelled", "start": {"dateTime": "2024-06-03T14:00:00Z"}, "end": {"dateTime": "2024-06-03T15:00:00Z"}},
+        {
+            "start": {"dateTime": "2024-06-03T16:00:00Z"},
+            "end": {"dateTime": "2024-06-03T17:00:00Z"},
+            "attendees": [{"self": True, "responseStatus": "declined"}]
+        },
+        {"start": {"dateTime": "not a time"}, "end": {"dateTime": "2024-06-03T17:00:00Z"}},
+    ]
+    
+    assert busy_intervals(events, zone) == [(at(8), at(10))]
+
+
+def test_all_day_events_start_at_local_midnight():
+    assert parse_event_time({"date": "2024-06-03"}, ZoneInfo("Asia/Tokyo")) == at(-9)
+
+
+def hourly_scan(events: list[dict], window_start: datetime, days: int) -> list[tuple[datetime, datetime]]:
+    """Free hourly slots as find_available_slots computed them before, re-parsing every event per candidate"""
+    def overlaps(start: datetime, end: datetime, event: dict) -> bool:
+        event_start = datetime.fromisoformat(event['start']['dateTime'].replace('Z', '+00:00'))
+        event_end = datetime.fromisoformat(event['end']['dateTime'].replace('Z', '+00:00'))
+        return start < event_end and end > event_start
+    
+    found = []
+    for day in range(days):
+        check_date = window_start + timedelta(days=day)
+        if check_date.weekday() >= 5:
+            continue
+        for hour in range(9, 17):
+            slot_start = check_date.replace(hour=hour, minute=0, second=0, microsecond=0)
+            slot_end = slot_start + timedelta(hours=1)
+            if slot_start >= window_start and not any(overlaps(slot_start, slot_end, event) for event in events):
+                found.append((slot_start, slot_end))
+    return found
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("count", [1000, 5000])
+def test_benchmark_thousands_of_events(count):
+    # About fourteen events a day, so the calendar keeps some free time
+    days = count // 14
+    rng = random.Random(count)
+    events = []
+    for _ in range(count):
+        start = DAY + timedelta(minutes=15 * rng.randrange(days * 24 * 4))
+        end = start + timedelta(minutes=rng.choice((15, 30, 45, 60, 90)))
+        events.append({
+            "start": {"dateTime": start.isoformat().replace("+00:00", "Z")},
+            "end": {"dateTime": end.isoformat().replace("+00:00", "Z")},
+        })
+    
+    started = time.perf_counter()
+    before = hourly_scan(events, DAY, days)
+    scan_ms = (time.perf_counter() - started) * 1000
+    
+    started = time.perf_counter()
+    busy = busy_intervals(events, UTC)
+    hourly = free_slots(
+        busy, DAY, DAY + timedelta(days=days), duration=timedelta(hours=1), granularity=timedelta(hours=1),
+        working_hours=(9, 17), zone=UTC
+    )
+    sweep_ms = (time.perf_counter() - started) * 1000
+    quarter_hourly = slots(busy, DAY, DAY + timedelta(days=days), granularity=15)
+    
+    print(
+        f"\n{count} events over {days} days: hourly scan {scan_ms:.0f} ms, interval sweep {sweep_ms:.1f} ms "
+        f"({len(hourly)} hourly slots; {len(quarter_hourly)} on a 15-minute grid)"
+    )
+    # On an hourly grid both find the same slots
+    assert hourly == before
+    assert len(quarter_hourly) >= len(hourly)
+    assert sweep_ms < scan_ms
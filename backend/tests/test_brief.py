@@ -0,0 +1,118 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from starlette.requests import Request
+
+from app.api.brief import get_todays_brief
+from app.models import BriefProjection, CalendarEvent, Email, EmailClassification, EmailStatus
+from app.services.brief_service import UPCOMING_WINDOW, BriefService
+from scratch_db import requires_database, scratch_session
+from test_email_sync import make_user
+
+pytestmark = requires_database
+
+
+def make_email(user, index: int, **fields) -> Email:
+    return Email(**{
+        "user_id": user.id, "gmail_id": f"msg{index:05d}", "thread_id": f"thread{index:05d}",
+        "subject": f"Item {index}", "from_email": "sam@example.com",
+        "received_at": datetime(2024, 6, 3), "classification": EmailClassification.URGENT,
+        "priority_score": 90, "status": EmailStatus.PROCESSED, "processed_at": datetime.utcnow(),
+        **fields
+    })
+
+
+def make_event(user, name: str, starts_in: timedelta) -> CalendarEvent:
+    start_time = datetime.utcnow() + starts_in
+    return CalendarEvent(
+        user_id=user.id, google_event_id=name, title=name,
+        start_time=start_time, end_time=start_time + timedelta(hours=1)
+    )
+
+
+def test_brief_follows_email_changes_and_stays_consistent():
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            email = make_email(user, 0)
+            db.add(email)
+            await db.commit()
+            
+            first = json.loads((await BriefService().get(db, user.id)).body)
+            
+            email.status = EmailStatus.ARCHIVED
+            await BriefService().apply_emails(db, user.id, [email])
+            await db.commit()
+            second = json.loads((await BriefService().get(db, user.id)).body)
+            
+            return first, second, await BriefService().check(db, user.id)
+    
+    first, second, diff = asyncio.run(scenario())
+    
+    assert [entry["subject"] for entry in first["needs_attention"]] == ["Item 0"]
+    assert first["handled_automatically"] == []
+    assert second["needs_attention"] == []
+    assert [entry["status"] for entry in second["handled_automatically"]] == ["archived"]
+    assert diff == {}
+
+
+def test_etag_answers_304_until_the_brief_changes():
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            
+            def request(etag: str = None) -> Request:
+                headers = [(b"if-none-match", etag.encode())] if etag else []
+                return Request({"type": "http", "headers": headers})
+            
+            first = await get_todays_brief(request(), current_user=user, db=db)
+            etag = first.headers["etag"]
+            unchanged = await get_todays_brief(request(etag), current_user=user, db=db)
+            
+            db.add(email := make_email(user, 1))
+            await db.flush()
+            await BriefService().apply_emails(db, user.id, [email])
+            await db.commit()
+            changed = await get_todays_brief(request(etag), current_user=user, db=db)
+            return first.status_code, unchanged.status_code, changed.status_code, changed.headers["etag"] != etag
+    
+    assert asyncio.run(scenario()) == (200, 304, 200, True)
+
+
+def test_projection_keeps_upcoming_events_only_up_to_its_horizon():
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            db.add_all([
+                make_event(user, "standup", timedelta(days=1)),
+                make_event(user, "offsite", timedelta(days=10)),
+                make_event(user, "conference", timedelta(days=60)),
+            ])
+            await db.commit()
+            
+            projection = await BriefService().get(db, user.id)
+            stored = {entry["title"] for entry in projection.sections["upcoming"].values()}
+            shown = [entry["title"] for entry in json.loads(projection.body)["upcoming"]]
+            
+            # Time passes until the window reaches the horizon
+            db.add(make_event(user, "review", timedelta(days=12)))
+            await db.execute(
+                update(BriefProjection)
+                .where(BriefProjection.user_id == user.id)
+                .values(
+                    upcoming_horizon=datetime.utcnow() + UPCOMING_WINDOW,
+                    valid_until=datetime.utcnow() - timedelta(seconds=1)
+                )
+            )
+            await db.commit()
+            reloaded = await BriefService().get(db, user.id)
+            return stored, shown, {entry["title"] for entry in reloaded.sections["upcoming"].values()}
+    
+    stored, shown, reloaded = asyncio.run(scenario())
+    
+    # Past the 7-day window but inside the margin: kept, not shown
+    assert stored == {"standup", "offsite"}
+    assert shown == ["standup"]
+    assert reloaded == {"standup", "offsite", "review"}
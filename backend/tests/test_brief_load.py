@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from app.api.brief import get_todays_brief
+from scratch_db import TEST_DATABASE_URL, requires_database, scratch_session
+from test_email_sync import make_user
+
+pytestmark = requires_database
+
+# Stand-in for the database work of one /sync request
+SYNC_QUERY = text("SELECT pg_sleep(0.05)")
+
+
+def p99(latencies: list[float]) -> float:
+    return sorted(latencies)[int(len(latencies) * 0.99) - 1]
+
+
+async def brief_p99_under_sync_traffic(blocking_sync: bool) -> float:
+    """p99 of /brief/today in ms while 4 concurrent syncs run their queries"""
+    async with scratch_session() as (db, _):
+        user = await make_user(db)
+        sync_engine = create_engine(TEST_DATABASE_URL) if blocking_sync else None
+        
+        async def sync_traffic():
+            for _ in range(5):
+                if blocking_sync:
+                    # What the handlers did with the synchronous SessionLocal
+                    with sync_engine.connect() as connection:
+                        connection.execute(SYNC_QUERY)
+                else:
+                    async with AsyncSession(db.bind) as session:
+                        await session.execute(SYNC_QUERY)
+                await asyncio.sleep(0)
+        
+        async def brief(session_bind) -> None:
+            # Like AsyncSessionLocal
+            async with AsyncSession(session_bind, expire_on_commit=False) as session:
+                await get_todays_brief(Request({"type": "http", "headers": []}), current_user=user, db=session)
+        
+        async def brief_traffic() -> list[float]:
+            # Open loop: a request arrives every 5 ms whether or not the
+            # event loop is free to start it, and latency counts from arrival
+            latencies = []
+            start = time.perf_counter()
+            for index in range(50):
+                arrival = start + index * 0.005
+                await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+                await brief(db.bind)
+                latencies.append((time.perf_counter() - arrival) * 1000)
+            return latencies
+        
+        # Open the pooled connections both kinds of traffic will use
+        await asyncio.gather(*(brief(db.bind) for _ in range(5)))
+        
+        latencies, *_ = await asyncio.gather(brief_traffic(), *(sync_traffic() for _ in range(4)))
+        if sync_engine:
+            sync_engine.dispose()
+        return p99(latencies)
+
+
+@pytest.mark.benchmark
+def test_benchmark_brief_p99_under_concurrent_sync():
+    pytest.importorskip("psycopg2", reason="the blocking baseline needs a sync driver")
+    
+    blocking_ms = asyncio.run(brief_p99_under_sync_traffic(blocking_sync=True))
+    async_ms = asyncio.run(brief_p99_under_sync_traffic(blocking_sync=False))
+    
+    print(f"\n/brief/today p99 under 4 concurrent syncs: blocking {blocking_ms:.1f} ms, async {async_ms:.1f} ms")
+    assert async_ms < blocking_ms / 2
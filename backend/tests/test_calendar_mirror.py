@@ -0,0 +1,287 @@
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.models import CalendarEvent, User
+from app.services import calendar_mirror
+from app.services.brief_service import BriefService
+from app.services.calendar_mirror import CalendarMirror
+from app.services.google_client import GoogleAPIError
+from scratch_db import requires_database, run_migration, run_script, scratch_session
+from test_email_sync import make_user
+
+pytestmark = requires_database
+
+
+def google_time(value: datetime) -> dict:
+    return {"dateTime": value.replace(microsecond=0).isoformat().replace("+00:00", "Z")}
+
+
+def make_item(event_id: str, starts_in: timedelta, hours: float = 1, **fields) -> dict:
+    """A Google Calendar event resource starting starts_in from now"""
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + starts_in
+    return {
+        "id": event_id, "status": "confirmed", "summary": event_id,
+        "start": google_time(start), "end": google_time(start + timedelta(hours=hours)),
+        **fields
+    }
+
+
+class FakeCalendar:
+    """
+    In-memory stand-in for CalendarService's sync calls
+    
+    Every change bumps a version; a sync token is the version it was issued
+    at, and an incremental pass returns the items changed since then,
+    cancelled ones included.
+    """
+    
+    def __init__(self, items: list[dict], time_zone: str = "UTC"):
+        self.time_zone = time_zone
+        self.version = 0
+        self.items = {}
+        self.calls = []
+        for item in items:
+            self.put(item)
+    
+    def put(self, item: dict):
+        self.version += 1
+        self.items[item["id"]] = (self.version, item)
+    
+    def cancel(self, event_id: str):
+        self.put({"id": event_id, "status": "cancelled"})
+    
+    async def get_time_zone(self) -> str:
+        return self.time_zone
+    
+    async def list_event_changes(self, sync_token=None, time_min=None):
+        self.calls.append(sync_token)
+        if sync_token is None:
+            items = [item for _, item in self.items.values() if item["status"] != "cancelled"]
+        elif sync_token == "expired":
+            raise GoogleAPIError(410, "Sync token is no longer valid")
+        else:
+            items = [item for version, item in self.items.values() if version > int(sync_token)]
+        return items, str(self.version)
+
+
+def use_calendar(calendar: FakeCalendar, monkeypatch):
+    monkeypatch.setattr(calendar_mirror, "get_calendar_service", lambda user: calendar)
+
+
+async def mirrored(db, user) -> dict:
+    result = await db.execute(select(CalendarEvent).where(CalendarEvent.user_id == user.id))
+    return {event.google_event_id: event for event in result.scalars()}
+
+
+def test_full_then_incremental_sync(monkeypatch):
+    calendar = FakeCalendar([
+        make_item("review", timedelta(hours=3)),
+        make_item("offsite", timedelta(days=2), start={"date": "2030-01-07"}, end={"date": "2030-01-08"}),
+        make_item("focus", timedelta(hours=5), transparency="transparent"),
+        make_item("declined", timedelta(hours=6), attendees=[{"self": True, "responseStatus": "declined"}]),
+        *[make_item(f"standup_{day}", timedelta(days=day, hours=1), recurringEventId="standup") for day in range(3)],
+    ], time_zone="Europe/Paris")
+    use_calendar(calendar, monkeypatch)
+    
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            mirror = CalendarMirror()
+            results = [await mirror.sync(user, db)]
+            after_full = await mirrored(db, user)
+            review_moved_from = after_full["review"].start_time
+            
+            # Moved, cancelled, a whole series cancelled, and a new event
+            calendar.put(make_item("review", timedelta(hours=4)))
+            calendar.cancel("declined")
+            calendar.cancel("standup")
+            calendar.put(make_item("launch", timedelta(hours=2)))
+            results.append(await mirror.sync(user, db))
+            db.expunge_all()
+            after_incremental = await mirrored(db, user)
+            
+            brief = await BriefService().get(db, user.id)
+            upcoming = [entry["title"] for entry in json.loads(brief.body)["upcoming"]]
+            return results, after_full, review_moved_from, after_incremental, upcoming, user.calendar_time_zone
+    
+    results, after_full, review_moved_from, after_incremental, upcoming, time_zone = asyncio.run(scenario())
+    
+    assert calendar.calls == [None, "7"]
+    assert [(result["full_sync"], result["updated"], result["removed"]) for result in results] == [
+        (True, 7, 0), (False, 2, 4)
+    ]
+    assert time_zone == "Europe/Paris"
+    
+    assert len(after_full) == 7
+    assert after_full["offsite"].all_day
+    # All-day events run from midnight to midnight in the calendar's zone
+    assert after_full["offsite"].start_time == datetime(2030, 1, 6, 23)
+    assert not after_full["focus"].busy and not after_full["declined"].busy
+    assert after_full["standup_0"].recurring_event_id == "standup"
+    
+    assert sorted(after_incremental) == ["focus", "launch", "offsite", "review"]
+    assert after_incremental["review"].start_time - review_moved_from == timedelta(hours=1)
+    assert upcoming == ["launch", "review", "focus"]
+
+
+def test_expired_token_falls_back_to_a_full_sync_that_prunes(monkeypatch):
+    calendar = FakeCalendar([make_item("kept", timedelta(hours=3)), make_item("gone", timedelta(hours=4))])
+    use_calendar(calendar, monkeypatch)
+    
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            mirror = CalendarMirror()
+            await mirror.sync(user, db)
+            
+            # Deleted while the token lapsed, so no cancellation is ever reported
+            del calendar.items["gone"]
+            user.calendar_sync_token = "expired"
+            result = await mirror.sync(user, db)
+            return result, sorted(await mirrored(db, user)), user.calendar_sync_token
+    
+    result, event_ids, sync_token = asyncio.run(scenario())
+    
+    assert calendar.calls == [None, "expired", None]
+    assert (result["full_sync"], result["updated"], result["removed"]) == (True, 1, 1)
+    assert event_ids == ["kept"]
+    assert sync_token == str(calendar.version)
+
+
+def test_reads_come_from_the_mirror(monkeypatch):
+    # Busy all of tomorrow's working day in New York except 13:00-14:30
+    tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).date()
+    
+    def local(hour: float) -> dict:
+        start = datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=timezone.utc) + timedelta(hours=hour)
+        return {"dateTime": start.isoformat().replace("+00:00", ""), "timeZone": "America/New_York"}
+    
+    calendar = FakeCalendar([
+        {"id": "morning", "status": "confirmed", "summary": "Morning", "start": local(0), "end": local(13)},
+        {"id": "afternoon", "status": "confirmed", "summary": "Afternoon", "start": local(14.5), "end": local(24)},
+    ], time_zone="America/New_York")
+    use_calendar(calendar, monkeypatch)
+    
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            mirror = CalendarMirror()
+            await mirror.sync(user, db)
+            calls = len(calendar.calls)
+            
+            slots = await mirror.find_available_slots(
+                db, user, duration_minutes=30, days_ahead=2, num_slots=10, granularity_minutes=30
+            )
+            context = await mirror.calendar_context(db, user, days=2)
+            return calls, slots, context
+    
+    calls, slots, context = asyncio.run(scenario())
+    
+    assert calls == len(calendar.calls) == 1
+    tomorrows = [slot for slot in slots if slot["start"].startswith(tomorrow.isoformat())]
+    if tomorrow.weekday() < 5:
+        assert [(slot["start"][11:16], slot["end"][11:16]) for slot in tomorrows] == [
+            ("13:00", "13:30"), ("13:30", "14:00"), ("14:00", "14:30")
+        ]
+    assert all(slot["start"][-6:] in ("-04:00", "-05:00") for slot in slots)
+    assert context.startswith("Time zone: America/New_York\nUpcoming events:\n- Morning")
+
+
+
+def test_migration_moves_event_uniqueness_to_the_user_and_reruns_cleanly():
+    async def scenario():
+        async with scratch_session() as (db, _):
+            # calendar_events as it was before the mirror: event ids unique across users
+            await run_script(db, """
+                ALTER TABLE users DROP COLUMN calendar_sync_token, DROP COLUMN calendar_time_zone;
+                ALTER TABLE calendar_events DROP CONSTRAINT uq_calendar_events_user_event,
+                    DROP COLUMN recurring_event_id, DROP COLUMN all_day, DROP COLUMN busy;
+                DROP INDEX ix_calendar_events_google_event_id;
+                CREATE UNIQUE INDEX ix_calendar_events_google_event_id ON calendar_events (google_event_id)
+            """)
+            await run_migration(db, "0011_calendar_mirror.sql")
+            await run_migration(db, "0011_calendar_mirror.sql")
+            
+            first, second = await make_user(db), User(
+                email="you@example.com", google_id="google-you", access_token="token",
+                refresh_token="refresh", token_expiry=datetime(2030, 1, 1)
+            )
+            db.add(second)
+            await db.commit()
+            
+            def shared(user) -> CalendarEvent:
+                return CalendarEvent(
+                    user_id=user.id, google_event_id="shared", title="Shared",
+                    start_time=datetime(2030, 1, 7, 9), end_time=datetime(2030, 1, 7, 10)
+                )
+            
+            db.add_all([shared(first), shared(second)])
+            await db.commit()
+            
+            db.add(shared(first))
+            with pytest.raises(IntegrityError):
+                await db.commit()
+    
+    asyncio.run(scenario())
+
+
+@pytest.mark.benchmark
+def test_benchmark_calendar_reads_from_the_mirror(monkeypatch):
+    users = 50
+    events_per_user = 2000
+    runs = 50
+    
+    async def median_ms(call) -> float:
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            await call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+    
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            user.calendar_time_zone = "America/New_York"
+            await db.commit()
+            # The user's own year of events, around twenty a week, among other users' calendars
+            await run_script(db, f"""
+                INSERT INTO users (id, email, google_id, access_token, refresh_token, token_expiry,
+                                   automation_level, created_at, onboarding_completed)
+                SELECT md5('user' || u)::uuid, 'user' || u || '@example.com', 'google' || u, 'token', 'refresh',
+                       now(), 'ASSIST_MODE', now(), true
+                FROM generate_series(1, {users - 1}) u;
+                INSERT INTO calendar_events (id, user_id, google_event_id, title, start_time, end_time,
+                                             all_day, status, busy, auto_scheduled, created_at, updated_at)
+                SELECT gen_random_uuid(), CASE WHEN i % {users} = 0 THEN '{user.id}'::uuid
+                                               ELSE md5('user' || i % {users})::uuid END,
+                       'event' || i, 'Meeting ' || i,
+                       date_trunc('hour', now() AT TIME ZONE 'UTC')
+                           + ((i / {users}) * 263 % (365 * 24) - 180 * 24) * interval '1 hour',
+                       date_trunc('hour', now() AT TIME ZONE 'UTC')
+                           + ((i / {users}) * 263 % (365 * 24) - 180 * 24) * interval '1 hour' + interval '1 hour',
+                       false, 'confirmed', i % 10 != 0, false, now(), now()
+                FROM generate_series(1, {users * events_per_user}) i;
+                ANALYZE
+            """)
+            mirror = CalendarMirror()
+            return {
+                "upcoming events": await median_ms(lambda: mirror.get_upcoming_events(db, user.id, 7)),
+                "available slots": await median_ms(lambda: mirror.find_available_slots(db, user, days_ahead=14)),
+                "reply calendar context": await median_ms(lambda: mirror.calendar_context(db, user)),
+            }
+    
+    measured = asyncio.run(scenario())
+    
+    print(
+        f"\n{users * events_per_user} mirrored events: "
+        + "; ".join(f"{name}: {ms:.1f} ms" for name, ms in measured.items())
+    )
+    assert all(ms < 10 for ms in measured.values())
@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import Response
+from sqlalchemy import event
+
+from app.ai.normalizer import normalize_body
+from app.api.emails import get_email, list_emails
+from app.models import EmailBody, email_body
+from app.schemas.email import EmailResponse
+from app.services.pagination import encode_cursor
+from scratch_db import raw_connection, requires_database, run_script, scratch_session
+from test_brief import make_email
+from test_email_sync import make_user
+
+WORDS = (
+    "quarterly review budget launch customer meeting contract draft schedule please "
+    "update team deadline numbers forecast agenda notes follow call invoice approve"
+).split()
+
+
+def sample_body(n: int) -> str:
+    """A plausible ~1 KB email: greeting, a few paragraphs, signature and a quoted reply"""
+    rng = random.Random(n)
+    
+    def sentence() -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+    
+    paragraphs = [" ".join(sentence() for _ in range(rng.randint(2, 4))) for _ in range(3)]
+    quoted = "\n".join(f"> {sentence()}" for _ in range(4))
+    return (
+        f"Hi Sam,\n\n{chr(10).join(paragraphs)}\n\nThanks,\nAlex\n--\nAlex Doe | Example Corp\n\n"
+        f"On Mon, Jun 3, 2024 at 9:00 AM Sam <sam@example.com> wrote:\n{quoted}"
+    )
+
+
+@pytest.mark.parametrize("codec", ["zstd", "zlib", "none"])
+def test_bodies_round_trip_through_each_codec(monkeypatch, codec):
+    monkeypatch.setattr(email_body.settings, "EMAIL_BODY_CODEC", codec)
+    body = sample_body(0) + " ünïcödé ✓"
+    
+    row = EmailBody.row(uuid.uuid4(), body, normalize_body(body))
+    stored = EmailBody(**row)
+    
+    assert row["codec"] == codec
+    assert row["body_bytes"] == len(body.encode("utf-8"))
+    assert stored.text() == body
+    assert stored.normalized_text() == normalize_body(body)
+    if codec != "none":
+        assert len(row["body"]) < row["body_bytes"]
+
+
+def test_zstd_falls_back_to_zlib_without_zstandard(monkeypatch):
+    monkeypatch.setattr(email_body.settings, "EMAIL_BODY_CODEC", "zstd")
+    monkeypatch.setattr(email_body, "zstandard", None)
+    
+    row = EmailBody.row(uuid.uuid4(), "Hello")
+    
+    assert row["codec"] == "zlib"
+    assert EmailBody(**row).text() == "Hello"
+
+
+@requires_database
+def test_bodies_are_only_read_when_asked_for():
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            email_id = uuid.uuid4()
+            body = sample_body(1)
+            db.add(make_email(user, 0, id=email_id, content=EmailBody(**EmailBody.row(email_id, body, "Short"))))
+            await db.commit()
+            db.expunge_all()
+            
+            statements = []
+            
+            def capture(conn, cursor, statement, *args):
+                statements.append(statement)
+            
+            event.listen(db.bind.sync_engine, "before_cursor_execute", capture)
+            try:
+                listed = await list_emails(Response(), limit=10, cursor=None, current_user=user, db=db)
+                read_bodies = any("email_bodies" in statement for statement in statements)
+                listed_body = EmailResponse.model_validate(listed[0]).body
+                db.expunge_all()
+                
+                with_bodies = await list_emails(
+                    Response(), limit=10, cursor=None, include_body=True, current_user=user, db=db
+                )
+                db.expunge_all()
+                opened = await get_email(str(email_id), current_user=user, db=db)
+            finally:
+                event.remove(db.bind.sync_engine, "before_cursor_execute", capture)
+            
+            return body, read_bodies, listed_body, with_bodies[0].body, opened.body, opened.normalized_body
+    
+    body, read_bodies, listed_body, with_bodies, opened, normalized = asyncio.run(scenario())
+    
+    assert not read_bodies
+    assert listed_body is None
+    assert with_bodies == opened == body
+    assert normalized == "Short"
+
+
+def email_uuid(i: int) -> uuid.UUID:
+    """The id the seed SQL gives email i, md5('email' || i)::uuid"""
+    return uuid.UUID(hashlib.md5(f"email{i}".encode()).hexdigest())
+
+
+@requires_database
+@pytest.mark.benchmark
+def test_benchmark_list_reads_at_a_million_emails():
+    count = 1_000_000
+    samples = 1000
+    pages = 200
+    
+    # List pages as list_emails reads them, before (bodies in the row) and after
+    page_query = """
+        SELECT * FROM {table}
+        WHERE user_id = $1 AND received_at < $2
+        ORDER BY received_at DESC, id DESC
+        LIMIT 50
+    """
+    
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            texts = [sample_body(n) for n in range(samples)]
+            normalized = [normalize_body(text) for text in texts]
+            columns = ["email_id", "codec", "body", "normalized_body", "body_bytes"]
+            compressed = [
+                [EmailBody.row(None, text, norm)[column] for column in columns[1:]]
+                for text, norm in zip(texts, normalized)
+            ]
+            
+            await run_script(db, f"""
+                INSERT INTO emails (id, user_id, gmail_id, thread_id, subject, from_email, body_fetched,
+                                    body_tokens, classification, priority_score, status, received_at,
+                                    processed_at, created_at)
+                SELECT md5('email' || i)::uuid, '{user.id}', 'msg' || i, 'thread' || i / 3, 'Subject ' || i,
+                       'sender' || i % 500 || '@example.com', true, 200, 'FYI', i * 37 % 100 + 1, 'PROCESSED',
+                       now() AT TIME ZONE 'UTC' - i * interval '1 minute',
+                       now() AT TIME ZONE 'UTC' - i * interval '1 minute', now() AT TIME ZONE 'UTC'
+                FROM generate_series(1, {count}) i;
+                CREATE TABLE body_samples (n INTEGER PRIMARY KEY, body TEXT, normalized_body TEXT)
+            """)
+            async with raw_connection(db) as raw:
+                await raw.copy_records_to_table(
+                    "body_samples", records=[(n, texts[n], normalized[n]) for n in range(samples)]
+                )
+                await raw.copy_records_to_table(
+                    "email_bodies",
+                    columns=columns,
+                    records=((email_uuid(i), *compressed[i % samples]) for i in range(1, count + 1))
+                )
+            
+            # The old layout: the same emails with both bodies in the row
+            await run_script(db, """
+                CREATE TABLE inline_emails AS
+                SELECT emails.*, body_samples.body, body_samples.normalized_body
+                FROM emails
+                JOIN body_samples ON body_samples.n = substr(emails.gmail_id, 4)::int % 1000;
+                CREATE INDEX ON inline_emails (user_id, received_at)
+            """)
+            await run_script(db, "VACUUM ANALYZE emails, email_bodies, inline_emails")
+            
+            rng = random.Random(0)
+            cursors = [datetime.utcnow() - timedelta(minutes=rng.randrange(count)) for _ in range(pages)]
+            
+            measured = {}
+            async with raw_connection(db) as raw:
+                sizes = await raw.fetchrow("""
+                    SELECT pg_relation_size('inline_emails') AS inline_heap,
+                           pg_total_relation_size('inline_emails') AS inline_total,
+                           pg_relation_size('emails') AS split_heap,
+                           pg_total_relation_size('emails') + pg_total_relation_size('email_bodies') AS split_total
+                """)
+                measured.update({key: value / 2**20 for key, value in sizes.items()})
+                
+                for table in ("inline_emails", "emails"):
+                    hit = read = 0
+                    timings = []
+                    for cursor in cursors:
+                        plan = await raw.fetchval(
+                            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + page_query.format(table=table),
+                            user.id, cursor
+                        )
+                        top = plan[0]["Plan"]
+                        hit += top["Shared Hit Blocks"]
+                        read += top["Shared Read Blocks"]
+                        
+                        started = time.perf_counter()
+                        await raw.fetch(page_query.format(table=table), user.id, cursor)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    
+                    layout = "inline" if table == "inline_emails" else "split"
+                    measured[f"{layout}_buffers_per_page"] = (hit + read) / pages
+                    measured[f"{layout}_hit_ratio"] = hit / (hit + read)
+                    measured[f"{layout}_page_ms"] = statistics.median(timings)
+            
+            for include_body in (False, True):
+                timings = []
+                for cursor in cursors[:50]:
+                    started = time.perf_counter()
+                    await list_emails(
+                        Response(), limit=50, cursor=encode_cursor(cursor, uuid.UUID(int=0)),
+                        include_body=include_body, current_user=user, db=db
+                    )
+                    timings.append((time.perf_counter() - started) * 1000)
+                    db.expunge_all()
+                measured[f"list_emails_{'with' if include_body else 'without'}_bodies_ms"] = statistics.median(timings)
+            
+            return measured
+    
+    measured = asyncio.run(scenario())
+    
+    print(
+        f"\nheap: {measured['inline_heap']:.0f} MB inline vs {measured['split_heap']:.0f} MB split; "
+        f"total: {measured['inline_total']:.0f} MB vs {measured['split_total']:.0f} MB; "
+        f"buffers per page: {measured['inline_buffers_per_page']:.0f} vs {measured['split_buffers_per_page']:.0f}; "
+        f"cache hit ratio: {measured['inline_hit_ratio']:.1%} vs {measured['split_hit_ratio']:.1%}; "
+        f"page query: {measured['inline_page_ms']:.2f} ms vs {measured['split_page_ms']:.2f} ms; "
+        f"list_emails: {measured['list_emails_without_bodies_ms']:.1f} ms without bodies, "
+        f"{measured['list_emails_with_bodies_ms']:.1f} ms with"
+    )
+    assert measured["split_heap"] < measured["inline_heap"]
+    assert measured["split_total"] < measured["inline_total"]
+    assert measured["split_buffers_per_page"] < measured["inline_buffers_per_page"]
@@ -0,0 +1,146 @@
+import asyncio
+import gzip
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import brotli
+import pytest
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+from app.api import responses
+from app.api.emails import _parse_fields, list_emails
+from app.api.responses import FastJSONResponse
+from app.models import EmailBody, EmailClassification, EmailStatus
+from app.schemas.email import EmailResponse, EmailSummary
+from scratch_db import requires_database, scratch_session
+from test_brief import make_email
+from test_email_body import sample_body
+from test_email_sync import make_user
+
+
+def test_fields_resolve_presets_and_always_include_the_cursor_keys():
+    assert _parse_fields("summary") == ["id", "received_at", *[
+        name for name in EmailSummary.model_fields if name not in ("id", "received_at")
+    ]]
+    assert _parse_fields("subject, body,subject") == ["id", "received_at", "subject", "body"]
+    
+    with pytest.raises(HTTPException) as rejected:
+        _parse_fields("subject,password")
+    assert rejected.value.status_code == 400
+    assert "password" in rejected.value.detail
+
+
+@pytest.mark.parametrize("encoder", ["orjson", "fallback"])
+def test_fast_json_response_matches_the_default_encoding(monkeypatch, encoder):
+    if encoder == "fallback":
+        monkeypatch.setattr(responses, "orjson", None)
+    row = {
+        "id": uuid.uuid4(), "received_at": datetime(2024, 6, 3, 9, 30),
+        "classification": EmailClassification.URGENT, "subject": "Ünïcödé ✓", "priority_score": None
+    }
+    
+    assert json.loads(FastJSONResponse([row]).body) == json.loads(JSONResponse(jsonable_encoder([row])).body)
+
+
+@requires_database
+def test_fields_project_only_the_requested_columns():
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            start = datetime(2024, 6, 3)
+            for i in range(3):
+                email_id = uuid.uuid4()
+                db.add(make_email(
+                    user, i, id=email_id, received_at=start + timedelta(hours=i),
+                    content=EmailBody(**EmailBody.row(email_id, f"Body {i}"))
+                ))
+            await db.commit()
+            
+            statements = []
+            
+            def capture(conn, cursor, statement, *args):
+                statements.append(statement)
+            
+            event.listen(db.bind.sync_engine, "before_cursor_execute", capture)
+            try:
+                summary = await list_emails(
+                    Response(), status=None, skip=0, limit=2, cursor=None, fields="summary", current_user=user, db=db
+                )
+                summary_sql = statements[-1]
+                with_body = await list_emails(
+                    Response(), status=None, skip=0, limit=5, cursor=None, fields="subject,body",
+                    current_user=user, db=db
+                )
+            finally:
+                event.remove(db.bind.sync_engine, "before_cursor_execute", capture)
+            
+            return summary, summary_sql, with_body
+    
+    summary, summary_sql, with_body = asyncio.run(scenario())
+    
+    rows = json.loads(summary.body)
+    assert [set(row) for row in rows] == [set(EmailSummary.model_fields)] * 2
+    assert [row["subject"] for row in rows] == ["Item 2", "Item 1"]
+    assert "X-Next-Cursor" in summary.headers
+    assert "body_tokens" not in summary_sql and "email_bodies" not in summary_sql
+    
+    assert [row["body"] for row in json.loads(with_body.body)] == ["Body 2", "Body 1", "Body 0"]
+    assert "X-Next-Cursor" not in with_body.headers
+
+
+@pytest.mark.benchmark
+def test_benchmark_list_payload_and_serialization():
+    def make_rows(count: int) -> list:
+        now = datetime.utcnow()
+        user = SimpleNamespace(id=uuid.uuid4())
+        emails = []
+        for i in range(count):
+            email_id = uuid.uuid4()
+            emails.append(make_email(
+                user, i, id=email_id, received_at=now,
+                summary="Sam wants the Q3 numbers reviewed before Friday's board meeting.",
+                status=EmailStatus.PENDING_APPROVAL, created_at=now,
+                content=EmailBody(**EmailBody.row(email_id, sample_body(i) * 4))
+            ))
+        return emails
+    
+    def timed(render) -> tuple[bytes, float]:
+        started = time.perf_counter()
+        for _ in range(5):
+            body = render()
+        return body, (time.perf_counter() - started) * 1000 / 5
+    
+    report = []
+    for count in (50, 500):
+        emails = make_rows(count)
+        summary_fields = _parse_fields("summary")
+        rows = [{name: getattr(email, name) for name in summary_fields} for email in emails]
+        
+        # Before: every row through EmailResponse with its body, the stdlib encoder
+        full, full_ms = timed(lambda: JSONResponse(
+            jsonable_encoder([EmailResponse.model_validate(email) for email in emails])
+        ).body)
+        # After: fields=summary rows as plain dicts through FastJSONResponse
+        sparse, sparse_ms = timed(lambda: FastJSONResponse(rows).body)
+        
+        sizes = {
+            name: (len(payload), len(gzip.compress(payload, 9)), len(brotli.compress(payload, quality=4)))
+            for name, payload in (("full", full), ("summary", sparse))
+        }
+        report.append(
+            f"{count} rows: full {sizes['full'][0] / 1024:.0f} KiB "
+            f"(gzip {sizes['full'][1] / 1024:.0f}, br {sizes['full'][2] / 1024:.0f}) in {full_ms:.1f} ms; "
+            f"summary {sizes['summary'][0] / 1024:.0f} KiB "
+            f"(gzip {sizes['summary'][1] / 1024:.0f}, br {sizes['summary'][2] / 1024:.0f}) in {sparse_ms:.2f} ms"
+        )
+        
+        assert sizes["summary"][2] < sizes["summary"][0] < sizes["full"][0]
+        assert sparse_ms < full_ms
+    
+    print("\n" + "\n".join(report))
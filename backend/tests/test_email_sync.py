@@ -0,0 +1,170 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from app.services import sync_service
+from app.services.sync_service import EmailSyncService
+from app.models import ActivityLog, Email, User
+from fake_gmail import FakeGmail, make_message
+from scratch_db import requires_database, scratch_session
+from test_triage import make_pipeline
+
+pytestmark = requires_database
+
+
+async def make_user(db) -> User:
+    user = User(
+        email="me@example.com",
+        google_id="google-me",
+        access_token="token",
+        refresh_token="refresh",
+        token_expiry=datetime(2030, 1, 1)
+    )
+    db.add(user)
+    await db.commit()
+    return user
+
+
+def fake_services(gmail: FakeGmail, monkeypatch):
+    monkeypatch.setattr(sync_service, "get_gmail_service", lambda user: gmail.gmail_service())
+    monkeypatch.setattr(sync_service, "EmailPipeline", lambda user_id: make_pipeline("per_stage", requests_per_minute=0)[0])
+
+
+def test_sync_stores_new_emails_once(monkeypatch):
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            db.add(Email(
+                user_id=user.id, gmail_id="msg00001", thread_id="thread00000", subject="Item 1",
+                from_email="sam1@example.com", received_at=datetime(2024, 6, 3)
+            ))
+            await db.commit()
+            
+            response = await EmailSyncService().sync(user, db)
+            
+            gmail_ids = (await db.execute(select(Email.gmail_id).order_by(Email.gmail_id))).scalars().all()
+            logs = await db.scalar(select(func.count()).select_from(ActivityLog))
+            next_action = await db.scalar(select(Email.next_action).where(Email.gmail_id == "msg00000"))
+            return response, gmail_ids, logs, next_action, user.gmail_history_id
+    
+    with FakeGmail([make_message(i) for i in range(4)]) as gmail:
+        fake_services(gmail, monkeypatch)
+        response, gmail_ids, logs, next_action, history_id = asyncio.run(scenario())
+    
+    assert (response["processed"], response["remaining"]) == (3, 0)
+    assert gmail_ids == ["msg00000", "msg00001", "msg00002", "msg00003"]
+    assert logs == 3
+    assert next_action == "Reply with comments"
+    assert history_id == "1000"
+
+
+def test_cursor_moves_only_once_every_listed_email_is_stored(monkeypatch):
+    monkeypatch.setattr(sync_service.settings, "GMAIL_SYNC_MAX_EMAILS", 3)
+    
+    async def scenario(gmail: FakeGmail):
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            user.gmail_history_id = "100"
+            await db.commit()
+            
+            history_ids = []
+            for failing in (["msg00003"], []):
+                gmail.errors = {message_id: 429 for message_id in failing}
+                response = await EmailSyncService().sync(user, db)
+                history_ids.append((response["processed"], user.gmail_history_id))
+            return history_ids
+    
+    with FakeGmail([make_message(i) for i in range(5)], history_id="2000") as gmail:
+        fake_services(gmail, monkeypatch)
+        history_ids = asyncio.run(scenario(gmail))
+    
+    # msg00001-msg00004 are listed and the first three fetched; the failed
+    # one holds the cursor back and is picked up by the next sync along
+    # with msg00004
+    assert history_ids == [(2, "100"), (2, "2000")]
+
+
+def test_stream_reports_each_email_before_the_summary(monkeypatch):
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            db.add(Email(
+                user_id=user.id, gmail_id="msg00001", thread_id="thread00000", subject="Item 1",
+                from_email="sam1@example.com", received_at=datetime(2024, 6, 3)
+            ))
+            await db.commit()
+            return [event async for event in EmailSyncService().stream(user, db)]
+    
+    with FakeGmail([make_message(i) for i in range(3)]) as gmail:
+        fake_services(gmail, monkeypatch)
+        events = asyncio.run(scenario())
+    
+    assert [event["event"] for event in events] == ["email", "email", "complete"]
+    assert {event["data"]["gmail_id"] for event in events[:2]} == {"msg00000", "msg00002"}
+    assert events[0]["data"]["next_action"] == "Reply with comments"
+    assert "decision" in events[0]["data"]
+    summary = events[-1]["data"]
+    assert [email["gmail_id"] for email in summary["emails"]] == [event["data"]["gmail_id"] for event in events[:2]]
+    assert summary["skipped"] == []
+
+
+def test_rule_triaged_email_body_is_fetched_when_opened(monkeypatch):
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            response = await EmailSyncService().sync(user, db)
+            
+            stored = {
+                email.gmail_id: (email.body, email.body_fetched, email.normalized_body)
+                for email in (await db.execute(select(Email).options(selectinload(Email.content)))).scalars()
+            }
+            promotion = await db.scalar(
+                select(Email).where(Email.gmail_id == "msg00001").options(selectinload(Email.content))
+            )
+            loaded = await EmailSyncService().load_body(promotion, user, db)
+            return response, stored, loaded, (promotion.body, promotion.body_fetched, promotion.normalized_body)
+    
+    sale = "Everything in the summer sale is half price this week only. " * 10
+    promotion = make_message(1, body=sale, labels=("CATEGORY_PROMOTIONS",))
+    with FakeGmail([make_message(0), promotion]) as gmail:
+        fake_services(gmail, monkeypatch)
+        response, stored, loaded, opened = asyncio.run(scenario())
+    
+    body = "Hi,\n\nPlease look at item 0 before Friday.\n\nThanks,\nSam"
+    assert stored["msg00000"] == (body, True, body)
+    # Stored with the snippet only; the body is fetched once opened
+    assert stored["msg00001"] == (sale[:100], False, None)
+    assert loaded
+    assert opened == (sale, True, sale.strip())
+    # Profile, listing, metadata batch and one body batch
+    assert response["fetch"]["round_trips"] == 4
+    assert response["fetch"]["bytes_received"] > 0
+
+
+@pytest.mark.benchmark
+def test_benchmark_queries_per_sync_are_constant(monkeypatch):
+    async def scenario(count: int) -> tuple[int, float]:
+        async with scratch_session() as (db, queries):
+            user = await make_user(db)
+            queries.count = 0
+            
+            started = time.perf_counter()
+            response = await EmailSyncService().sync(user, db)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            
+            assert response["processed"] == count
+            return queries.count, elapsed_ms
+    
+    measured = {}
+    for count in (5, 20):
+        monkeypatch.setattr(sync_service.settings, "GMAIL_SYNC_MAX_EMAILS", count)
+        with FakeGmail([make_message(i) for i in range(count)]) as gmail:
+            fake_services(gmail, monkeypatch)
+            measured[count] = asyncio.run(scenario(count))
+    
+    print("\n" + "; ".join(f"{count} new emails: {n} queries, {ms:.0f} ms" for count, (n, ms) in measured.items()))
+    assert measured[5][0] == measured[20][0]
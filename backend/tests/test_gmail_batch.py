@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+
+from app.ai.pipeline import EmailPipeline
+from app.config import settings
+from app.services.gmail_service import GMAIL_PATH
+from fake_gmail import FakeGmail, make_message
+
+
+async def fetch_one_by_one(service, max_results: int) -> list[dict]:
+    """The pre-batching path: a list call, then one messages.get round trip per message"""
+    return [
+        service._parse_email(await service.client.request(
+            'GET', f'{GMAIL_PATH}/messages/{message_id}', params={'format': 'full'}
+        ))
+        for message_id in await service._list_unread(max_results)
+    ]
+
+
+def test_batched_fetch_matches_per_message_fetch(monkeypatch):
+    monkeypatch.setattr(settings, "GMAIL_BATCH_SIZE", 4)
+    
+    with FakeGmail([make_message(i) for i in range(10)]) as gmail:
+        service = gmail.gmail_service()
+        batched = asyncio.run(service.fetch_unread_emails(max_results=10))
+        
+        assert service.metrics.round_trips == 1 + 3
+        assert gmail.requests == 1 + 3
+        assert batched == asyncio.run(fetch_one_by_one(gmail.gmail_service(), 10))
+        assert [email['gmail_id'] for email in batched] == [f"msg{i:05d}" for i in range(9, -1, -1)]
+
+
+def test_one_failed_message_does_not_fail_the_batch():
+    with FakeGmail([make_message(i) for i in range(5)]) as gmail:
+        gmail.errors["msg00002"] = 429
+        
+        emails = asyncio.run(gmail.gmail_service().fetch_unread_emails(max_results=5))
+        
+        assert [email['gmail_id'] for email in emails] == ["msg00004", "msg00003", "msg00001", "msg00000"]
+
+
+@pytest.mark.benchmark
+def test_benchmark_round_trips_and_wall_clock():
+    messages = 50
+    
+    with FakeGmail([make_message(i) for i in range(messages)], latency=0.01) as gmail:
+        started = time.perf_counter()
+        asyncio.run(fetch_one_by_one(gmail.gmail_service(), messages))
+        per_message_ms = (time.perf_counter() - started) * 1000
+        per_message_trips, gmail.requests = gmail.requests, 0
+        
+        started = time.perf_counter()
+        emails = asyncio.run(gmail.gmail_service().fetch_unread_emails(max_results=messages))
+        batched_ms = (time.perf_counter() - started) * 1000
+        batched_trips = gmail.requests
+    
+    print(
+        f"\n{messages} messages at 10 ms per round trip: "
+        f"per-message {per_message_trips} round trips, {per_message_ms:.0f} ms; "
+        f"batched {batched_trips} round trips, {batched_ms:.0f} ms"
+    )
+    assert len(emails) == messages
+    assert per_message_trips == messages + 1
+    assert batched_trips == 2
+    assert batched_ms < per_message_ms / 3
+
+
+@pytest.mark.benchmark
+def test_benchmark_two_phase_fetch_bytes():
+    # Three in four messages are promotions the rules triage from headers
+    newsletter = "<p>" + "This week's deals, picked for you. " * 400 + "</p>"
+    messages = [
+        make_message(i, body=newsletter, labels=("CATEGORY_PROMOTIONS",)) if i % 4 else make_message(i)
+        for i in range(40)
+    ]
+    pipeline = EmailPipeline()
+    
+    async def two_phase(service):
+        emails, _ = await service.fetch_messages([m["id"] for m in messages], format='metadata')
+        await service.fetch_bodies([email for email in emails if pipeline.needs_llm(email)])
+        return emails
+    
+    with FakeGmail(messages) as gmail:
+        full = gmail.gmail_service()
+        asyncio.run(full.fetch_messages([m["id"] for m in messages]))
+        lazy = gmail.gmail_service()
+        emails = asyncio.run(two_phase(lazy))
+    
+    print(
+        f"\n{len(messages)} messages, 30 rule-triaged: full fetch {full.metrics.bytes_received} bytes, "
+        f"{full.metrics.parse_ms:.1f} ms parse; two-phase {lazy.metrics.bytes_received} bytes, "
+        f"{lazy.metrics.parse_ms:.1f} ms parse"
+    )
+    assert sum(1 for email in emails if email["body"]) == 10
+    assert lazy.metrics.bytes_received < full.metrics.bytes_received / 3
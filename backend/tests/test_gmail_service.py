@@ -0,0 +1,142 @@
+import base64
+import time
+import tracemalloc
+
+import pytest
+
+from app.config import settings
+from app.models import User
+from app.services.gmail_service import GmailService
+
+
+def encode(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+@pytest.fixture
+def gmail() -> GmailService:
+    return GmailService(User(email="me@example.com"), client=object())
+
+
+def test_prefers_first_plain_text_part_in_document_order(gmail):
+    payload = {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            {
+                "mimeType": "multipart/alternative",
+                "parts": [
+                    {"mimeType": "text/html", "body": {"data": encode("<p>html</p>")}},
+                    {"mimeType": "text/plain", "body": {"data": encode("first plain")}},
+                ]
+            },
+            {"mimeType": "text/plain", "body": {"data": encode("second plain")}},
+        ]
+    }
+    
+    assert gmail._extract_body(payload) == "first plain"
+
+
+def test_falls_back_to_html_and_skips_attachments(gmail):
+    payload = {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            {"mimeType": "text/plain", "filename": "notes.txt", "body": {"attachmentId": "att1"}},
+            {
+                "mimeType": "text/plain",
+                "headers": [{"name": "Content-Disposition", "value": "attachment; filename=a.txt"}],
+                "body": {"data": encode("inline attachment")}
+            },
+            {"mimeType": "text/html", "body": {"data": encode("<p>html body</p>")}},
+        ]
+    }
+    
+    assert gmail._extract_body(payload) == "<p>html body</p>"
+
+
+def test_single_part_and_empty_payloads(gmail):
+    assert gmail._extract_body({"mimeType": "text/plain", "body": {"data": encode("hello")}}) == "hello"
+    assert gmail._extract_body({"mimeType": "text/plain", "body": {"size": 0}}) == ""
+
+
+def test_decode_body_is_capped(gmail, monkeypatch):
+    monkeypatch.setattr(settings, "GMAIL_MAX_BODY_BYTES", 10)
+    
+    assert gmail._decode_body(encode("0123456789abcdef")) == "0123456789"
+    assert gmail._decode_body(encode("short")) == "short"
+
+
+def test_decode_body_drops_split_multibyte_characters(gmail, monkeypatch):
+    monkeypatch.setattr(settings, "GMAIL_MAX_BODY_BYTES", 4)
+    
+    # "é" is two bytes; the cap falls in the middle of the second one
+    assert gmail._decode_body(encode("aéé")) == "aé"
+
+
+def extract_top_level(payload: dict) -> str:
+    """The pre-walker _extract_body: top-level parts only, decoding every candidate"""
+    body = ""
+    if 'parts' in payload:
+        for part in payload['parts']:
+            if part['mimeType'] == 'text/plain':
+                if 'data' in part['body']:
+                    body = base64.urlsafe_b64decode(part['body']['data'] + "==").decode('utf-8', errors='ignore')
+                    break
+            elif part['mimeType'] == 'text/html' and not body:
+                if 'data' in part['body']:
+                    body = base64.urlsafe_b64decode(part['body']['data'] + "==").decode('utf-8', errors='ignore')
+    elif 'data' in payload['body']:
+        body = base64.urlsafe_b64decode(payload['body']['data'] + "==").decode('utf-8', errors='ignore')
+    return body
+
+
+def corpus_message(index: int) -> dict:
+    """multipart/mixed: a large HTML report, a text export attachment, then the alternative body"""
+    text = f"Hi,\n\nNumbers for week {index} are attached.\n\nThanks"
+    return {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            {"mimeType": "text/html", "filename": "", "body": {"data": encode("<td>1</td>" * 200_000)}},
+            {
+                "mimeType": "text/plain",
+                "filename": "export.csv",
+                "headers": [{"name": "Content-Disposition", "value": "attachment; filename=export.csv"}],
+                "body": {"data": encode("id,value\n" * 300_000)}
+            },
+            {
+                "mimeType": "multipart/alternative",
+                "parts": [
+                    {"mimeType": "text/plain", "body": {"data": encode(text)}},
+                    {"mimeType": "text/html", "body": {"data": encode(f"<p>{text}</p>")}},
+                ]
+            },
+        ]
+    }
+
+
+def measure(extract, messages: list[dict]) -> tuple[list[str], float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    bodies = [extract(message) for message in messages]
+    elapsed_ms = (time.perf_counter() - started) * 1000 / len(messages)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return bodies, elapsed_ms, peak
+
+
+@pytest.mark.benchmark
+def test_benchmark_parse_time_and_peak_memory(gmail):
+    messages = [corpus_message(index) for index in range(20)]
+    
+    old_bodies, old_ms, old_peak = measure(extract_top_level, messages)
+    new_bodies, new_ms, new_peak = measure(gmail._extract_body, messages)
+    
+    print(
+        f"\n{len(messages)} messages with a 2 MB HTML report and a 2.7 MB attachment: "
+        f"top-level {old_ms:.2f} ms/message, peak {old_peak // 1024} KiB; "
+        f"walker {new_ms:.3f} ms/message, peak {new_peak // 1024} KiB"
+    )
+    # The old parser took the attachment as the body
+    assert old_bodies[0].startswith("id,value")
+    assert new_bodies[0].startswith("Hi,")
+    assert new_ms < old_ms / 10
+    assert new_peak < old_peak / 10
@@ -0,0 +1,49 @@
+import asyncio
+
+from fake_gmail import FakeGmail, make_message
+
+
+def test_gone_messages_are_dropped_and_transient_failures_reported():
+    with FakeGmail([make_message(i) for i in range(4)]) as gmail:
+        gmail.errors["msg00001"] = 404
+        gmail.errors["msg00002"] = 410
+        gmail.errors["msg00003"] = 429
+        
+        emails, failed_ids = asyncio.run(gmail.gmail_service().fetch_messages(
+            ["msg00000", "msg00001", "msg00002", "msg00003"]
+        ))
+        
+        assert [email['gmail_id'] for email in emails] == ["msg00000"]
+        assert failed_ids == ["msg00003"]
+
+
+def test_history_lists_only_mail_added_since_the_cursor():
+    with FakeGmail([make_message(i) for i in range(6)], history_id="2000") as gmail:
+        service = gmail.gmail_service()
+        
+        message_ids, history_id = asyncio.run(service.list_new_message_ids("103"))
+        
+        assert message_ids == ["msg00004", "msg00005"]
+        assert history_id == "2000"
+        assert gmail.requests == 1
+
+
+def test_expired_history_falls_back_to_unread_listing():
+    with FakeGmail([make_message(i) for i in range(6)], history_id="2000") as gmail:
+        gmail.oldest_history_id = 104
+        service = gmail.gmail_service()
+        
+        message_ids, history_id = asyncio.run(service.list_new_message_ids("103", max_results=3))
+        
+        # Oldest first, position taken from the profile
+        assert message_ids == ["msg00003", "msg00004", "msg00005"]
+        assert history_id == "2000"
+        assert gmail.requests == 3
+
+
+def test_first_sync_without_cursor_lists_unread_mail():
+    with FakeGmail([make_message(i) for i in range(2)], history_id="2000") as gmail:
+        message_ids, history_id = asyncio.run(gmail.gmail_service().list_new_message_ids(None))
+        
+        assert message_ids == ["msg00000", "msg00001"]
+        assert history_id == "2000"
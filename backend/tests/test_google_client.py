@@ -0,0 +1,55 @@
+import httpx
+
+from app.models import User
+from app.services.google_client import GoogleAPIClient
+
+BOUNDARY = "batch_abc123"
+
+
+def batch_response(parts: list[str]) -> httpx.Response:
+    body = "".join(f"--{BOUNDARY}\r\n{part}\r\n" for part in parts) + f"--{BOUNDARY}--\r\n"
+    return httpx.Response(
+        200,
+        headers={"content-type": f"multipart/mixed; boundary={BOUNDARY}"},
+        content=body.encode()
+    )
+
+
+def item(index: int, status_line: str, payload: str) -> str:
+    return (
+        "Content-Type: application/http\r\n"
+        f"Content-ID: <response-item{index}>\r\n"
+        "\r\n"
+        f"HTTP/1.1 {status_line}\r\n"
+        "Content-Type: application/json; charset=UTF-8\r\n"
+        "\r\n"
+        f"{payload}"
+    )
+
+
+def client() -> GoogleAPIClient:
+    return GoogleAPIClient(User(access_token="token", refresh_token="refresh"), base_url="http://google.test")
+
+
+def test_parts_are_matched_to_requests_by_content_id():
+    response = batch_response([
+        item(1, "429 Too Many Requests", '{"error": {"code": 429}}'),
+        item(0, "200 OK", '{"id": "a"}'),
+        item(2, "200 OK", '{"id": "c"}'),
+    ])
+    
+    assert client()._parse_batch_response(response, 3) == [
+        (200, {"id": "a"}),
+        (429, {"error": {"code": 429}}),
+        (200, {"id": "c"}),
+    ]
+
+
+def test_missing_and_unparseable_parts():
+    response = batch_response([
+        item(0, "204 No Content", ""),
+        item(1, "500 Internal Server Error", "<html>oops</html>"),
+        item(7, "200 OK", '{"id": "out of range"}'),
+    ])
+    
+    assert client()._parse_batch_response(response, 3) == [(204, None), (500, None), (0, None)]
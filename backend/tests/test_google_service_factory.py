@@ -0,0 +1,51 @@
+import uuid
+
+from app.models import User
+from app.services.google_service_factory import GoogleServiceFactory
+
+
+def make_user(access_token: str = "token") -> User:
+    return User(id=uuid.uuid4(), email="me@example.com", access_token=access_token, refresh_token="refresh")
+
+
+def test_services_share_a_cached_client_per_user():
+    factory = GoogleServiceFactory(max_entries=10)
+    user = make_user()
+    
+    gmail = factory.gmail(user)
+    calendar = factory.calendar(user)
+    
+    assert gmail.client is calendar.client
+    assert (factory.stats.hits, factory.stats.misses) == (1, 1)
+    assert gmail.construction_ms >= 0
+
+
+def test_stored_token_change_replaces_the_client():
+    factory = GoogleServiceFactory(max_entries=10)
+    user = make_user()
+    first = factory.gmail(user).client
+    
+    user.access_token = "refreshed"
+    second = factory.gmail(user).client
+    
+    assert second is not first
+    assert second.credentials.token == "refreshed"
+    assert factory.stats.invalidations == 1
+    
+    factory.invalidate(user.id)
+    assert factory.gmail(user).client is not second
+    assert factory.stats.invalidations == 2
+
+
+def test_least_recently_used_client_is_evicted():
+    factory = GoogleServiceFactory(max_entries=2)
+    first, second, third = make_user(), make_user(), make_user()
+    
+    first_client = factory.gmail(first).client
+    factory.gmail(second)
+    factory.gmail(first)
+    factory.gmail(third)
+    
+    assert factory.stats.evictions == 1
+    assert factory.gmail(first).client is first_client
+    assert factory.stats.misses == 3
@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services import job_queue
+from app.services.job_queue import SYNC_JOB, InMemoryJobQueue, JobStatus
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(job_queue.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(monkeypatch, clock) -> InMemoryJobQueue:
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 10)
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 300)
+    return InMemoryJobQueue()
+
+
+def test_enqueue_returns_active_job_for_same_user(queue):
+    async def scenario():
+        first = await queue.enqueue(SYNC_JOB, "user-1")
+        second = await queue.enqueue(SYNC_JOB, "user-1")
+        other = await queue.enqueue(SYNC_JOB, "user-2")
+        return first, second, other
+    
+    first, second, other = asyncio.run(scenario())
+    
+    assert second["id"] == first["id"]
+    assert other["id"] != first["id"]
+
+
+def test_running_job_still_blocks_enqueue(queue):
+    async def scenario():
+        job = await queue.enqueue(SYNC_JOB, "user-1")
+        await queue.dequeue()
+        return job, await queue.enqueue(SYNC_JOB, "user-1")
+    
+    job, again = asyncio.run(scenario())
+    
+    assert again["id"] == job["id"]
+    assert again["status"] == JobStatus.RUNNING.value
+
+
+def test_complete_frees_the_user_for_a_new_job(queue):
+    async def scenario():
+        job = await queue.enqueue(SYNC_JOB, "user-1")
+        await queue.dequeue()
+        await queue.complete(job["id"], {"processed": 3})
+        return await queue.get(job["id"]), await queue.enqueue(SYNC_JOB, "user-1")
+    
+    done, new = asyncio.run(scenario())
+    
+    assert done["status"] == JobStatus.SUCCEEDED.value
+    assert done["result"] == {"processed": 3}
+    assert new["id"] != done["id"]
+
+
+def test_failed_job_is_retried_with_backoff(queue, clock):
+    async def scenario():
+        job = await queue.enqueue(SYNC_JOB, "user-1")
+        await queue.dequeue()
+        await queue.fail(job["id"], "boom")
+        early = await queue.dequeue()
+        
+        clock.now += 10
+        first_retry = await queue.dequeue()
+        await queue.fail(job["id"], "boom again")
+        
+        # The second retry waits twice as long
+        clock.now += 10
+        early_again = await queue.dequeue()
+        clock.now += 10
+        return early, first_retry, early_again, await queue.dequeue()
+    
+    early, first_retry, early_again, second_retry = asyncio.run(scenario())
+    
+    assert early is None
+    assert first_retry["attempts"] == 2
+    assert first_retry["error"] == "boom"
+    assert early_again is None
+    assert second_retry["attempts"] == 3
+
+
+def test_job_fails_after_max_attempts(queue, clock):
+    async def scenario():
+        job = await queue.enqueue(SYNC_JOB, "user-1")
+        for _ in range(settings.JOB_MAX_ATTEMPTS):
+            clock.now += 3600
+            claimed = await queue.dequeue()
+            assert claimed["id"] == job["id"]
+            await queue.fail(job["id"], "boom")
+        clock.now += 3600
+        return await queue.get(job["id"]), await queue.dequeue(), await queue.enqueue(SYNC_JOB, "user-1")
+    
+    job, claimed, new = asyncio.run(scenario())
+    
+    assert job["status"] == JobStatus.FAILED.value
+    assert job["attempts"] == settings.JOB_MAX_ATTEMPTS
+    assert claimed is None
+    assert new["id"] != job["id"]
+
+
+def test_expired_lease_is_retried(queue, clock):
+    async def scenario():
+        job = await queue.enqueue(SYNC_JOB, "user-1")
+        await queue.dequeue()
+        
+        # Heartbeats keep the job running past its first lease
+        clock.now += 200
+        alive = await queue.heartbeat(job["id"])
+        clock.now += 200
+        still_running = await queue.dequeue()
+        
+        # The worker dies and stops renewing
+        clock.now += 300
+        expired = await queue.dequeue()
+        clock.now += 10
+        return job, alive, still_running, expired, await queue.dequeue()
+    
+    job, alive, still_running, expired, reclaimed = asyncio.run(scenario())
+    
+    assert alive
+    assert still_running is None
+    # Requeued with backoff rather than claimed straight away
+    assert expired is None
+    assert reclaimed["id"] == job["id"]
+    assert reclaimed["attempts"] == 2
+    assert reclaimed["error"] == "Lease expired"
+
+
+def test_heartbeat_after_lost_lease(queue):
+    async def scenario():
+        job = await queue.enqueue(SYNC_JOB, "user-1")
+        await queue.dequeue()
+        alive = await queue.heartbeat(job["id"])
+        await queue.complete(job["id"], {})
+        return alive, await queue.heartbeat(job["id"])
+    
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_start_shares_the_per_user_lock(queue):
+    async def scenario():
+        queued = await queue.enqueue(SYNC_JOB, "user-1")
+        blocked, started_blocked = await queue.start(SYNC_JOB, "user-1")
+        job, started = await queue.start(SYNC_JOB, "user-2")
+        return queued, blocked, started_blocked, job, started, await queue.enqueue(SYNC_JOB, "user-2")
+    
+    queued, blocked, started_blocked, job, started, again = asyncio.run(scenario())
+    
+    assert not started_blocked
+    assert blocked["id"] == queued["id"]
+    assert started
+    assert job["status"] == JobStatus.RUNNING.value
+    assert again["id"] == job["id"]
@@ -0,0 +1,125 @@
+import asyncio
+
+from app.ai import cache
+from app.ai.cache import MemoryCache, RedisCache, chat_completion, get_llm_cache, make_cache_key
+from fake_openai import FakeOpenAI
+
+REQUEST = {
+    "model": "gpt-3.5-turbo",
+    "messages": [{"role": "user", "content": "Classify this email"}],
+    "temperature": 0.3,
+    "response_format": {"type": "json_object"}
+}
+
+
+class FakeRedis:
+    """The slice of redis.asyncio.Redis that RedisCache uses, in memory"""
+    
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.expiry: dict[str, int] = {}
+    
+    async def get(self, key):
+        return self.values.get(key)
+    
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.expiry[key] = ex
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise ConnectionError("redis is down")
+    
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis is down")
+
+
+def test_ttl_expiry_counts_an_eviction_and_a_miss(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    store = MemoryCache(maxsize=10, ttl_seconds=60)
+    
+    async def scenario():
+        await store.set("key", "value")
+        now[0] += 59
+        fresh = await store.get("key")
+        now[0] += 2
+        return fresh, await store.get("key")
+    
+    assert asyncio.run(scenario()) == ("value", None)
+    assert (store.stats.hits, store.stats.misses, store.stats.evictions) == (1, 1, 1)
+
+
+def test_lru_evicts_least_recently_used():
+    store = MemoryCache(maxsize=2, ttl_seconds=60)
+    
+    async def scenario():
+        await store.set("a", "1")
+        await store.set("b", "2")
+        await store.get("a")
+        await store.set("c", "3")
+        return [await store.get(key) for key in ("a", "b", "c")]
+    
+    assert asyncio.run(scenario()) == ["1", None, "3"]
+    assert (store.stats.hits, store.stats.misses, store.stats.evictions) == (3, 1, 1)
+
+
+def test_cache_key_ignores_dict_order():
+    messages = [{"role": "user", "content": "hi"}]
+    
+    assert make_cache_key("gpt", messages, 0.3, {"type": "json_object"}) == make_cache_key(
+        "gpt", [{"content": "hi", "role": "user"}], 0.3, {"type": "json_object"}
+    )
+    assert make_cache_key("gpt", messages, 0.3, None) != make_cache_key("gpt", messages, 0.7, None)
+
+
+def test_redis_cache_round_trip_with_ttl():
+    client = FakeRedis()
+    store = RedisCache(ttl_seconds=120, client=client)
+    
+    async def scenario():
+        missing = await store.get("key")
+        await store.set("key", "value")
+        return missing, await store.get("key")
+    
+    assert asyncio.run(scenario()) == (None, "value")
+    assert client.expiry == {"key": 120}
+    assert (store.stats.hits, store.stats.misses, store.stats.evictions) == (1, 1, 0)
+
+
+def test_redis_errors_fall_through_as_misses():
+    store = RedisCache(client=BrokenRedis())
+    
+    async def scenario():
+        await store.set("key", "value")
+        return await store.get("key")
+    
+    assert asyncio.run(scenario()) is None
+    assert store.stats.misses == 1
+
+
+def test_identical_requests_are_answered_from_the_cache():
+    client = FakeOpenAI('{"classification": "fyi"}')
+    
+    async def scenario():
+        return [await chat_completion(client, **REQUEST) for _ in range(3)]
+    
+    assert asyncio.run(scenario()) == ['{"classification": "fyi"}'] * 3
+    assert len(client.requests) == 1
+    assert (get_llm_cache().stats.hits, get_llm_cache().stats.misses) == (2, 1)
+
+
+def test_opt_out_and_truncated_responses_always_reach_the_api():
+    client = FakeOpenAI('{"draft": "Thanks!"}')
+    
+    async def scenario():
+        for _ in range(2):
+            await chat_completion(client, use_cache=False, **REQUEST)
+        client.finish_reason = "length"
+        for _ in range(2):
+            await chat_completion(client, **REQUEST)
+    
+    asyncio.run(scenario())
+    
+    assert len(client.requests) == 4
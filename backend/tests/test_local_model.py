@@ -0,0 +1,93 @@
+import asyncio
+import os
+import random
+import uuid
+
+from app.ai import local_model
+from app.ai.local_model import LocalTriageModel, load_local_model
+from app.ai.train_local_model import evaluate, split_samples
+from app.config import settings
+from app.models.email import EmailClassification, LabelSource
+from test_triage import make_pipeline
+
+KINDS = [
+    ("ceo@example.com", "Outage", "production is down fix asap customers affected", "urgent", 95),
+    ("pm@example.com", "Review", "please review the attached plan and reply with comments", "action_required", 65),
+    ("digest@news.example.com", "Digest", "this week in engineering articles and links", "fyi", 25),
+    ("deals@shop.example.com", "Sale", "huge discount sale ends tonight buy now", "spam", 5),
+]
+
+
+def make_samples(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    samples = []
+    for index in range(count):
+        from_email, subject, body, classification, priority = KINDS[index % len(KINDS)]
+        words = body.split()
+        rng.shuffle(words)
+        samples.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "from_email": from_email,
+            "subject": f"{subject} {index}",
+            "body": " ".join(words),
+            "classification": classification,
+            "priority_score": priority
+        })
+    return samples
+
+
+def test_holdout_split_is_stable_and_disjoint():
+    samples = make_samples(1000)
+    
+    train_samples, test_samples = split_samples(samples, 0.1)
+    _, test_subset = split_samples(samples[::2], 0.1)
+    even_ids = {s["id"] for s in samples[::2]}
+    
+    assert 50 < len(test_samples) < 150
+    assert {s["id"] for s in train_samples}.isdisjoint(s["id"] for s in test_samples)
+    # Loading fewer emails doesn't move any of them across the split
+    assert [s["id"] for s in test_subset] == [s["id"] for s in test_samples if s["id"] in even_ids]
+
+
+def test_evaluation_only_scores_held_out_emails(tmp_path):
+    train_samples, test_samples = split_samples(make_samples(400), 0.25)
+    model = LocalTriageModel.fit(train_samples)
+    model.save(tmp_path / "triage.npz")
+    
+    report = evaluate(LocalTriageModel.load(tmp_path / "triage.npz"), test_samples, threshold=0.5)
+    
+    assert report["samples"] == len(test_samples)
+    assert report["classification_accuracy"] == 1.0
+    assert report["priority_bucket_accuracy"] == 1.0
+
+
+def test_model_file_is_reloaded_once_retrained(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_model, "_loaded_models", {})
+    path = str(tmp_path / "triage.npz")
+    
+    assert load_local_model(path) is None
+    
+    LocalTriageModel.fit(make_samples(40)).save(path)
+    first = load_local_model(path)
+    assert first is not None and load_local_model(path) is first
+    
+    LocalTriageModel.fit(make_samples(40, seed=1)).save(path)
+    os.utime(path, (os.path.getatime(path), os.path.getmtime(path) + 1))
+    assert load_local_model(path) not in (None, first)
+
+
+def test_confident_local_predictions_skip_the_llm(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_model, "_loaded_models", {})
+    LocalTriageModel.fit(make_samples(400)).save(tmp_path / "triage.npz")
+    monkeypatch.setattr(settings, "LOCAL_MODEL_PATH", str(tmp_path / "triage.npz"))
+    monkeypatch.setattr(settings, "LOCAL_MODEL_CONFIDENCE", 0.5)
+    pipeline, client = make_pipeline("per_stage")
+    outage = {"from_email": "ceo@example.com", "subject": "Outage", "body": "production is down asap"}
+    
+    result = asyncio.run(pipeline.process(outage))
+    
+    assert result["classification"] == EmailClassification.URGENT
+    assert result["priority_score"] == 90
+    assert result["label_source"] == LabelSource.LOCAL_MODEL
+    assert len(client.requests) == 1
+    assert pipeline.llm_calls_saved == 2
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from app.ai.normalizer import count_tokens, normalize_body, truncate_to_tokens
+from test_triage import make_pipeline
+
+
+def test_strips_quoted_history_and_signature():
+    body = "\r\n".join([
+        "Hi Sam,",
+        "",
+        "The contract is attached.",
+        "> earlier quoted line",
+        "--",
+        "Alex",
+        "On Mon, Jan 1, 2024 at 9:00 AM Sam <sam@example.com> wrote:",
+        "> Can you send the contract?",
+    ])
+    
+    assert normalize_body(body) == "Hi Sam,\n\nThe contract is attached."
+
+
+def test_strips_outlook_history():
+    body = "Sounds good.\n\nFrom: Sam <sam@example.com>\nSent: Monday\nSubject: Plan\n\nOld text"
+    
+    assert normalize_body(body) == "Sounds good."
+
+
+def test_html_drops_scripts_and_blockquotes():
+    body = (
+        "<html><head><style>p {color: red}</style></head><body>"
+        "<p>Meeting moved to <b>3pm</b>.</p>"
+        "<blockquote>old thread</blockquote>"
+        "<script>track()</script></body></html>"
+    )
+    
+    assert normalize_body(body) == "Meeting moved to 3pm."
+
+
+def test_long_urls_are_shortened():
+    assert normalize_body("Report: https://example.com/" + "a" * 80) == "Report: [link]"
+
+
+@pytest.mark.parametrize("line", [
+    "I tried to unsubscribe from the vendor list three times, please raise it with procurement.",
+    "Unsubscribe me from the standup invite.",
+])
+def test_boilerplate_words_in_the_message_are_kept(line):
+    body = f"Hi team,\n\n{line}\n\nThanks"
+    
+    assert normalize_body(body) == body
+
+
+def test_trailing_footer_block_is_dropped_whatever_its_line_length():
+    footer = (
+        "You are receiving this email because you signed up for product updates from Example Inc, "
+        "123 Main Street, Springfield. To stop these emails, unsubscribe or manage preferences."
+    )
+    
+    assert normalize_body(f"New features are live.\n\n{footer}\n\nUnsubscribe") == "New features are live."
+
+
+def test_first_paragraph_is_never_footer():
+    assert normalize_body("Unsubscribe me from this list, please.") == "Unsubscribe me from this list, please."
+
+
+def test_empty_body():
+    assert normalize_body("") == ""
+    assert normalize_body(None) == ""
+
+
+def test_truncate_to_tokens():
+    text = "word " * 1000
+    
+    assert truncate_to_tokens("short", 10) == "short"
+    assert count_tokens(truncate_to_tokens(text, 100)) <= 101
+
+
+TRACKING_URL = "https://click.example-mail.com/ls/click?upn=" + "aB3dE5fG7h" * 12
+FOOTER = (
+    "You are receiving this email because you opted in at example.com.\n"
+    "Unsubscribe | Manage preferences | View this email in your browser\n"
+    "Example Inc, 123 Main Street, Springfield"
+)
+
+
+def reply_chain(index: int) -> str:
+    quoted = "\n".join(
+        f"> On day {depth}, someone wrote about the rollout plan, the open risks and who owns them."
+        for depth in range(40)
+    )
+    return (
+        f"Hi Sam,\n\nAgreed on plan {index}; I'll update the tracker by Thursday.\n\n"
+        f"--\nAlex Doe\nSenior Engineer | Example Inc\n+1 555 0100\n\n"
+        f"On Mon, Jun 3, 2024 at 9:00 AM Sam <sam@example.com> wrote:\n{quoted}"
+    )
+
+
+def newsletter(index: int) -> str:
+    items = "".join(
+        f'<tr><td><a href="{TRACKING_URL}">Story {n}</a><p>Short teaser for story {n} of issue {index}.</p></td></tr>'
+        for n in range(15)
+    )
+    return (
+        "<html><head><style>" + "td { padding: 4px; font-family: Arial; } " * 40 + "</style></head>"
+        f"<body><table>{items}</table><p>{FOOTER}</p>"
+        f'<img src="{TRACKING_URL}" width="1" height="1"></body></html>'
+    )
+
+
+def outlook_forward(index: int) -> str:
+    history = "\n".join(f"Line {n} of the original request about invoice {index}." for n in range(60))
+    return (
+        f"Please handle invoice {index} today.\n\nSent from my iPhone\n\n"
+        f"From: Vendor Billing <billing@vendor.com>\nSent: Friday, May 31, 2024 4:12 PM\n"
+        f"Subject: Invoice {index}\n\n{history}"
+    )
+
+
+def product_update(index: int) -> str:
+    return f"Release {index} is live: faster search and new filters.\nRead more: {TRACKING_URL}\n\n{FOOTER}"
+
+
+@pytest.mark.benchmark
+def test_benchmark_prompt_tokens_saved_by_normalization():
+    corpus = [
+        {"from_email": "sender@example.com", "subject": f"Message {index}", "body": shape(index)}
+        for index in range(10)
+        for shape in (reply_chain, newsletter, outlook_forward, product_update)
+    ]
+    measured = {}
+    
+    for name, emails in (
+        ("raw", corpus),
+        ("normalized", [{**email, "normalized_body": normalize_body(email["body"])} for email in corpus]),
+    ):
+        pipeline, client = make_pipeline("per_stage", requests_per_minute=0)
+        asyncio.run(pipeline.process_many(emails))
+        measured[name] = client.prompt_tokens
+    
+    print(
+        f"\n{len(corpus)} emails, per-stage prompts: raw bodies ~{measured['raw']} tokens, "
+        f"normalized ~{measured['normalized']} tokens "
+        f"({100 - 100 * measured['normalized'] // measured['raw']}% saved)"
+    )
+    assert measured["normalized"] < measured["raw"] / 2
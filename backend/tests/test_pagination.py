@@ -0,0 +1,159 @@
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+
+from app.api.activity import list_activity
+from app.api.emails import list_emails
+from app.models import ActivityLog, Email
+from app.services.pagination import decode_cursor, encode_cursor, next_cursor
+from scratch_db import requires_database, run_script, scratch_session
+from test_brief import make_email
+from test_email_sync import make_user
+
+
+def test_cursor_round_trip():
+    sort_value = datetime(2024, 3, 1, 12, 30, 15, 123456)
+    row_id = uuid.uuid4()
+    
+    cursor = encode_cursor(sort_value, row_id)
+    
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (sort_value, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime(2024, 1, 1), uuid.uuid4())[:-4]])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_next_cursor_only_for_full_pages():
+    rows = [SimpleNamespace(id=uuid.uuid4(), received_at=datetime(2024, 1, day)) for day in (3, 2, 1)]
+    
+    assert next_cursor(rows, 4, "received_at") is None
+    assert next_cursor([], 3, "received_at") is None
+    assert decode_cursor(next_cursor(rows, 3, "received_at")) == (rows[-1].received_at, rows[-1].id)
+
+
+async def walk(page, limit: int) -> list:
+    """Every row of a cursor-paged endpoint, following X-Next-Cursor"""
+    rows, cursor = [], None
+    while True:
+        response = Response()
+        rows.extend(await page(response, limit, cursor))
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return rows
+
+
+@requires_database
+def test_cursor_pages_match_offset_pages_across_ties():
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            # Pairs of emails and log entries share a timestamp, so pages split ties
+            start = datetime(2024, 6, 3)
+            db.add_all([make_email(user, i, received_at=start + timedelta(hours=i // 2)) for i in range(7)])
+            db.add_all([
+                ActivityLog(
+                    user_id=user.id, action_type="email_archived", description=f"Archived {i}",
+                    created_at=start + timedelta(hours=i // 2)
+                )
+                for i in range(7)
+            ])
+            await db.commit()
+            
+            def email_page(response, limit, cursor):
+                return list_emails(response, status=None, skip=0, limit=limit, cursor=cursor, current_user=user, db=db)
+            
+            def activity_page(response, limit, cursor):
+                return list_activity(response, skip=0, limit=limit, cursor=cursor, current_user=user, db=db)
+            
+            by_cursor = [row.id for row in await walk(email_page, 3)], [row.id for row in await walk(activity_page, 3)]
+            by_offset = (
+                [row.id for row in await list_emails(Response(), limit=10, cursor=None, current_user=user, db=db)],
+                [row.id for row in await list_activity(Response(), limit=10, cursor=None, current_user=user, db=db)],
+            )
+            
+            with pytest.raises(HTTPException) as rejected:
+                await list_activity(Response(), limit=3, cursor="not-a-cursor", current_user=user, db=db)
+            return by_cursor, by_offset, rejected.value.status_code
+    
+    by_cursor, by_offset, status_code = asyncio.run(scenario())
+    
+    assert by_cursor == by_offset
+    assert [len(ids) for ids in by_cursor] == [7, 7]
+    assert status_code == 400
+
+
+@requires_database
+@pytest.mark.benchmark
+def test_benchmark_page_1000_costs_the_same_as_page_1():
+    count = 100_000
+    limit = 50
+    
+    async def median_ms(call, runs: int = 5) -> float:
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            await call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+    
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            await run_script(db, f"""
+                INSERT INTO emails (id, user_id, gmail_id, thread_id, subject, from_email, body_fetched,
+                                    status, received_at, created_at)
+                SELECT gen_random_uuid(), '{user.id}', 'msg' || i, 'thread' || i, 'Item', 'sam@example.com',
+                       true, 'PROCESSED', now() - i * interval '1 minute', now()
+                FROM generate_series(1, {count}) AS i;
+                INSERT INTO activity_logs (id, user_id, action_type, description, can_undo, undone, created_at)
+                SELECT gen_random_uuid(), '{user.id}', 'email_processed', 'Processed', false, false,
+                       now() - i * interval '1 minute'
+                FROM generate_series(1, {count}) AS i;
+                ANALYZE
+            """)
+            
+            # The cursor a client holds after reading 999 pages
+            skip = 999 * limit
+            last_email = await db.scalar(
+                select(Email).where(Email.user_id == user.id)
+                .order_by(Email.received_at.desc(), Email.id.desc()).offset(skip - 1).limit(1)
+            )
+            last_log = await db.scalar(
+                select(ActivityLog).where(ActivityLog.user_id == user.id)
+                .order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).offset(skip - 1).limit(1)
+            )
+            email_cursor = encode_cursor(last_email.received_at, last_email.id)
+            log_cursor = encode_cursor(last_log.created_at, last_log.id)
+            
+            def emails(**page):
+                return lambda: list_emails(Response(), status=None, limit=limit, current_user=user, db=db, **page)
+            
+            def activity(**page):
+                return lambda: list_activity(Response(), limit=limit, current_user=user, db=db, **page)
+            
+            return {
+                "emails page 1": await median_ms(emails(skip=0, cursor=None)),
+                "emails offset page 1000": await median_ms(emails(skip=skip, cursor=None)),
+                "emails cursor page 1000": await median_ms(emails(skip=0, cursor=email_cursor)),
+                "activity page 1": await median_ms(activity(skip=0, cursor=None)),
+                "activity offset page 1000": await median_ms(activity(skip=skip, cursor=None)),
+                "activity cursor page 1000": await median_ms(activity(skip=0, cursor=log_cursor)),
+            }
+    
+    measured = asyncio.run(scenario())
+    
+    print("\n" + "; ".join(f"{name}: {ms:.1f} ms" for name, ms in measured.items()))
+    for kind in ("emails", "activity"):
+        assert measured[f"{kind} cursor page 1000"] < measured[f"{kind} offset page 1000"]
+        assert measured[f"{kind} cursor page 1000"] < 3 * measured[f"{kind} page 1"] + 5
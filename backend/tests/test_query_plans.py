@@ -0,0 +1,185 @@
+"""
+Query-plan regression suite for the hot endpoint queries.
+
+Seeds a scratch schema with realistic volumes, runs each endpoint's real
+queries, then EXPLAIN ANALYZEs every statement they issued and fails if
+emails, calendar_events or activity_logs is read with a sequential scan, or
+through a single-column index the composite ones replace.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import Response
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.activity import list_activity
+from app.api.brief import get_executive_summary
+from app.api.emails import list_emails
+from app.models import EmailStatus, User
+from app.services.brief_service import BriefService, upcoming_horizon
+from app.services.calendar_mirror import CalendarMirror
+from app.services.pagination import encode_cursor
+from scratch_db import requires_database, run_script, scratch_session
+
+USERS = 50
+EMAILS_PER_USER = 4000
+EVENTS_PER_USER = 400
+LOGS_PER_USER = 4000
+
+# Tables that must never be read in full by an endpoint query
+HOT_TABLES = {"emails", "calendar_events", "activity_logs"}
+
+# Single-column indexes that read every row a user has, or every user's
+# activity, to find one page
+FALLBACK_INDEXES = {
+    "ix_emails_user_id",
+    "ix_calendar_events_user_id",
+    "ix_activity_logs_user_id",
+    "ix_activity_logs_created_at",
+}
+
+pytestmark = requires_database
+
+SEED = f"""
+INSERT INTO users (id, email, google_id, access_token, refresh_token, token_expiry,
+                   automation_level, created_at, onboarding_completed)
+SELECT md5('user' || u)::uuid, 'user' || u || '@example.com', 'google' || u, 'token', 'refresh',
+       now(), 'ASSIST_MODE', now(), true
+FROM generate_series(1, {USERS}) u;
+
+INSERT INTO emails (id, user_id, gmail_id, thread_id, subject, from_email, body_fetched,
+                    classification, priority_score, status, received_at, processed_at, created_at)
+SELECT md5('email' || i)::uuid, md5('user' || (1 + i % {USERS}))::uuid, 'gmail' || i, 'thread' || i / 3,
+       'Subject ' || i, 'sender' || i % 500 || '@example.com', true,
+       (ARRAY['URGENT', 'ACTION_REQUIRED', 'FYI', 'FYI', 'SPAM'])[1 + i % 5]::emailclassification,
+       i * 37 % 100 + 1,
+       (ARRAY['PROCESSED', 'PROCESSED', 'ARCHIVED', 'ARCHIVED', 'REPLIED', 'PENDING_APPROVAL',
+              'PROCESSED', 'ARCHIVED', 'PROCESSED', 'ARCHIVED'])[1 + i / {USERS} % 10]::emailstatus,
+       now() AT TIME ZONE 'UTC' - (i / {USERS}) * interval '15 minutes',
+       now() AT TIME ZONE 'UTC' - (i / {USERS}) * interval '15 minutes' + interval '2 minutes',
+       now() AT TIME ZONE 'UTC'
+FROM generate_series(1, {USERS * EMAILS_PER_USER}) i;
+
+INSERT INTO calendar_events (id, user_id, google_event_id, title, start_time, end_time,
+                             all_day, status, busy, auto_scheduled, created_at, updated_at)
+SELECT md5('event' || i)::uuid, md5('user' || (1 + i % {USERS}))::uuid, 'event' || i, 'Meeting ' || i,
+       now() AT TIME ZONE 'UTC' + (i / {USERS} - {EVENTS_PER_USER} / 2) * interval '4 hours',
+       now() AT TIME ZONE 'UTC' + (i / {USERS} - {EVENTS_PER_USER} / 2) * interval '4 hours' + interval '1 hour',
+       false, 'confirmed', i % 10 != 0, false, now(), now()
+FROM generate_series(1, {USERS * EVENTS_PER_USER}) i;
+
+-- user1, the one the endpoints run as, is a light user with a tenth of the
+-- others' activity
+INSERT INTO activity_logs (id, user_id, action_type, description, can_undo, undone, created_at)
+SELECT md5('log' || i)::uuid, md5('user' || (1 + i % {USERS}))::uuid,
+       (ARRAY['email_processed', 'email_archived', 'email_replied'])[1 + i % 3], 'Action ' || i, false, false,
+       now() AT TIME ZONE 'UTC' - (i / {USERS}) * interval '15 minutes'
+FROM generate_series(1, {USERS * LOGS_PER_USER}) i
+WHERE i % {USERS} != 0 OR i % ({USERS} * 10) = 0;
+
+ANALYZE
+"""
+
+
+def full_scans(plan: dict) -> list[str]:
+    """Seq Scans of hot tables and fallback index reads anywhere in an EXPLAIN (FORMAT JSON) plan"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in HOT_TABLES:
+        found.append(f"Seq Scan on {plan['Relation Name']}")
+    if plan.get("Index Name") in FALLBACK_INDEXES:
+        found.append(f"{plan['Node Type']} using {plan['Index Name']}")
+    for child in plan.get("Plans", []):
+        found.extend(full_scans(child))
+    return found
+
+
+async def endpoint_queries(db: AsyncSession, user: User) -> dict:
+    """Run each endpoint the way a request would and return its statements"""
+    captured = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+    
+    endpoints = {
+        "list_emails": lambda: list_emails(
+            Response(), status=None, skip=0, limit=50, cursor=None, current_user=user, db=db
+        ),
+        "list_emails_cursor": lambda: list_emails(
+            Response(), status=None, skip=0, limit=50,
+            cursor=encode_cursor(datetime.utcnow() - timedelta(days=10), user.id), fields="summary",
+            current_user=user, db=db
+        ),
+        "list_emails_by_status": lambda: list_emails(
+            Response(), status=EmailStatus.PENDING_APPROVAL, skip=0, limit=50, cursor=None, current_user=user, db=db
+        ),
+        "activity": lambda: list_activity(Response(), skip=0, limit=50, cursor=None, current_user=user, db=db),
+        "activity_cursor": lambda: list_activity(
+            Response(), skip=0, limit=50,
+            cursor=encode_cursor(datetime.utcnow() - timedelta(days=10), user.id), current_user=user, db=db
+        ),
+        "summary": lambda: get_executive_summary(current_user=user, db=db),
+        "brief_rebuild": lambda: BriefService().rebuild(db, user.id, upcoming_horizon(datetime.utcnow())),
+        "upcoming_events": lambda: CalendarMirror().get_upcoming_events(db, user.id, 7),
+        "busy_intervals": lambda: CalendarMirror().busy_intervals(
+            db, user.id, datetime.now(timezone.utc), datetime.now(timezone.utc) + timedelta(days=7)
+        ),
+    }
+    
+    sync_engine = db.bind.sync_engine
+    queries = {}
+    for name, run in endpoints.items():
+        captured.clear()
+        event.listen(sync_engine, "before_cursor_execute", capture)
+        try:
+            await run()
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", capture)
+        queries[name] = list(captured)
+    
+    return queries
+
+
+async def collect_plans() -> dict:
+    async with scratch_session() as (db, _):
+        await run_script(db, SEED)
+        
+        user = await db.get(User, (await db.execute(text("SELECT md5('user1')::uuid"))).scalar())
+        queries = await endpoint_queries(db, user)
+        
+        plans = {}
+        conn = await db.connection()
+        for name, statements in queries.items():
+            plans[name] = []
+            for statement, parameters in statements:
+                result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters)
+                plans[name].append((statement, result.scalar()[0]["Plan"]))
+        await db.rollback()
+        
+        return plans
+
+
+@pytest.fixture(scope="module")
+def plans() -> dict:
+    return asyncio.run(collect_plans())
+
+
+@pytest.mark.parametrize("endpoint", [
+    "list_emails",
+    "list_emails_cursor",
+    "list_emails_by_status",
+    "activity",
+    "activity_cursor",
+    "summary",
+    "brief_rebuild",
+    "upcoming_events",
+    "busy_intervals",
+])
+def test_no_full_scans(plans, endpoint):
+    assert plans[endpoint], f"{endpoint} issued no queries"
+    
+    for statement, plan in plans[endpoint]:
+        scanned = full_scans(plan)
+        assert not scanned, f"{endpoint}: {', '.join(scanned)} in\n{statement}"
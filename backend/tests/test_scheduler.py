@@ -0,0 +1,198 @@
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, time as clock, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.models import CalendarEvent, Preference, User
+from app.services import scheduler
+from app.services.scheduler import (
+    WORKING_HOURS_KEY, MeetingScheduler, WorkingHours, busy_bitmaps, interval_bitmap, rank_slots, working_bitmap
+)
+from scratch_db import requires_database, scratch_session
+from test_email_sync import make_user
+
+QUANTUM = timedelta(minutes=15)
+START = datetime(2024, 6, 3, tzinfo=timezone.utc)
+
+
+def at(minutes: int) -> datetime:
+    return START + timedelta(minutes=minutes)
+
+
+def row(free: str) -> np.ndarray:
+    """Availability row from a string, "1" for free quanta"""
+    return np.array([c == "1" for c in free])
+
+
+def test_interval_bitmap_covers_partially_overlapped_quanta():
+    bitmap = interval_bitmap([(at(20), at(40)), (at(90), at(105))], START, 8, QUANTUM)
+    
+    assert bitmap.tolist() == [False, True, True, False, False, False, True, False]
+
+
+def test_interval_bitmap_clips_to_horizon():
+    bitmap = interval_bitmap([(at(-60), at(15)), (at(105), at(500))], START, 8, QUANTUM)
+    
+    assert bitmap.tolist() == [True, False, False, False, False, False, False, True]
+    assert not interval_bitmap([], START, 4, QUANTUM).any()
+
+
+def test_working_bitmap_follows_time_zone_and_days():
+    hours = WorkingHours(start_hour=9, end_hour=10, days=(0,), time_zone="Europe/Paris")
+    quanta = 2 * 24 * 4
+    
+    bitmap = working_bitmap(hours, START, quanta, QUANTUM)
+    
+    # Monday 09:00-10:00 in Paris is 07:00-08:00 UTC; Tuesday isn't a working day
+    assert np.flatnonzero(bitmap).tolist() == list(range(28, 32))
+
+
+def test_rank_slots_requires_everyone_free():
+    required = np.vstack([row("11111100"), row("00111111")])
+    
+    assert rank_slots(required, np.zeros((0, 8), dtype=bool), 2, 5) == [(2, 0), (4, 0)]
+
+
+def test_rank_slots_prefers_more_optional_attendees_then_earlier():
+    required = np.vstack([row("11111111")])
+    optional = np.vstack([row("00001111"), row("00111100")])
+    
+    assert rank_slots(required, optional, 2, 3) == [(4, 2), (2, 1), (6, 1)]
+
+
+def test_rank_slots_with_duration_longer_than_horizon():
+    assert rank_slots(np.vstack([row("111")]), np.zeros((0, 3), dtype=bool), 4, 3) == []
+
+
+class FakeFreeBusy:
+    """Stand-in for CalendarService.query_freebusy with fixed busy periods per email"""
+    
+    def __init__(self, busy: dict):
+        self.busy = busy
+        self.calls = []
+    
+    async def query_freebusy(self, emails, time_min, time_max):
+        self.calls.append(list(emails))
+        return {
+            email: None if self.busy.get(email) is None else [
+                {"start": start.isoformat(), "end": end.isoformat()} for start, end in self.busy[email]
+            ]
+            for email in emails
+        }
+
+
+@requires_database
+def test_find_meeting_slots_for_users_and_external_attendees(monkeypatch):
+    now = datetime.now(timezone.utc)
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), clock(), tzinfo=timezone.utc)
+    everyday = {"start": 9, "end": 17, "days": list(range(7)), "time_zone": "UTC"}
+    
+    # External attendees are busy around tomorrow 14:00-15:00 in different ways
+    calendar = FakeFreeBusy({
+        "you@example.com": [],
+        "ext@example.com": [(tomorrow + timedelta(hours=13), tomorrow + timedelta(hours=14))],
+        "opt@example.com": [
+            (now, tomorrow + timedelta(hours=14, minutes=30)),
+            (tomorrow + timedelta(hours=15), now + timedelta(days=28)),
+        ],
+        "hidden@example.com": None,
+    })
+    monkeypatch.setattr(scheduler, "get_calendar_service", lambda user: calendar)
+    
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            colleague = User(
+                email="you@example.com", google_id="google-you", access_token="token",
+                refresh_token="refresh", token_expiry=datetime(2030, 1, 1)
+            )
+            db.add(colleague)
+            await db.flush()
+            db.add_all([
+                Preference(user_id=user.id, key=WORKING_HOURS_KEY, value=everyday),
+                Preference(user_id=colleague.id, key=WORKING_HOURS_KEY, value={**everyday, "start": 13, "end": 15}),
+                # The user's own calendar, from the mirror, is full until tomorrow
+                CalendarEvent(
+                    user_id=user.id, google_event_id="today", title="Today",
+                    start_time=now.replace(tzinfo=None) - timedelta(hours=1), end_time=tomorrow.replace(tzinfo=None)
+                ),
+            ])
+            await db.commit()
+            
+            return await MeetingScheduler().find_meeting_slots(
+                db, user,
+                attendees=["you@example.com", "ext@example.com", "hidden@example.com"],
+                optional_attendees=["opt@example.com", "ext@example.com"],
+                duration_minutes=30
+            )
+    
+    result = asyncio.run(scenario())
+    
+    assert calendar.calls == [["you@example.com", "ext@example.com", "hidden@example.com", "opt@example.com"]]
+    assert result["unknown_availability"] == ["hidden@example.com"]
+    # Only 14:00-15:00 suits the colleague's hours and the external attendee; the
+    # slot the optional attendee can make ranks first
+    assert [
+        (datetime.fromisoformat(slot["start"]) - tomorrow, slot["optional_available"]) for slot in result["slots"]
+    ] == [
+        (timedelta(hours=14, minutes=30), ["opt@example.com"]),
+        (timedelta(hours=14), []),
+        (timedelta(days=1, hours=13), []),
+    ]
+
+
+@pytest.mark.benchmark
+def test_benchmark_twenty_attendees_over_four_weeks():
+    attendees = 20
+    quanta = 28 * 24 * 4
+    rng = random.Random(0)
+    hours = [
+        WorkingHours(time_zone=zone)
+        for zone in rng.choices(["UTC", "Europe/London", "Europe/Paris", "America/New_York"], k=attendees)
+    ]
+    # About three meetings a working day each, 30 to 120 minutes long
+    busy = []
+    for _ in range(attendees):
+        intervals = []
+        for _ in range(60):
+            start = START + timedelta(minutes=15 * rng.randrange(quanta))
+            intervals.append((start, start + timedelta(minutes=rng.choice((30, 60, 90, 120)))))
+        busy.append(intervals)
+    
+    def median_ms(call, runs: int = 200) -> float:
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+    
+    masks = {hours_: working_bitmap(hours_, START, quanta, QUANTUM) for hours_ in set(hours)}
+    
+    working = np.vstack([masks[hours_] for hours_ in hours])
+    
+    def rows() -> np.ndarray:
+        return ~busy_bitmaps(busy, START, quanta, QUANTUM) & working
+    
+    stacked = rows()
+    required, optional = stacked[:15], stacked[15:]
+    
+    measured = {
+        "bitmaps one attendee at a time": median_ms(lambda: np.vstack([
+            ~interval_bitmap(intervals, START, quanta, QUANTUM) for intervals in busy
+        ]) & working),
+        "bitmaps": median_ms(rows),
+        "rank": median_ms(lambda: rank_slots(required, optional, 4, 5)),
+        "bitmaps and rank": median_ms(lambda: rank_slots(*np.split(rows(), [15]), 4, 5)),
+    }
+    
+    print(
+        f"\n{attendees} attendees, {quanta} quanta: "
+        + "; ".join(f"{name}: {ms:.3f} ms" for name, ms in measured.items())
+    )
+    assert rank_slots(required, optional, 4, 5)
+    assert measured["rank"] < 1
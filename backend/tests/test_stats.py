@@ -0,0 +1,179 @@
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.api.brief import get_executive_summary
+from app.models import ActivityLog, DailyUserStats, Email, EmailStatus
+from app.services.stats_service import StatsService
+from scratch_db import requires_database, run_migration, run_script, scratch_session
+from test_brief import make_email
+from test_email_sync import make_user
+
+pytestmark = requires_database
+
+
+def test_summary_counts_in_a_single_query():
+    async def scenario():
+        async with scratch_session() as (db, queries):
+            user = await make_user(db)
+            now = datetime.utcnow()
+            db.add_all([
+                make_email(user, 0, received_at=now),
+                make_email(user, 1, received_at=now - timedelta(days=3)),
+                make_email(user, 2, received_at=now, priority_score=20, status=EmailStatus.ARCHIVED),
+                make_email(user, 3, received_at=now - timedelta(days=3), priority_score=20),
+            ])
+            await db.commit()
+            
+            queries.count = 0
+            summary = await get_executive_summary(current_user=user, db=db)
+            return summary, queries.count
+    
+    summary, count = asyncio.run(scenario())
+    
+    assert count == 1
+    assert (summary["total_emails_today"], summary["handled_automatically"], summary["needs_attention"]) == (2, 1, 2)
+    assert summary["meetings_today"] == 0
+
+
+def test_history_adds_up_recorded_counters_and_fills_gaps():
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            today = datetime.utcnow().date()
+            stats = StatsService()
+            await stats.record(db, user.id, {
+                today - timedelta(days=2): Counter(emails_received=3),
+                today: Counter(emails_received=1, emails_processed=4),
+            })
+            await stats.record_today(db, user.id, emails_archived=1)
+            await stats.record_today(db, user.id, emails_archived=1, emails_replied=1)
+            await db.commit()
+            return await stats.history(db, user.id, 3)
+    
+    history = asyncio.run(scenario())
+    
+    assert [day["emails_received"] for day in history["days"]] == [3, 0, 1]
+    assert history["days"][-1]["emails_archived"] == 2
+    assert history["totals"] == {
+        "emails_received": 4, "emails_processed": 4, "emails_archived": 2,
+        "emails_replied": 1, "llm_calls_saved": 0
+    }
+
+
+def test_backfill_fills_every_day_without_a_row_and_keeps_the_rest():
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+            db.add_all([
+                make_email(user, 0, received_at=today - timedelta(days=5)),
+                make_email(user, 1, received_at=today - timedelta(days=5)),
+                make_email(user, 2, received_at=today - timedelta(days=1)),
+                make_email(user, 3, received_at=today),
+                ActivityLog(
+                    user_id=user.id, action_type="email_archived", description="Archived",
+                    created_at=today - timedelta(days=3)
+                ),
+            ])
+            # Recorded by a sync already: must not be overwritten or doubled
+            await StatsService().record(db, user.id, {(today - timedelta(days=1)).date(): Counter(emails_received=7)})
+            await db.commit()
+            
+            await run_migration(db, "0007_backfill_daily_user_stats.sql")
+            await run_migration(db, "0007_backfill_daily_user_stats.sql")
+            
+            result = await db.execute(select(DailyUserStats).where(DailyUserStats.user_id == user.id))
+            return {
+                (today.date() - stats.day).days: (stats.emails_received, stats.emails_archived)
+                for stats in result.scalars()
+            }
+    
+    assert asyncio.run(scenario()) == {5: (2, 0), 3: (0, 1), 1: (7, 0), 0: (1, 0)}
+
+
+async def four_count_summary(db, user_id, today: datetime) -> tuple:
+    """The summary counts as they were computed before, one COUNT per figure"""
+    total = await db.scalar(
+        select(func.count()).select_from(Email).where(Email.user_id == user_id, Email.received_at >= today)
+    )
+    handled = await db.scalar(
+        select(func.count()).select_from(Email).where(
+            Email.user_id == user_id,
+            Email.status.in_([EmailStatus.ARCHIVED, EmailStatus.REPLIED]),
+            Email.processed_at >= today
+        )
+    )
+    attention = await db.scalar(
+        select(func.count()).select_from(Email).where(
+            Email.user_id == user_id,
+            Email.status.in_([EmailStatus.PENDING_APPROVAL, EmailStatus.PROCESSED]),
+            Email.priority_score >= 70
+        )
+    )
+    return total, handled, attention
+
+
+async def scanned_history(db, user_id, days: int) -> list:
+    """Received emails per day computed from the emails table, as a history without rollups would"""
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    day = func.date(Email.received_at)
+    result = await db.execute(
+        select(day, func.count()).where(Email.user_id == user_id, Email.received_at >= start).group_by(day)
+    )
+    return result.all()
+
+
+@pytest.mark.benchmark
+def test_benchmark_summary_and_history_at_a_million_emails():
+    count = 1_000_000
+    
+    async def timed(call) -> float:
+        started = time.perf_counter()
+        await call
+        return (time.perf_counter() - started) * 1000
+    
+    async def scenario():
+        async with scratch_session() as (db, _):
+            user = await make_user(db)
+            
+            # A month of mail, a quarter of it archived, a tenth of it urgent
+            await run_script(db, f"""
+                INSERT INTO emails (
+                    id, user_id, gmail_id, thread_id, subject, from_email, body_fetched,
+                    priority_score, status, received_at, processed_at, created_at
+                )
+                SELECT
+                    gen_random_uuid(), '{user.id}', 'msg' || i, 'thread' || i, 'Item', 'sam@example.com', true,
+                    CASE WHEN i % 10 = 0 THEN 90 ELSE 30 END,
+                    (CASE WHEN i % 4 = 0 THEN 'ARCHIVED' ELSE 'PROCESSED' END)::emailstatus,
+                    date_trunc('day', now() AT TIME ZONE 'UTC') - (i % 30) * interval '1 day' + (i % 3600) * interval '1 second',
+                    date_trunc('day', now() AT TIME ZONE 'UTC') - (i % 30) * interval '1 day' + (i % 3600) * interval '1 second',
+                    now() AT TIME ZONE 'UTC'
+                FROM generate_series(1, {count}) AS i;
+                ANALYZE emails
+            """)
+            await run_migration(db, "0007_backfill_daily_user_stats.sql")
+            
+            today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+            measured = {
+                "four COUNT queries": await timed(four_count_summary(db, user.id, today)),
+                "single-pass summary": await timed(get_executive_summary(current_user=user, db=db)),
+                "30-day history, scanned": await timed(scanned_history(db, user.id, 30)),
+                "30-day history, rollups": await timed(StatsService().history(db, user.id, 30)),
+            }
+            
+            summary = await get_executive_summary(current_user=user, db=db)
+            assert (summary["total_emails_today"], summary["handled_automatically"], summary["needs_attention"]) == \
+                await four_count_summary(db, user.id, today)
+            return measured
+    
+    measured = asyncio.run(scenario())
+    
+    print("\n" + "; ".join(f"{name}: {ms:.0f} ms" for name, ms in measured.items()))
+    assert measured["single-pass summary"] < measured["four COUNT queries"]
+    assert measured["30-day history, rollups"] < measured["30-day history, scanned"]
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.ai.pipeline import EmailPipeline
+from app.ai.rules import RuleBasedTriage
+from app.ai.triage import EmailTriager
+from app.models.email import EmailClassification, LabelSource
+from fake_openai import FakeOpenAI
+
+REPLY = json.dumps({
+    "classification": "action_required",
+    "reasoning": "Asks for a review",
+    "priority_score": 85,
+    "factors": {"deadline": True},
+    "summary": "Review the budget by Friday.",
+    "next_action": "Reply with comments"
+})
+
+
+def email(labels=(), from_email="news@example.com", **headers) -> dict:
+    return {
+        "from_email": from_email,
+        "subject": "Weekly digest",
+        "label_ids": list(labels),
+        "triage_headers": {name.replace("_", "-"): value for name, value in headers.items()}
+    }
+
+
+@pytest.mark.parametrize("message, classification, rule", [
+    (email(["SPAM"]), EmailClassification.SPAM, "gmail_spam_label"),
+    (email(["CATEGORY_PROMOTIONS"]), EmailClassification.SPAM, "promotions_label"),
+    (email(precedence=" Junk "), EmailClassification.SPAM, "precedence_junk"),
+    (email(["CATEGORY_SOCIAL"]), EmailClassification.FYI, "social_label"),
+    (email(auto_submitted="auto-generated"), EmailClassification.FYI, "auto_submitted"),
+    (email(precedence="bulk"), EmailClassification.FYI, "precedence_bulk"),
+    (email(["CATEGORY_UPDATES"], list_id="<digest.example.com>"), EmailClassification.FYI, "mailing_list"),
+    (email(from_email="no-reply@example.com", list_unsubscribe="<mailto:u@example.com>"), EmailClassification.FYI, "mailing_list"),
+    (email(from_email="DoNotReply@example.com", precedence="list"), EmailClassification.FYI, "mailing_list"),
+])
+def test_rules(message, classification, rule):
+    result = RuleBasedTriage().evaluate(message)
+    
+    assert result["classification"] == classification
+    assert result["rule"] == rule
+    assert result["summary"] == f"Automated email from {message['from_email']} regarding: Weekly digest"
+
+
+@pytest.mark.parametrize("message", [
+    email(),
+    email(["INBOX", "UNREAD"]),
+    email(auto_submitted="no"),
+    email(["IMPORTANT", "CATEGORY_PROMOTIONS"]),
+    email(["STARRED"], list_id="<digest.example.com>"),
+    # List headers alone: a discussion list or a person's one-click unsubscribe
+    email(list_id="<dev.lists.example.com>"),
+    email(list_unsubscribe="<mailto:u@example.com>"),
+    email(precedence="list"),
+    email(from_email="noreplyer@example.com", list_id="<dev.lists.example.com>"),
+])
+def test_no_rule_applies(message):
+    assert RuleBasedTriage().evaluate(message) is None
+
+
+def run_triage(content: str) -> dict:
+    triager = EmailTriager()
+    triager.client = FakeOpenAI(content)
+    return asyncio.run(triager.triage("boss@example.com", "Budget", "Please review by Friday"))
+
+
+def test_triage_parses_every_field():
+    result = run_triage(json.dumps({
+        "classification": "action_required",
+        "priority_score": "85",
+        "factors": {"deadline": True},
+        "summary": "  Review the budget by Friday. ",
+        "next_action": "Reply with comments"
+    }))
+    
+    assert result == {
+        "classification": EmailClassification.ACTION_REQUIRED,
+        "priority_score": 85,
+        "factors": {"deadline": True},
+        "summary": "Review the budget by Friday.",
+        "next_action": "Reply with comments"
+    }
+
+
+def test_triage_invalidates_bad_fields_independently():
+    result = run_triage(json.dumps({
+        "classification": "VERY_IMPORTANT",
+        "priority_score": True,
+        "factors": ["deadline"],
+        "summary": "Budget review",
+        "next_action": "   "
+    }))
+    
+    assert result == {
+        "classification": None,
+        "priority_score": None,
+        "factors": {},
+        "summary": "Budget review",
+        "next_action": None
+    }
+
+
+@pytest.mark.parametrize("score, expected", [
+    (250, 100), (-3, 1), (42.9, 42), ("high", None), (None, None), ("1e999", None), (float("inf"), None)
+])
+def test_triage_priority_score_is_clamped(score, expected):
+    result = run_triage(json.dumps({"classification": "fyi", "priority_score": score}))
+    
+    assert result["priority_score"] == expected
+
+
+@pytest.mark.parametrize("content", ["not json", "[1, 2]", ""])
+def test_triage_unusable_response(content):
+    result = run_triage(content)
+    
+    assert result == {
+        "classification": None,
+        "priority_score": None,
+        "factors": {},
+        "summary": None,
+        "next_action": None
+    }
+
+
+def make_pipeline(triage_mode: str, reply=REPLY, latency: float = 0.0, **limits) -> tuple[EmailPipeline, FakeOpenAI]:
+    pipeline = EmailPipeline(triage_mode=triage_mode, **limits)
+    client = FakeOpenAI(reply, latency)
+    for stage in (pipeline.classifier, pipeline.scorer, pipeline.summarizer, pipeline.triager):
+        if stage:
+            stage.client = client
+    return pipeline, client
+
+
+def make_email(index: int) -> dict:
+    body = f"Hi,\n\nThe Q{index % 4 + 1} budget draft is attached. " + "Line items and notes follow. " * 100
+    return {"from_email": "boss@example.com", "subject": f"Budget {index}", "body": body}
+
+
+@pytest.mark.parametrize("triage_mode, requests", [("fused", 1), ("per_stage", 3)])
+def test_pipeline_keeps_factors_and_next_action(triage_mode, requests):
+    pipeline, client = make_pipeline(triage_mode)
+    
+    result = asyncio.run(pipeline.process(make_email(0)))
+    
+    assert result == {
+        "classification": EmailClassification.ACTION_REQUIRED,
+        "priority_score": 85,
+        "factors": {"deadline": True},
+        "summary": "Review the budget by Friday.",
+        "next_action": "Reply with comments",
+        "label_source": LabelSource.LLM
+    }
+    assert len(client.requests) == requests
+
+
+def test_fused_falls_back_per_field():
+    def reply(params):
+        if "triage" in params["messages"][0]["content"]:
+            return json.dumps({"classification": "fyi", "priority_score": "n/a", "summary": "Budget draft"})
+        return REPLY
+    
+    pipeline, client = make_pipeline("fused", reply)
+    
+    result = asyncio.run(pipeline.process(make_email(0)))
+    
+    assert result["classification"] == EmailClassification.FYI
+    assert result["summary"] == "Budget draft"
+    assert (result["priority_score"], result["factors"]) == (85, {"deadline": True})
+    assert len(client.requests) == 2
+
+
+def test_rule_triaged_mail_skips_the_llm():
+    pipeline, client = make_pipeline("per_stage")
+    newsletter = {**make_email(1), **email(["CATEGORY_PROMOTIONS"], from_email="boss@example.com")}
+    
+    results = asyncio.run(pipeline.process_many([make_email(0), newsletter]))
+    
+    assert results[1]["classification"] == EmailClassification.SPAM
+    assert results[1]["label_source"] == LabelSource.RULES
+    assert len(client.requests) == 3
+    assert pipeline.llm_calls_saved == 3
+
+
+@pytest.mark.benchmark
+def test_benchmark_fused_vs_per_stage():
+    emails = [make_email(i) for i in range(20)]
+    measured = {}
+    
+    # 20 ms per completion, 3000 requests/minute shared across the pipeline
+    for triage_mode in ("per_stage", "fused"):
+        pipeline, client = make_pipeline(triage_mode, latency=0.02, requests_per_minute=3000)
+        started = time.perf_counter()
+        asyncio.run(pipeline.process_many(emails))
+        measured[triage_mode] = (len(client.requests), client.prompt_tokens, (time.perf_counter() - started) * 1000)
+    
+    print("\n20 emails:", "; ".join(
+        f"{mode} {requests} requests, ~{tokens} prompt tokens, {ms:.0f} ms"
+        for mode, (requests, tokens, ms) in measured.items()
+    ))
+    (per_stage_requests, per_stage_tokens, per_stage_ms), (fused_requests, fused_tokens, fused_ms) = measured.values()
+    assert (per_stage_requests, fused_requests) == (60, 20)
+    assert fused_tokens < per_stage_tokens / 2
+    assert fused_ms < per_stage_ms / 2